@@ -0,0 +1,132 @@
+#!/usr/bin/env python3
+"""Measure how compute_high_price_stats scales with the number of days."""
+from __future__ import annotations
+
+import argparse
+import time
+
+import pandas as pd
+
+from review_analysis import (
+    HIGH_PRICE_BAND,
+    HOURS_PER_RECORD,
+    INFO_KEY,
+    SUMMARY_KEY,
+    TRADE_PRICE_BANDS,
+    aggregate_high_price_units,
+    compute_high_price_stats,
+    price_band_codes,
+)
+from synthetic_data import DEFAULT_START_DATE, build_basic_frame, build_trade_frame, company_names
+
+
+def legacy_high_price_units(
+    summary_df: pd.DataFrame, day_ahead_high_mask: pd.Series, real_time_high_mask: pd.Series
+) -> pd.DataFrame:
+    """Original per-unit loop, kept as the reference for timing and equality checks."""
+    unit_stats = []
+    for unit_key in summary_df["匹配键"].dropna().unique():
+        unit_data = summary_df[summary_df["匹配键"] == unit_key]
+        day_ahead_high_data = unit_data[day_ahead_high_mask[unit_data.index]]
+        real_time_high_data = unit_data[real_time_high_mask[unit_data.index]]
+        capacity = unit_data["机组容量"].iloc[0]
+        has_day_ahead = len(day_ahead_high_data) > 0
+        has_real_time = len(real_time_high_data) > 0
+        unit_stats.append({
+            "匹配键": unit_key,
+            "公司名称": unit_data["公司名称"].iloc[0],
+            "日前高价时长": len(day_ahead_high_data) / HOURS_PER_RECORD,
+            "实时高价时长": len(real_time_high_data) / HOURS_PER_RECORD,
+            "日前现货高价均价": day_ahead_high_data["日前出清节点价格"].mean() if has_day_ahead else 0,
+            "实时现货高价均价": real_time_high_data["日内出清节点价格"].mean() if has_real_time else 0,
+            "中长期平均持仓": day_ahead_high_data["中长期平均持仓_公司口径"].mean() if has_day_ahead else 0,
+            "高价日前平均中标负荷": (
+                day_ahead_high_data["日前中标出力"].mean() / capacity
+                if has_day_ahead and capacity and capacity > 0 else 0
+            ),
+            "高价实时平均负荷": (
+                real_time_high_data["日内实际出力"].mean() / capacity
+                if has_real_time and capacity and capacity > 0 else 0
+            ),
+        })
+    return pd.DataFrame(unit_stats)
+
+
+def build_data_out(companies: int, units: int, days: int) -> dict[str, pd.DataFrame]:
+    start_date = pd.to_datetime(DEFAULT_START_DATE).date()
+    names = company_names(companies)
+    trade = pd.concat(
+        [build_trade_frame(name, units, days, start_date, seed=index) for index, name in enumerate(names)],
+        ignore_index=True,
+    )
+    basic = pd.concat(
+        [build_basic_frame(name, units, seed=index) for index, name in enumerate(names)],
+        ignore_index=True,
+    )
+    return {SUMMARY_KEY: trade, INFO_KEY: basic}
+
+
+def prepared_unit_frame(data_out: dict[str, pd.DataFrame]) -> tuple[pd.DataFrame, pd.Series, pd.Series]:
+    """Inputs of the per-unit stage with the high-price masks, for comparing the two implementations."""
+    summary_df = data_out[SUMMARY_KEY].copy()
+    summary_df["匹配键"] = summary_df["公司名称"] + summary_df["机组名称"]
+    capacity = data_out[INFO_KEY].assign(匹配键=lambda df: df["公司名称"] + df["机组名称"])
+    summary_df = summary_df.merge(capacity[["匹配键", "机组容量"]], on="匹配键", how="left")
+    summary_df["中长期平均持仓_公司口径"] = 0.0
+    band_codes = price_band_codes(summary_df)
+    day_ahead_mask, real_time_mask = (
+        pd.Series(TRADE_PRICE_BANDS.mask(band_codes[column], HIGH_PRICE_BAND), index=summary_df.index)
+        for column in ("日前出清节点价格", "日内出清节点价格")
+    )
+    return summary_df, day_ahead_mask, real_time_mask
+
+
+def best_of(repeat: int, func, *args) -> float:
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func(*args)
+        timings.append(time.perf_counter() - started)
+    return min(timings)
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Benchmark compute_high_price_stats.")
+    parser.add_argument("--companies", type=int, default=10)
+    parser.add_argument("--units", type=int, default=2)
+    parser.add_argument("--days", type=int, nargs="+", default=[1, 7, 30, 90, 180, 365])
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--skip-legacy", action="store_true", help="不运行原逐机组循环")
+    return parser.parse_args()
+
+
+def main() -> None:
+    args = parse_args()
+    rows = []
+    for days in args.days:
+        data_out = build_data_out(args.companies, args.units, days)
+        start = pd.Timestamp(DEFAULT_START_DATE)
+        end = start + pd.Timedelta(days=days - 1)
+        row = {
+            "天数": days,
+            "行数": len(data_out[SUMMARY_KEY]),
+            "compute_high_price_stats(秒)": best_of(args.repeat, compute_high_price_stats, data_out, start, end),
+        }
+
+        unit_inputs = prepared_unit_frame(data_out)
+        row["机组聚合(秒)"] = best_of(args.repeat, aggregate_high_price_units, *unit_inputs)
+        if not args.skip_legacy:
+            row["原逐机组循环(秒)"] = best_of(args.repeat, legacy_high_price_units, *unit_inputs)
+            pd.testing.assert_frame_equal(
+                aggregate_high_price_units(*unit_inputs).sort_values("匹配键").reset_index(drop=True),
+                legacy_high_price_units(*unit_inputs).sort_values("匹配键").reset_index(drop=True),
+                check_dtype=False,
+            )
+        rows.append(row)
+        print(f"完成 {days} 天")
+
+    print(pd.DataFrame(rows).to_string(index=False, float_format=lambda value: f"{value:.4f}"))
+
+
+if __name__ == "__main__":
+    main()
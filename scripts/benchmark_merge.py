@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+"""Compare merge_data_files backends on a synthetic directory of workbooks."""
+from __future__ import annotations
+
+import argparse
+import contextlib
+import io
+import tempfile
+import time
+from pathlib import Path
+
+import pandas as pd
+
+from executors import BACKENDS
+from merge_data_files import merge_data_files
+from synthetic_data import DEFAULT_START_DATE, generate_company_workbooks
+
+
+def time_backend(
+    backend: str, input_dir: Path, output_path: Path, max_workers: int | None, streaming: bool = False
+) -> float:
+    started = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        merge_data_files(
+            max_workers=max_workers,
+            backend=backend,
+            input_dir=input_dir,
+            output_path=output_path,
+            use_cache=False,
+            streaming=streaming,
+        )
+    return time.perf_counter() - started
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Benchmark merge_data_files backends.")
+    parser.add_argument("--companies", type=int, default=16)
+    parser.add_argument("--units", type=int, default=2)
+    parser.add_argument("--days", type=int, default=1)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--max-workers", type=int, default=None)
+    parser.add_argument("--backends", nargs="+", choices=BACKENDS, default=list(BACKENDS))
+    parser.add_argument("--streaming", action="store_true", help="use the memory-bounded streaming assembly")
+    return parser.parse_args()
+
+
+def main() -> None:
+    args = parse_args()
+    start_date = pd.to_datetime(DEFAULT_START_DATE).date()
+    with tempfile.TemporaryDirectory() as tmp:
+        root = Path(tmp)
+        input_dir = root / "data_input"
+        generate_company_workbooks(input_dir, args.companies, args.units, args.days, start_date)
+        print(f"公司文件: {args.companies} 个, 每个 {args.units} 台机组 × {args.days} 天")
+
+        rows = []
+        for backend in args.backends:
+            timings = [
+                time_backend(
+                    backend, input_dir, root / "data_output" / f"{backend}.xlsx", args.max_workers, args.streaming
+                )
+                for _ in range(args.repeat)
+            ]
+            rows.append({"后端": backend, "最短(秒)": min(timings), "平均(秒)": sum(timings) / len(timings)})
+
+    result = pd.DataFrame(rows)
+    serial = result.loc[result["后端"] == "serial", "最短(秒)"]
+    if not serial.empty:
+        result["相对串行加速"] = serial.iloc[0] / result["最短(秒)"]
+    print(result.to_string(index=False, float_format=lambda value: f"{value:.3f}"))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,217 @@
+#!/usr/bin/env python3
+"""Time every pipeline entry point on synthetic data at several scales.
+
+Each scale (companies x units x days, 96 points per day) is generated once with
+synthetic_data. Each entry point then runs as a subprocess of its real CLI with
+--profile, so wall time, stage timings and peak RSS all come from the shared
+profiler. Results are appended as JSON lines to --results. --compare prints the
+ratio against an earlier results file, to spot regressions between releases.
+
+    python scripts/benchmark_pipeline.py --scales 4x2x1 16x2x7 --repeat 3
+    python scripts/benchmark_pipeline.py --compare bench_results/pipeline.jsonl
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import subprocess
+import sys
+import tempfile
+import time
+from dataclasses import dataclass
+from datetime import datetime
+from pathlib import Path
+
+import pandas as pd
+
+from synthetic_data import (
+    DEFAULT_START_DATE,
+    MERGED_TRADE_WORKBOOK,
+    MERGED_WORKBOOK,
+    POINTS_PER_DAY,
+    SPOT_FILE_NAME,
+    generate_dataset,
+)
+
+SCRIPTS_DIR = Path(__file__).resolve().parent
+ENTRY_POINTS = ("merge", "merge_streaming", "filter", "filter_excel", "review")
+DEFAULT_SCALES = ("4x2x1", "8x2x7", "16x2x31")
+DEFAULT_RESULTS = Path("bench_results") / "pipeline.jsonl"
+FILTER_DAYS = 7
+
+
+@dataclass(frozen=True)
+class Scale:
+    companies: int
+    units: int
+    days: int
+
+    @property
+    def label(self) -> str:
+        return f"{self.companies}x{self.units}x{self.days}"
+
+    @property
+    def trade_rows(self) -> int:
+        return self.companies * self.units * self.days * POINTS_PER_DAY
+
+
+def parse_scale(value: str) -> Scale:
+    try:
+        companies, units, days = (int(part) for part in value.lower().split("x"))
+    except ValueError as exc:
+        raise argparse.ArgumentTypeError(f"scale {value!r} should look like COMPANIESxUNITSxDAYS, e.g. 16x2x7") from exc
+    if min(companies, units, days) < 1:
+        raise argparse.ArgumentTypeError(f"scale {value!r} must be positive")
+    return Scale(companies, units, days)
+
+
+def entry_commands(scale: Scale, root: Path) -> dict[str, list[str]]:
+    """Each entry point's CLI arguments; paths are relative to the dataset root."""
+    start = pd.Timestamp(DEFAULT_START_DATE)
+    end = start + pd.Timedelta(days=scale.days - 1)
+    filter_end = start + pd.Timedelta(days=min(scale.days, FILTER_DAYS) - 1)
+    dates = {name: value.strftime("%Y-%m-%d") for name, value in (("start", start), ("end", end), ("filter_end", filter_end))}
+    merged = f"data_output/{MERGED_WORKBOOK}"
+    filter_args = [
+        "--start-date", dates["start"], "--end-date", dates["filter_end"],
+        "--s1", "1号机组", "--s2", "2号机组", "--status", "运行",
+    ]
+    return {
+        "merge": [
+            "merge_data_files.py", "--input-dir", "data_input",
+            "--output-path", "bench_merge/output.xlsx", "--no-cache",
+        ],
+        "merge_streaming": [
+            "merge_data_files.py", "--input-dir", "data_input",
+            "--output-path", "bench_merge_streaming/output.xlsx", "--no-cache", "--streaming",
+        ],
+        "filter": ["filter_output.py", "--input", merged, "--output", "bench_filter.xlsx", *filter_args],
+        "filter_excel": [
+            "filter_output.py", "--input", f"data_output/{MERGED_TRADE_WORKBOOK}",
+            "--output", "bench_filter_excel.xlsx", *filter_args,
+        ],
+        "review": [
+            "review_analysis.py", "--spot-path", f"data_input/{SPOT_FILE_NAME}",
+            "--output-workbook", merged, "--result-path", "bench_review.xlsx",
+            "--deep-start-date", dates["start"], "--deep-end-date", dates["end"],
+            "--high-start-date", dates["start"], "--high-end-date", dates["end"],
+        ],
+    }
+
+
+def run_entry(command: list[str], root: Path, profile_path: Path) -> tuple[float, dict]:
+    """Run one entry point once; return (wall seconds, profiler report)."""
+    script, *args = command
+    started = time.perf_counter()
+    completed = subprocess.run(
+        [sys.executable, str(SCRIPTS_DIR / script), *args, "--profile", "--profile-json", str(profile_path)],
+        cwd=root,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.PIPE,
+        text=True,
+    )
+    elapsed = time.perf_counter() - started
+    if completed.returncode != 0:
+        raise RuntimeError(f"{' '.join(command)} failed:\n{completed.stderr}")
+    return elapsed, json.loads(profile_path.read_text(encoding="utf-8"))
+
+
+def git_revision() -> str | None:
+    try:
+        completed = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=SCRIPTS_DIR, capture_output=True, text=True, check=True
+        )
+    except (OSError, subprocess.CalledProcessError):
+        return None
+    return completed.stdout.strip()
+
+
+def benchmark_scale(scale: Scale, entries: list[str], repeat: int, keep_dir: Path | None) -> list[dict]:
+    with tempfile.TemporaryDirectory() as tmp:
+        root = keep_dir / scale.label if keep_dir else Path(tmp)
+        started = time.perf_counter()
+        generate_dataset(
+            root, scale.companies, scale.units, scale.days,
+            pd.Timestamp(DEFAULT_START_DATE).date(), spot=True, merged=True,
+        )
+        print(f"[{scale.label}] 生成数据 {scale.trade_rows:,} 行交易量价, 用时 {time.perf_counter() - started:.1f}s")
+        commands = entry_commands(scale, root)
+        records = []
+        for entry in entries:
+            runs = [run_entry(commands[entry], root, Path(tmp) / f"{entry}-{index}.json") for index in range(repeat)]
+            timings = [elapsed for elapsed, _ in runs]
+            best_report = min(runs, key=lambda run: run[0])[1]
+            records.append({
+                "entry": entry,
+                "scale": scale.label,
+                "trade_rows": scale.trade_rows,
+                "repeat": repeat,
+                "best_s": round(min(timings), 4),
+                "mean_s": round(sum(timings) / len(timings), 4),
+                "peak_rss_mb": max(
+                    max(report["peak_rss_mb"] or 0, report["children_peak_rss_mb"] or 0) for _, report in runs
+                ),
+                "stages_ms": {stage["name"]: stage["ms"] for stage in best_report["stages"]},
+            })
+            print(f"[{scale.label}] {entry}: best {min(timings):.3f}s")
+        return records
+
+
+def load_results(path: Path) -> pd.DataFrame:
+    lines = [json.loads(line) for line in path.read_text(encoding="utf-8").splitlines() if line.strip()]
+    return pd.DataFrame(lines)
+
+
+def compare(current: pd.DataFrame, baseline: pd.DataFrame) -> pd.DataFrame:
+    """Ratio of current best time to the most recent baseline run of the same entry point and scale."""
+    latest = baseline.sort_values("timestamp").groupby(["entry", "scale"], as_index=False).last()
+    merged = current.merge(
+        latest[["entry", "scale", "best_s", "peak_rss_mb", "git_rev"]],
+        on=["entry", "scale"],
+        how="left",
+        suffixes=("", "_baseline"),
+    )
+    merged["time_ratio"] = merged["best_s"] / merged["best_s_baseline"]
+    merged["rss_ratio"] = merged["peak_rss_mb"] / merged["peak_rss_mb_baseline"]
+    return merged[["entry", "scale", "best_s", "best_s_baseline", "time_ratio", "peak_rss_mb", "rss_ratio", "git_rev_baseline"]]
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Benchmark merge_data_files, filter_output and review_analysis.")
+    parser.add_argument(
+        "--scales", nargs="+", type=parse_scale, default=[parse_scale(value) for value in DEFAULT_SCALES],
+        help=f"COMPANIESxUNITSxDAYS (default: {' '.join(DEFAULT_SCALES)})",
+    )
+    parser.add_argument("--entries", nargs="+", choices=ENTRY_POINTS, default=list(ENTRY_POINTS))
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--results", type=Path, default=DEFAULT_RESULTS, help="JSON lines file results are appended to")
+    parser.add_argument("--compare", type=Path, default=None, help="earlier results file to compare against")
+    parser.add_argument("--keep-data", type=Path, default=None, help="keep generated datasets under this directory")
+    return parser.parse_args()
+
+
+def main() -> None:
+    args = parse_args()
+    # Read the baseline first: --compare may point at the same file results are appended to
+    baseline = load_results(args.compare) if args.compare and args.compare.exists() else None
+    run_info = {"timestamp": datetime.now().isoformat(timespec="seconds"), "git_rev": git_revision()}
+    records = []
+    for scale in args.scales:
+        records.extend({**run_info, **record} for record in benchmark_scale(scale, args.entries, args.repeat, args.keep_data))
+
+    args.results.parent.mkdir(parents=True, exist_ok=True)
+    with args.results.open("a", encoding="utf-8") as fh:
+        for record in records:
+            fh.write(json.dumps(record, ensure_ascii=False) + "\n")
+
+    result = pd.DataFrame(records)
+    print(result[["entry", "scale", "trade_rows", "best_s", "mean_s", "peak_rss_mb"]].to_string(
+        index=False, float_format=lambda value: f"{value:.3f}"
+    ))
+    print(f"结果已追加到: {args.results}")
+    if baseline is not None:
+        print(compare(result, baseline).to_string(index=False, float_format=lambda value: f"{value:.3f}"))
+
+
+if __name__ == "__main__":
+    main()
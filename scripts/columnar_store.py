@@ -0,0 +1,250 @@
+"""列式数据文件读写：工作簿旁边的列式副本和日期分区只使用 Parquet（需要 pyarrow）。
+
+pickle 只用于 merge_data_files 自己的私有数据（解析缓存、流式合并的暂存片段），需要显式传入
+allow_pickle=True；用户数据目录中的 .pkl 文件不会被读取，因为读取 pickle 可以执行任意代码。
+"""
+from __future__ import annotations
+
+import json
+import shutil
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import pandas as pd
+
+PARQUET_SUFFIX = ".parquet"
+MISSING_PYARROW_WARNING = "未安装 pyarrow，不写列式副本和日期分区，下游将读取 XLSX（`pip install pyarrow`）"
+PICKLE_SUFFIX = ".pkl"
+FRAME_SUFFIXES = (PARQUET_SUFFIX, PICKLE_SUFFIX)
+
+_PARQUET_AVAILABLE: Optional[bool] = None
+
+
+def parquet_available() -> bool:
+    global _PARQUET_AVAILABLE
+    if _PARQUET_AVAILABLE is None:
+        try:
+            import pyarrow  # noqa: F401
+        except ImportError:
+            _PARQUET_AVAILABLE = False
+        else:
+            _PARQUET_AVAILABLE = True
+    return _PARQUET_AVAILABLE
+
+
+class ColumnarUnavailable(RuntimeError):
+    """无法写成 Parquet（未安装 pyarrow，或数据含 Parquet 不支持的列）"""
+
+
+def remove_frame(stem: Path) -> None:
+    """删除 stem 对应的所有格式文件"""
+    for suffix in FRAME_SUFFIXES:
+        stem.with_name(stem.name + suffix).unlink(missing_ok=True)
+
+
+def write_frame(df: pd.DataFrame, stem: Path, allow_pickle: bool = False) -> Path:
+    """把数据框写到 stem + 后缀，返回实际写入的文件路径
+
+    无法写成 Parquet 时，allow_pickle 为 True 则退回 pickle，否则抛出 ColumnarUnavailable。
+    """
+    stem.parent.mkdir(parents=True, exist_ok=True)
+    remove_frame(stem)
+    reason = "未安装 pyarrow"
+    if parquet_available():
+        path = stem.with_name(stem.name + PARQUET_SUFFIX)
+        try:
+            df.to_parquet(path, index=False)
+            return path
+        except Exception as e:
+            # Parquet 不支持的列（非字符串列名、混合类型的对象列等）
+            path.unlink(missing_ok=True)
+            reason = str(e)
+    if not allow_pickle:
+        raise ColumnarUnavailable(reason)
+    path = stem.with_name(stem.name + PICKLE_SUFFIX)
+    df.to_pickle(path)
+    return path
+
+
+def find_frame(stem: Path, allow_pickle: bool = False) -> Optional[Path]:
+    """查找 stem 对应的已有文件（Parquet 优先，allow_pickle 时也查找 pickle）"""
+    suffixes = FRAME_SUFFIXES if allow_pickle else (PARQUET_SUFFIX,)
+    for suffix in suffixes:
+        path = stem.with_name(stem.name + suffix)
+        if path.exists():
+            if suffix == PARQUET_SUFFIX and not parquet_available():
+                continue
+            return path
+    return None
+
+
+def read_frame(path: Path, columns: Optional[Sequence[str]] = None, allow_pickle: bool = False) -> pd.DataFrame:
+    """读取 write_frame 写出的文件，columns 不为空时只读取这些列"""
+    if path.suffix != PARQUET_SUFFIX and not allow_pickle:
+        raise ValueError(f"只读取 Parquet 格式的列式数据: {path}")
+    if path.suffix == PARQUET_SUFFIX:
+        if columns is not None:
+            import pyarrow.parquet as pq
+
+            available = set(pq.read_schema(path).names)
+            columns = [column for column in columns if column in available]
+        return pd.read_parquet(path, columns=columns)
+    df = pd.read_pickle(path)
+    if columns is not None:
+        df = df[[column for column in columns if column in df.columns]]
+    return df
+
+
+# 合并输出工作簿中的工作表名称 -> 列式副本的表名
+SHEET_TABLES = {
+    "基础信息": "basic",
+    "日前申报信息": "day_ahead",
+    "交易量价数据信息": "trade_price",
+}
+
+
+def columnar_stem(workbook_path: Path, table: str) -> Path:
+    """工作簿旁边列式副本的路径（不含后缀），例如 output.xlsx -> output.trade_price"""
+    return workbook_path.with_name(f"{workbook_path.stem}.{table}")
+
+
+def find_columnar_copy(workbook_path: Path, table: str) -> Optional[Path]:
+    """查找工作簿旁边的列式副本；副本比工作簿旧（工作簿被单独改写过）时视为不存在"""
+    path = find_frame(columnar_stem(workbook_path, table))
+    if path is None:
+        return None
+    if workbook_path.exists() and path.stat().st_mtime_ns < workbook_path.stat().st_mtime_ns:
+        return None
+    return path
+
+
+def write_columnar_copies(
+    workbook_path: Path, tables: Dict[str, pd.DataFrame]
+) -> Tuple[Dict[str, Path], List[str]]:
+    """在工作簿旁边写出各表的 Parquet 副本，并删除本次没有数据的表的旧副本
+
+    返回 (写出的副本 {表名: 路径}, 警告信息列表)。未安装 pyarrow 或某张表无法写成 Parquet 时
+    不写这张表的副本，下游会退回读取 XLSX。
+    """
+    written = {}
+    warnings: List[str] = []
+    for table in SHEET_TABLES.values():
+        stem = columnar_stem(workbook_path, table)
+        if table not in tables or not parquet_available():
+            remove_frame(stem)
+            continue
+        try:
+            written[table] = write_frame(tables[table], stem)
+        except ColumnarUnavailable as e:
+            warnings.append(f"{table} 无法写成 Parquet 副本（{e}），下游将读取 XLSX")
+    if not parquet_available():
+        warnings.append(MISSING_PYARROW_WARNING)
+    return written, warnings
+
+
+# 按日期分区存储：<工作簿名>.<表名>.partitions/<分区名>/part.parquet
+# 流式合并时每个分区按写入顺序分成多个片段：part-00000.parquet、part-00001.parquet ...
+PARTITION_MANIFEST = "_partitions.json"
+NULL_PARTITION = "__null__"
+PARTITION_FORMATS = {"D": "%Y-%m-%d", "M": "%Y-%m"}
+
+
+def partition_dir(workbook_path: Path, table: str) -> Path:
+    return workbook_path.with_name(f"{workbook_path.stem}.{table}.partitions")
+
+
+def partition_parts(part_dir: Path) -> List[Path]:
+    """分区目录下的数据文件：单个 part 文件，或按顺序排列的 part-NNNNN 片段"""
+    path = find_frame(part_dir / "part")
+    if path is not None:
+        return [path]
+    stems = sorted({path.name.split(".", 1)[0] for path in part_dir.glob("part-*.*")})
+    return [path for path in (find_frame(part_dir / stem) for stem in stems) if path is not None]
+
+
+def write_partition_manifest(directory: Path, date_column: str, freq: str, names: Sequence[str]) -> None:
+    # 清单最后写入，存在即表示分区完整
+    manifest = {"date_column": date_column, "freq": freq, "partitions": list(names)}
+    (directory / PARTITION_MANIFEST).write_text(json.dumps(manifest, ensure_ascii=False), encoding="utf-8")
+
+
+def partition_keys(dates: pd.Series, freq: str) -> pd.Series:
+    """每行所属的分区名，日期无法解析的行为 __null__"""
+    return pd.to_datetime(dates, errors="coerce").dt.strftime(PARTITION_FORMATS[freq]).fillna(NULL_PARTITION)
+
+
+def write_date_partitions(
+    df: pd.DataFrame, directory: Path, date_column: str = "日期", freq: str = "D"
+) -> List[str]:
+    """按日期把数据拆成每天（freq="D"）或每月（freq="M"）一个 Parquet 文件，返回分区名列表
+
+    日期无法解析的行放在 __null__ 分区，按日期筛选时不会被读取。无法写成 Parquet 时删除
+    已写出的部分并抛出 ColumnarUnavailable。
+    """
+    if freq not in PARTITION_FORMATS:
+        raise ValueError(f"不支持的分区粒度: {freq}")
+    shutil.rmtree(directory, ignore_errors=True)
+    directory.mkdir(parents=True)
+    keys = partition_keys(df[date_column], freq)
+    names = []
+    try:
+        for name, part in df.groupby(keys, sort=True):
+            write_frame(part.reset_index(drop=True), directory / name / "part")
+            names.append(name)
+    except ColumnarUnavailable:
+        shutil.rmtree(directory, ignore_errors=True)
+        raise
+    write_partition_manifest(directory, date_column, freq, names)
+    return names
+
+
+def find_date_partitions(workbook_path: Path, table: str, date_column: str = "日期") -> Optional[Path]:
+    """查找工作簿旁边按日期分区的副本；未写完、日期列不同或比工作簿旧时视为不存在"""
+    directory = partition_dir(workbook_path, table)
+    manifest_path = directory / PARTITION_MANIFEST
+    if not manifest_path.exists():
+        return None
+    if workbook_path.exists() and manifest_path.stat().st_mtime_ns < workbook_path.stat().st_mtime_ns:
+        return None
+    manifest = json.loads(manifest_path.read_text(encoding="utf-8"))
+    if manifest.get("date_column") != date_column:
+        return None
+    return directory
+
+
+def _partition_bounds(name: str, freq: str) -> Tuple[pd.Timestamp, pd.Timestamp]:
+    start = pd.Timestamp(name)
+    if freq == "M":
+        return start, start + pd.offsets.MonthEnd(0)
+    return start, start
+
+
+def read_date_partitions(
+    directory: Path,
+    start: Optional[pd.Timestamp] = None,
+    end: Optional[pd.Timestamp] = None,
+    columns: Optional[Sequence[str]] = None,
+) -> pd.DataFrame:
+    """只读取与 [start, end] 有交集的分区；start/end 都为空时读取全部分区"""
+    manifest = json.loads((directory / PARTITION_MANIFEST).read_text(encoding="utf-8"))
+    prune = start is not None or end is not None
+    frames = []
+    schema_path = None
+    for name in manifest["partitions"]:
+        if schema_path is None:
+            schema_path = next(iter(partition_parts(directory / name)), None)
+        if prune:
+            if name == NULL_PARTITION:
+                continue
+            first, last = _partition_bounds(name, manifest["freq"])
+            if (start is not None and last < pd.Timestamp(start).normalize()) or (
+                end is not None and first > pd.Timestamp(end)
+            ):
+                continue
+        frames.extend(read_frame(path, columns) for path in partition_parts(directory / name))
+    if not frames:
+        # 没有命中的分区时返回带完整列结构的空表
+        if schema_path is None:
+            return pd.DataFrame(columns=list(columns) if columns is not None else None)
+        return read_frame(schema_path, columns).iloc[0:0]
+    return pd.concat(frames, ignore_index=True)
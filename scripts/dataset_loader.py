@@ -0,0 +1,232 @@
+"""交易量价、基础信息和现货价格数据的统一加载。
+
+每张表都声明了列类型：日期列和数值列只在加载时解析一次（数值统一为 float64，
+保证金额类汇总与逐列 to_numeric 的结果一致），公司名称/机组名称存为 category。
+调用方可以通过 columns 只读取计算需要的列。交易量价数据加载后按 日期、时间 排序，
+日期区间用二分查找切片（select_date_range），不再对整表做比较。
+"""
+from __future__ import annotations
+
+from pathlib import Path
+from typing import Dict, Optional, Sequence, Tuple, Union
+
+import numpy as np
+import pandas as pd
+
+from columnar_store import (
+    SHEET_TABLES,
+    find_columnar_copy,
+    find_date_partitions,
+    read_date_partitions,
+    read_frame,
+)
+
+DATE = "date"
+FLOAT = "float64"
+CATEGORY = "category"
+TEXT = "text"  # 保持读取结果不变
+# 合并输出工作簿中交易量价数据所在的工作表
+TRADE_SHEET = next(sheet for sheet, table in SHEET_TABLES.items() if table == "trade_price")
+
+TRADE_SCHEMA: Dict[str, str] = {
+    "公司名称": CATEGORY,
+    "机组名称": CATEGORY,
+    "日期": DATE,
+    "时间": TEXT,
+    "机组状态": TEXT,
+    "机组运行状态": TEXT,
+    "日前中标出力": FLOAT,
+    "省内中长期上网电量": FLOAT,
+    "省内中长期均价": FLOAT,
+    "省间中长期上网电量": FLOAT,
+    "省间中长期均价": FLOAT,
+    "日前出清节点价格": FLOAT,
+    "日内实际出力": FLOAT,
+    "日内出清节点价格": FLOAT,
+}
+BASIC_SCHEMA: Dict[str, str] = {
+    "公司名称": CATEGORY,
+    "机组名称": CATEGORY,
+    "机组容量": FLOAT,
+}
+SPOT_SCHEMA: Dict[str, str] = {
+    "序号": TEXT,
+    "日期": DATE,
+    "日前出清价格(元/MWh)": FLOAT,
+    "实时出清价格(元/MWh)": FLOAT,
+}
+TABLE_SCHEMAS: Dict[str, Dict[str, str]] = {
+    "trade_price": TRADE_SCHEMA,
+    "basic": BASIC_SCHEMA,
+    "day_ahead": {"公司名称": CATEGORY, "机组名称": CATEGORY, "日期": DATE},
+    "spot": SPOT_SCHEMA,
+}
+# 加载后按这些列排序的表，用于按日期二分查找
+DATE_ORDER: Dict[str, Tuple[str, str]] = {
+    "trade_price": ("日期", "时间"),
+}
+SORTED_ATTR = "sorted_by"  # DataFrame.attrs 中记录排序列的键
+
+
+def coerce_frame(df: pd.DataFrame, schema: Dict[str, str]) -> pd.DataFrame:
+    """按 schema 转换列类型；已经是目标类型的列直接跳过，因此可以重复调用"""
+    for column, kind in schema.items():
+        if column not in df.columns:
+            continue
+        series = df[column]
+        if kind == DATE and not pd.api.types.is_datetime64_any_dtype(series):
+            df[column] = pd.to_datetime(series, errors="coerce")
+        elif kind == FLOAT and series.dtype != FLOAT:
+            df[column] = pd.to_numeric(series, errors="coerce").astype(FLOAT)
+        elif kind == CATEGORY and not isinstance(series.dtype, pd.CategoricalDtype):
+            df[column] = series.astype(CATEGORY)
+    return df
+
+
+def coerce_table(df: pd.DataFrame, table: str) -> pd.DataFrame:
+    return coerce_frame(df, TABLE_SCHEMAS[table])
+
+
+def date_sort_keys(df: pd.DataFrame, date_column: str = "日期", time_column: Optional[str] = "时间") -> Tuple[str, ...]:
+    return tuple(column for column in (date_column, time_column) if column and column in df.columns)
+
+
+def sort_by_date(
+    df: pd.DataFrame, date_column: str = "日期", time_column: Optional[str] = "时间"
+) -> pd.DataFrame:
+    """按日期（及时间列）稳定排序，缺失值排在最后，并在 attrs 中记录排序列
+
+    每列先用 factorize(sort=True) 编码，再合成一个整数键检查/排序；已经有序时不复制数据。
+    """
+    keys = date_sort_keys(df, date_column, time_column)
+    codes = np.zeros(len(df), dtype=np.int64)
+    for column in keys:
+        column_codes, uniques = pd.factorize(df[column], sort=True)
+        column_codes = np.where(column_codes < 0, len(uniques), column_codes)
+        codes = codes * (len(uniques) + 1) + column_codes
+    if len(codes) > 1 and (np.diff(codes) < 0).any():
+        df = df.take(np.argsort(codes, kind="stable")).reset_index(drop=True)
+    df.attrs[SORTED_ATTR] = keys
+    return df
+
+
+def is_date_sorted(df: pd.DataFrame, date_column: str = "日期", time_column: Optional[str] = "时间") -> bool:
+    """df 是否经 sort_by_date 按同样的列排过序（只看 attrs 标记，不扫描数据）"""
+    return df.attrs.get(SORTED_ATTR) == date_sort_keys(df, date_column, time_column)
+
+
+def slice_date_range(
+    df: pd.DataFrame,
+    start_date: Optional[pd.Timestamp],
+    end_date: Optional[pd.Timestamp],
+    date_column: str = "日期",
+) -> pd.DataFrame:
+    """在按 datetime64 日期列排好序的表上二分查找 [start_date, end_date]，返回行切片"""
+    lower, upper = date_range_bounds(df, start_date, end_date, date_column)
+    return df.iloc[lower:upper]
+
+
+def date_range_bounds(
+    df: pd.DataFrame,
+    start_date: Optional[pd.Timestamp],
+    end_date: Optional[pd.Timestamp],
+    date_column: str = "日期",
+) -> Tuple[int, int]:
+    """排好序的表中 [start_date, end_date] 对应的行位置区间 [lower, upper)"""
+    values = df[date_column].to_numpy()
+    lower = 0 if start_date is None else values.searchsorted(pd.Timestamp(start_date).to_datetime64(), side="left")
+    upper = len(df) if end_date is None else values.searchsorted(pd.Timestamp(end_date).to_datetime64(), side="right")
+    return int(lower), int(max(lower, upper))
+
+
+def select_date_range(
+    df: pd.DataFrame,
+    table: str,
+    start_date: Optional[pd.Timestamp],
+    end_date: Optional[pd.Timestamp],
+    date_column: str = "日期",
+) -> pd.DataFrame:
+    """取 [start_date, end_date] 内各行的副本，列类型按 table 的 schema 转换
+
+    加载时已排好序的表只做 O(log n) 的二分查找再复制命中的行；
+    其他输入（如调用方直接传入的 DataFrame）先在副本上转换类型并排序。
+    """
+    if not (is_date_sorted(df, date_column) and pd.api.types.is_datetime64_any_dtype(df[date_column])):
+        df = sort_by_date(coerce_table(df.copy(), table), date_column)
+    return coerce_table(slice_date_range(df, start_date, end_date, date_column).copy(), table)
+
+
+def order_table(df: pd.DataFrame, table: str) -> pd.DataFrame:
+    if table in DATE_ORDER:
+        return sort_by_date(df, *DATE_ORDER[table])
+    return df
+
+
+def _usecols(columns: Optional[Sequence[str]]):
+    if columns is None:
+        return None
+    wanted = set(columns)
+    return lambda name: name in wanted
+
+
+def read_excel_table(
+    source: Union[Path, pd.ExcelFile],
+    table: str,
+    sheet_name: Union[str, int] = 0,
+    columns: Optional[Sequence[str]] = None,
+) -> pd.DataFrame:
+    """从 Excel 工作表读取一张表，只解析 columns 中的列"""
+    df = pd.read_excel(source, sheet_name=sheet_name, usecols=_usecols(columns))
+    if "Unnamed: 0" in df.columns:
+        df = df.drop(columns=["Unnamed: 0"])
+    return order_table(coerce_table(df, table), table)
+
+
+def read_merged_table(
+    workbook_path: Path,
+    table: str,
+    columns: Optional[Sequence[str]] = None,
+    start_date: Optional[pd.Timestamp] = None,
+    end_date: Optional[pd.Timestamp] = None,
+    date_column: str = "日期",
+) -> Optional[pd.DataFrame]:
+    """读取 merge_data_files 在工作簿旁边写出的列式数据，没有可用副本时返回 None
+
+    给出日期范围且存在日期分区时只读取范围内的分区。
+    """
+    df = None
+    if start_date is not None or end_date is not None:
+        partitions = find_date_partitions(workbook_path, table, date_column)
+        if partitions is not None:
+            df = read_date_partitions(partitions, start_date, end_date, columns)
+    if df is None:
+        copy = find_columnar_copy(workbook_path, table)
+        if copy is None:
+            return None
+        df = read_frame(copy, columns)
+    return order_table(coerce_table(df, table), table)
+
+
+def load_trade_table(
+    path: Path,
+    columns: Optional[Sequence[str]] = None,
+    start_date: Optional[pd.Timestamp] = None,
+    end_date: Optional[pd.Timestamp] = None,
+    date_column: str = "日期",
+) -> pd.DataFrame:
+    """读取交易量价数据：优先使用列式副本/日期分区，否则读取工作簿
+
+    合并输出的工作簿读取其中的 交易量价数据信息 工作表（第一个工作表是 基础信息），
+    只有交易量价数据的工作簿读取第一个工作表。
+    """
+    df = read_merged_table(path, "trade_price", columns, start_date, end_date, date_column)
+    if df is None:
+        with pd.ExcelFile(path) as excel_file:
+            sheet = TRADE_SHEET if TRADE_SHEET in excel_file.sheet_names else 0
+            df = read_excel_table(excel_file, "trade_price", sheet, columns)
+    return df
+
+
+def load_spot_prices(path: Path, columns: Optional[Sequence[str]] = None) -> pd.DataFrame:
+    """读取现货出清电价文件，默认只读取 SPOT_SCHEMA 中的列"""
+    return read_excel_table(path, "spot", columns=list(SPOT_SCHEMA) if columns is None else columns)
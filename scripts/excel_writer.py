@@ -0,0 +1,194 @@
+"""按行流式写出 XLSX：优先使用 xlsxwriter 的 constant_memory 模式，未安装时退回 openpyxl 的 write_only 模式。
+
+两种方式都按行顺序写出、不在内存中保留整张工作表，比 DataFrame.to_excel 逐个单元格
+创建带样式的对象快得多。写出的值与 to_excel(index=False) 一致：缺失值留空，
+±inf 写为 "inf"/"-inf"，全部为零点的日期时间列写为日期。表头不带加粗/边框样式。
+超过 Excel 单个工作表行数/列数上限时与 to_excel 一样报错，不会截断。
+"""
+from __future__ import annotations
+
+from datetime import date, datetime
+from pathlib import Path
+from typing import Callable, Iterable, List, Mapping, Optional, Sequence, Tuple, Union
+
+import numpy as np
+import pandas as pd
+
+EXCEL_ENGINES = ("auto", "xlsxwriter", "openpyxl")
+DATE_FORMAT = "yyyy-mm-dd"
+DATETIME_FORMAT = "yyyy-mm-dd hh:mm:ss"
+EXCEL_MAX_ROWS = 1_048_575  # 一个工作表最多的数据行数（不含表头）
+EXCEL_MAX_COLUMNS = 16_384
+
+_XLSXWRITER_AVAILABLE: Optional[bool] = None
+
+
+def xlsxwriter_available() -> bool:
+    global _XLSXWRITER_AVAILABLE
+    if _XLSXWRITER_AVAILABLE is None:
+        try:
+            import xlsxwriter  # noqa: F401
+        except ImportError:
+            _XLSXWRITER_AVAILABLE = False
+        else:
+            _XLSXWRITER_AVAILABLE = True
+    return _XLSXWRITER_AVAILABLE
+
+
+def resolve_engine(engine: str = "auto") -> str:
+    """auto 时有 xlsxwriter 就用 xlsxwriter，否则用 openpyxl"""
+    if engine not in EXCEL_ENGINES:
+        raise ValueError(f"未知的 Excel 写出方式: {engine}，可选值: {', '.join(EXCEL_ENGINES)}")
+    if engine == "auto":
+        return "xlsxwriter" if xlsxwriter_available() else "openpyxl"
+    if engine == "xlsxwriter" and not xlsxwriter_available():
+        raise ValueError("未安装 xlsxwriter，先运行 `pip install xlsxwriter`，或改用 openpyxl/auto。")
+    return engine
+
+
+def _column_values(series: pd.Series) -> Tuple[list, bool]:
+    """一列转成按行写出的 Python 值，缺失值为 None；第二项表示这一列是否全是数值"""
+    if isinstance(series.dtype, pd.CategoricalDtype):
+        series = series.astype(object)
+    missing = series.isna().to_numpy()
+    numeric = False
+    if pd.api.types.is_datetime64_any_dtype(series):
+        if getattr(series.dt, "tz", None) is not None:
+            series = series.dt.tz_localize(None)
+        present = series[~missing]
+        if (present == present.dt.normalize()).all():
+            values = list(series.dt.date)
+        else:
+            values = series.astype(object).tolist()
+    elif pd.api.types.is_bool_dtype(series):
+        values = series.tolist()
+    elif pd.api.types.is_numeric_dtype(series):
+        array = series.to_numpy()
+        values = array.tolist()
+        if array.dtype.kind == "f" and np.isinf(array).any():
+            for position in np.flatnonzero(np.isinf(array)):
+                values[position] = "inf" if array[position] > 0 else "-inf"
+        else:
+            numeric = True
+    else:
+        values = series.tolist()
+    if missing.any():
+        for position in np.flatnonzero(missing):
+            values[position] = None
+    return values, numeric
+
+
+def iter_frame_rows(df: pd.DataFrame):
+    """逐行产生 (值列表, 各列是否全为数值)；每列只整体转换一次"""
+    converted = [_column_values(df.iloc[:, position]) for position in range(df.shape[1])]
+    numeric_columns = [numeric for _, numeric in converted]
+    return zip(*[values for values, _ in converted]) if converted else iter(()), numeric_columns
+
+
+def _check_sheet_size(sheet_name: str, rows: int, columns: int) -> None:
+    if rows > EXCEL_MAX_ROWS or columns > EXCEL_MAX_COLUMNS:
+        raise ValueError(
+            f"工作表 {sheet_name} 过大: {rows:,} 行 x {columns:,} 列，"
+            f"Excel 单个工作表最多 {EXCEL_MAX_ROWS:,} 行（不含表头）x {EXCEL_MAX_COLUMNS:,} 列"
+        )
+
+
+# 工作表名 -> (列名, 按顺序写出的数据块)
+SheetChunks = Mapping[str, Tuple[Sequence, Iterable[pd.DataFrame]]]
+
+
+def _write_xlsxwriter(path: Path, sheets: SheetChunks) -> None:
+    import xlsxwriter
+
+    workbook = xlsxwriter.Workbook(
+        str(path),
+        {
+            "constant_memory": True,
+            "strings_to_formulas": False,
+            "strings_to_urls": False,
+            "strings_to_numbers": False,
+        },
+    )
+    date_format = workbook.add_format({"num_format": DATE_FORMAT})
+    datetime_format = workbook.add_format({"num_format": DATETIME_FORMAT})
+    try:
+        for sheet_name, (columns, chunks) in sheets.items():
+            _check_sheet_size(sheet_name, 0, len(columns))
+            worksheet = workbook.add_worksheet(sheet_name)
+            worksheet.write_row(0, 0, [str(column) for column in columns])
+
+            def write_any(row: int, col: int, value) -> None:
+                if isinstance(value, datetime):
+                    worksheet.write_datetime(row, col, value, datetime_format)
+                elif isinstance(value, date):
+                    worksheet.write_datetime(row, col, value, date_format)
+                else:
+                    worksheet.write(row, col, value)
+
+            row = 0
+            for chunk in chunks:
+                # constant_memory 模式下超出上限的单元格会被静默丢弃，写出前先检查
+                _check_sheet_size(sheet_name, row + len(chunk), len(columns))
+                rows, numeric_columns = iter_frame_rows(chunk)
+                writers: List[Callable] = [
+                    worksheet.write_number if numeric else write_any for numeric in numeric_columns
+                ]
+                for row, values in enumerate(rows, start=row + 1):
+                    for col, value in enumerate(values):
+                        if value is not None:
+                            writers[col](row, col, value)
+    finally:
+        workbook.close()
+
+
+def _write_openpyxl(path: Path, sheets: SheetChunks) -> None:
+    from openpyxl import Workbook
+
+    workbook = Workbook(write_only=True)
+    try:
+        for sheet_name, (columns, chunks) in sheets.items():
+            _check_sheet_size(sheet_name, 0, len(columns))
+            worksheet = workbook.create_sheet(sheet_name)
+            worksheet.append([str(column) for column in columns])
+            written = 0
+            for chunk in chunks:
+                written += len(chunk)
+                _check_sheet_size(sheet_name, written, len(columns))
+                rows, _ = iter_frame_rows(chunk)
+                for values in rows:
+                    worksheet.append(values)
+    except BaseException:
+        # 写了一半的工作表也要关闭，否则其临时文件要到垃圾回收时才关闭
+        for worksheet in workbook.worksheets:
+            worksheet.close()
+        raise
+    workbook.save(path)
+
+
+def write_excel_chunks(path: Union[str, Path], sheets: SheetChunks, engine: str = "auto") -> str:
+    """按顺序写出各工作表，每个工作表的数据分块给出（各块的列须与列名一致），返回实际使用的写出方式
+
+    数据块可以是生成器，写完一块再取下一块，内存中只保留当前这一块。
+    某个工作表超过 Excel 的行数/列数上限时抛出 ValueError，不保留写了一半的文件。
+    """
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    resolved = resolve_engine(engine)
+    try:
+        if resolved == "xlsxwriter":
+            _write_xlsxwriter(path, sheets)
+        else:
+            _write_openpyxl(path, sheets)
+    except ValueError:
+        path.unlink(missing_ok=True)
+        raise
+    return resolved
+
+
+def write_excel_sheets(
+    path: Union[str, Path], sheets: Mapping[str, pd.DataFrame], engine: str = "auto"
+) -> str:
+    """把多个数据框按顺序写成同一工作簿的工作表（不写索引），返回实际使用的写出方式"""
+    return write_excel_chunks(
+        path, {sheet_name: (df.columns, [df]) for sheet_name, df in sheets.items()}, engine=engine
+    )
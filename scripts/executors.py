@@ -0,0 +1,63 @@
+"""merge_data_files 和 review_analysis 共用的执行器：进程池、线程池或当前线程顺序执行。"""
+from __future__ import annotations
+
+import os
+from concurrent.futures import FIRST_COMPLETED, Future, ProcessPoolExecutor, ThreadPoolExecutor, wait
+from typing import Callable, Dict, Iterable, Iterator, Optional, Tuple
+
+# 并行后端：process 绕开 GIL（openpyxl 解析是纯 Python、CPU 密集），thread/serial 便于对比和调试
+BACKENDS = ("process", "thread", "serial")
+
+
+class SerialExecutor:
+    """在当前线程中顺序执行任务，接口与 concurrent.futures 的执行器一致"""
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+    def submit(self, fn, *args, **kwargs) -> Future:
+        future = Future()
+        try:
+            future.set_result(fn(*args, **kwargs))
+        except Exception as e:
+            future.set_exception(e)
+        return future
+
+
+def worker_count(max_workers: Optional[int]) -> int:
+    return max_workers or os.cpu_count() or 1
+
+
+def create_executor(backend: str, max_workers: Optional[int]):
+    """根据后端名称创建执行器，max_workers 为空时使用 CPU 核心数"""
+    if backend not in BACKENDS:
+        raise ValueError(f"未知的并行后端: {backend}，可选值: {', '.join(BACKENDS)}")
+    if backend == "serial":
+        return SerialExecutor()
+    workers = worker_count(max_workers)
+    if backend == "process":
+        return ProcessPoolExecutor(max_workers=workers)
+    return ThreadPoolExecutor(max_workers=workers)
+
+
+def iter_completed(executor, fn: Callable, items: Iterable, window: Optional[int] = None) -> Iterator[Tuple[object, Future]]:
+    """按完成顺序产生 (参数, future)；window 限制同时在途的任务数，避免已完成的结果堆积在内存中"""
+    items = iter(items)
+    in_flight: Dict[Future, object] = {}
+
+    def fill():
+        for item in items:
+            in_flight[executor.submit(fn, item)] = item
+            if window is not None and len(in_flight) >= window:
+                break
+
+    fill()
+    while in_flight:
+        done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+        # 同一批完成的任务按提交顺序产出，串行后端的合并顺序与文件顺序一致
+        for future in [future for future in in_flight if future in done]:
+            yield in_flight.pop(future), future
+        fill()
@@ -1,14 +1,23 @@
 from __future__ import annotations
 
 import argparse
+import csv
+import json
 import re
+import threading
+from dataclasses import dataclass
 from datetime import date, datetime
 from pathlib import Path
-from typing import List, Optional, Tuple
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from profiler import Profiler, add_profile_arguments, format_duration, path_bytes
 
 DATE_FORMAT = "%Y-%m-%d"
 DEFAULT_INPUT = Path("output") / "合并交易量价数据.xlsx"
 DEFAULT_OUTPUT = Path("output") / "筛选交易量价数据.xlsx"
+EXCEL_SHEET_NAME_LIMIT = 31
+_INVALID_SHEET_CHARS = re.compile(r"[\[\]:*?/\\]")
+_UNIT_LIST_SEPARATORS = re.compile(r"[,，;；\s]+")
 UNIT_NUMBER_ALIASES = {
     3: 1,  # 3号机组视为1号机组
     4: 2,  # 4号机组视为2号机组
@@ -27,6 +36,8 @@ def parse_date(value: str) -> date:
 
 
 def build_parser() -> argparse.ArgumentParser:
+    from excel_writer import EXCEL_ENGINES
+
     parser = argparse.ArgumentParser(
         description="根据日期、机组和状态过滤 output/ 合并后的交易数据。"
     )
@@ -44,15 +55,13 @@ def build_parser() -> argparse.ArgumentParser:
     )
     parser.add_argument(
         "--start-date",
-        required=True,
         type=parse_date,
-        help="筛选区间起始日期，格式 YYYY-MM-DD (示例: 2026-01-10)",
+        help="筛选区间起始日期，格式 YYYY-MM-DD (示例: 2026-01-10)；非批量模式必填",
     )
     parser.add_argument(
         "--end-date",
-        required=True,
         type=parse_date,
-        help="筛选区间结束日期，格式 YYYY-MM-DD",
+        help="筛选区间结束日期，格式 YYYY-MM-DD；非批量模式必填",
     )
     parser.add_argument(
         "--units",
@@ -87,6 +96,26 @@ def build_parser() -> argparse.ArgumentParser:
         default="机组状态",
         help="状态列列名 (默认: %(default)s)",
     )
+    parser.add_argument(
+        "--batch",
+        type=Path,
+        help=(
+            "批量模式：JSON/YAML/CSV 格式的筛选条件列表，每条包含 name、start_date、end_date、"
+            "units(或 s1/s2)、status；输入文件只读取一次，每条结果写入 --output 的一个工作表"
+        ),
+    )
+    parser.add_argument(
+        "--batch-output-dir",
+        type=Path,
+        help="批量模式下改为每条筛选结果单独输出一个文件到该目录",
+    )
+    parser.add_argument(
+        "--excel-engine",
+        choices=EXCEL_ENGINES,
+        default="auto",
+        help="结果 XLSX 的写出方式：auto 优先 xlsxwriter，未安装时用 openpyxl (默认: %(default)s)",
+    )
+    add_profile_arguments(parser)
     return parser
 
 
@@ -100,9 +129,19 @@ def _collect_unit_ids(
         value = getattr(args, attr)
         if value:
             raw_units.append(value)
-    cleaned = [value.strip() for value in raw_units if value and value.strip()]
-    if not cleaned:
+    unit_ids, unit_keys = normalize_unit_ids(raw_units)
+    if not unit_ids:
         parser.error("必须至少提供一个机组编号，可使用 --units 或 --s1/--s2。")
+    return unit_ids, unit_keys
+
+
+def split_unit_list(value: str) -> List[str]:
+    """拆分 "1号机组, 2号机组" 这类以逗号/分号/空白分隔的机组列表"""
+    return [unit for unit in _UNIT_LIST_SEPARATORS.split(value) if unit]
+
+
+def normalize_unit_ids(raw_units: Iterable[str]) -> Tuple[List[str], List[Optional[str]]]:
+    cleaned = [str(value).strip() for value in raw_units if value is not None and str(value).strip()]
     ordered: List[str] = []
     seen = set()
     for unit in cleaned:
@@ -127,11 +166,19 @@ def _get_pandas():
     return _PANDAS
 
 
-def _normalize_text(series):
+def _map_distinct(series, func, missing=False):
+    """对列中每个不同的值只调用一次 func，再按编码向量化地映射回每一行；缺失值取 missing。"""
     pd = _get_pandas()
-    original = series.copy()
-    normalized = original.astype(str).str.strip()
-    return normalized.where(original.notna(), None)
+    import numpy as np
+
+    codes, uniques = pd.factorize(series)
+    lookup = np.array([func(value) for value in uniques] + [missing])
+    return pd.Series(lookup[codes], index=series.index)
+
+
+def build_unit_key_series(series):
+    """每行机组名称对应的 UNIT-n 键；正则只对不同的机组名称各执行一次。"""
+    return _map_distinct(series, _build_unit_key, missing=None)
 
 
 _UNIT_PATTERN_STRICT = re.compile(r"(?P<num>\d+)\s*(?:号)?\s*机组")
@@ -165,91 +212,357 @@ def _build_unit_key(value: Optional[str]) -> Optional[str]:
     return f"UNIT-{canonical_number}"
 
 
-def load_dataframe(path: Path, date_column: str):
+def load_dataframe(path: Path, date_column: str,
+                   start_date: Optional[date] = None, end_date: Optional[date] = None):
+    """读取交易量价数据；存在按日期分区的副本时只读取 [start_date, end_date] 内的分区"""
     pd = _get_pandas()
-    if not path.exists():
-        raise SystemExit(f"找不到输入文件: {path}")
+    from dataset_loader import load_trade_table
+
     try:
-        df = pd.read_excel(path)
+        df = load_trade_table(path, start_date=start_date, end_date=end_date, date_column=date_column)
+    except FileNotFoundError as exc:
+        raise SystemExit(f"找不到输入文件: {path}") from exc
     except ImportError as exc:  # pragma: no cover - delegated to pandas
         raise SystemExit("读取 Excel 需要 openpyxl，请先安装该依赖。") from exc
-    if "Unnamed: 0" in df.columns:
-        df = df.drop(columns=["Unnamed: 0"])
     if date_column not in df.columns:
         raise SystemExit(f"输入文件缺少日期列: {date_column}")
     df[date_column] = pd.to_datetime(df[date_column], errors="coerce").dt.date
-    if df[date_column].isna().all():
+    if not df.empty and df[date_column].isna().all():
         raise SystemExit("日期列解析失败，请检查列名或日期格式。")
     return df
 
 
+class FilterIndex:
+    """同一份数据上多次筛选时共用的预计算结果。
+
+    数据按 日期、时间 排序后保存一份 datetime64 日期数组，日期范围用二分查找定位行区间；
+    机组键整列只计算一次，机组和状态掩码按条件缓存，只在命中的行区间上组合。
+    """
+
+    def __init__(self, df, *, date_column: str, unit_column: str, status_column: str,
+                 cache_limit: Optional[int] = None):
+        pd = _get_pandas()
+        from dataset_loader import is_date_sorted, sort_by_date
+
+        missing = [col for col in (unit_column, status_column) if col not in df.columns]
+        if missing:
+            joined = ", ".join(missing)
+            raise SystemExit(f"输入文件缺少以下列: {joined}")
+        if not is_date_sorted(df, date_column):
+            df = sort_by_date(df, date_column)
+        self.df = df
+        self.date_column = date_column
+        self.unit_column = unit_column
+        self.status_column = status_column
+        self._dates = pd.to_datetime(df[date_column], errors="coerce").to_numpy()
+        self._unit_key_series = None
+        self._unit_masks: Dict[frozenset, object] = {}
+        self._status_masks: Dict[str, object] = {}
+        self._cache_lock = threading.Lock()
+        self.cache_limit = cache_limit
+
+    def _cached(self, cache: Dict, key, compute):
+        """按 key 缓存掩码；设置了 cache_limit 时淘汰最早缓存的条目
+
+        filter_server 的多个请求线程共用同一个索引，查找、插入和淘汰都在锁内进行；
+        掩码在锁外计算，同一个 key 并发计算时以先写入的结果为准。
+        """
+        with self._cache_lock:
+            if key in cache:
+                return cache[key]
+        value = compute()
+        with self._cache_lock:
+            if key not in cache:
+                if self.cache_limit is not None and len(cache) >= self.cache_limit:
+                    cache.pop(next(iter(cache)))
+                cache[key] = value
+            return cache[key]
+
+    @property
+    def unit_key_series(self):
+        if self._unit_key_series is None:
+            self._unit_key_series = build_unit_key_series(self.df[self.unit_column])
+        return self._unit_key_series
+
+    def date_bounds(self, start_date: date, end_date: date) -> Tuple[int, int]:
+        """[start_date, end_date] 对应的行区间 [lower, upper)"""
+        pd = _get_pandas()
+        lower = self._dates.searchsorted(pd.Timestamp(start_date).to_datetime64(), side="left")
+        upper = self._dates.searchsorted(pd.Timestamp(end_date).to_datetime64(), side="right")
+        return int(lower), int(max(lower, upper))
+
+    def unit_mask(self, unit_keys: Iterable[Optional[str]]):
+        key = frozenset(unit for unit in unit_keys if unit)
+        return self._cached(
+            self._unit_masks, key, lambda: self.unit_key_series.isin(key).to_numpy()
+        )
+
+    def status_mask(self, status: str):
+        import numpy as np
+
+        status_value = status.strip()
+        if not status_value:
+            return self._cached(
+                self._status_masks, status_value, lambda: np.ones(len(self.df), dtype=bool)
+            )
+        return self._cached(
+            self._status_masks,
+            status_value,
+            lambda: _map_distinct(
+                self.df[self.status_column], lambda value: str(value).strip() == status_value
+            ).to_numpy(dtype=bool),
+        )
+
+    def select(self, *, unit_keys: List[Optional[str]], start_date: date, end_date: date, status: str):
+        """筛选结果，行已按 日期、时间 排好序"""
+        lower, upper = self.date_bounds(start_date, end_date)
+        mask = self.unit_mask(unit_keys)[lower:upper] & self.status_mask(status)[lower:upper]
+        return self.df.iloc[lower:upper][mask].reset_index(drop=True)
+
+
 def filter_dataframe(df, *, date_column: str, unit_column: str, status_column: str,
                       unit_ids: List[str], unit_keys: List[Optional[str]],
                       start_date: date, end_date: date, status: str):
-    pd = _get_pandas()
-    missing = [col for col in (unit_column, status_column) if col not in df.columns]
-    if missing:
-        joined = ", ".join(missing)
-        raise SystemExit(f"输入文件缺少以下列: {joined}")
-
-    unit_series = _normalize_text(df[unit_column])
-    status_series = _normalize_text(df[status_column])
-    date_series = df[date_column]
-    unit_key_series = unit_series.apply(_build_unit_key)
-
-    status_value = status.strip()
-    date_mask = (date_series >= start_date) & (date_series <= end_date)
-    unit_key_set = {key for key in unit_keys if key}
-    unit_mask = unit_key_series.isin(unit_key_set)
-    if status_value:
-        status_mask = status_series == status_value
-    else:
-        status_mask = pd.Series(True, index=df.index)
+    index = FilterIndex(
+        df, date_column=date_column, unit_column=unit_column, status_column=status_column
+    )
+    return index.select(
+        unit_keys=unit_keys, start_date=start_date, end_date=end_date, status=status
+    )
 
-    mask = date_mask & unit_mask & status_mask
-    filtered = df.loc[mask].copy()
 
-    sort_columns = [date_column]
-    if "时间" in filtered.columns:
-        sort_columns.append("时间")
-    filtered = filtered.sort_values(sort_columns).reset_index(drop=True)
-    return filtered
+@dataclass
+class FilterSpec:
+    """批量模式中的一条筛选条件。"""
 
+    name: str
+    start_date: date
+    end_date: date
+    unit_ids: List[str]
+    unit_keys: List[Optional[str]]
+    status: str
 
-def save_results(df, output_path: Path):
-    output_path.parent.mkdir(parents=True, exist_ok=True)
-    df.to_excel(output_path, index=False, sheet_name="筛选结果")
+
+def _read_spec_records(path: Path) -> List[dict]:
+    suffix = path.suffix.lower()
+    if suffix == ".csv":
+        with open(path, newline="", encoding="utf-8-sig") as fh:
+            return list(csv.DictReader(fh))
+    text = path.read_text(encoding="utf-8")
+    if suffix in (".yaml", ".yml"):
+        try:
+            import yaml  # type: ignore
+        except ImportError as exc:  # pragma: no cover - import guard
+            raise SystemExit("读取 YAML 需要 PyYAML，先运行 `pip install pyyaml`，或改用 JSON/CSV。") from exc
+        data = yaml.safe_load(text)
+    elif suffix == ".json":
+        data = json.loads(text)
+    else:
+        raise SystemExit(f"不支持的批量条件文件格式: {path.suffix}（支持 .json/.yaml/.yml/.csv）")
+    if isinstance(data, dict):
+        data = data.get("filters", [])
+    if not isinstance(data, list):
+        raise SystemExit("批量条件文件应为筛选条件列表，或包含 filters 列表的对象。")
+    return data
+
+
+def _spec_date(value, field: str, position: int) -> date:
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, date):
+        return value
+    if not value:
+        raise SystemExit(f"第 {position} 条筛选条件缺少 {field}")
+    try:
+        return datetime.strptime(str(value).strip(), DATE_FORMAT).date()
+    except ValueError as exc:
+        raise SystemExit(f"第 {position} 条筛选条件的 {field} {value!r} 不符合 {DATE_FORMAT} 格式") from exc
+
+
+def load_filter_specs(path: Path, default_status: str) -> List[FilterSpec]:
+    if not path.exists():
+        raise SystemExit(f"找不到批量条件文件: {path}")
+    specs: List[FilterSpec] = []
+    positions: Dict[str, int] = {}
+    for position, record in enumerate(_read_spec_records(path), start=1):
+        if not isinstance(record, dict):
+            raise SystemExit(f"第 {position} 条筛选条件格式不正确: {record!r}")
+        units = record.get("units") or []
+        if isinstance(units, str):
+            units = split_unit_list(units)
+        raw_units = list(units) + [record.get(attr) for attr in ("s1", "s2") if record.get(attr)]
+        unit_ids, unit_keys = normalize_unit_ids(raw_units)
+        if not unit_ids:
+            raise SystemExit(f"第 {position} 条筛选条件没有提供机组编号 (units 或 s1/s2)")
+        start_date = _spec_date(record.get("start_date"), "start_date", position)
+        end_date = _spec_date(record.get("end_date"), "end_date", position)
+        if start_date > end_date:
+            raise SystemExit(f"第 {position} 条筛选条件的开始日期晚于结束日期")
+        status = record.get("status")
+        # 结果按名称输出和汇总，重名的条件会互相覆盖
+        name = str(record.get("name") or f"筛选{position}").strip()
+        if name in positions:
+            raise SystemExit(f"第 {position} 条筛选条件的名称 {name!r} 与第 {positions[name]} 条重复")
+        positions[name] = position
+        specs.append(
+            FilterSpec(
+                name=name,
+                start_date=start_date,
+                end_date=end_date,
+                unit_ids=unit_ids,
+                unit_keys=unit_keys,
+                status=(default_status if status is None else str(status)).strip(),
+            )
+        )
+    if not specs:
+        raise SystemExit(f"批量条件文件中没有筛选条件: {path}")
+    return specs
+
+
+def _unique_sheet_names(names: Iterable[str]) -> List[str]:
+    result: List[str] = []
+    used = set()
+    for name in names:
+        base = _INVALID_SHEET_CHARS.sub("_", name)[:EXCEL_SHEET_NAME_LIMIT] or "筛选结果"
+        candidate = base
+        counter = 2
+        while candidate in used:
+            suffix = f"_{counter}"
+            candidate = base[: EXCEL_SHEET_NAME_LIMIT - len(suffix)] + suffix
+            counter += 1
+        used.add(candidate)
+        result.append(candidate)
+    return result
+
+
+def save_results(df, output_path: Path, engine: str = "auto"):
+    from excel_writer import write_excel_sheets
+
+    write_excel_sheets(output_path, {"筛选结果": df}, engine=engine)
+
+
+def save_batch_results(results: Dict[str, object], output_path: Path, engine: str = "auto") -> Dict[str, str]:
+    """每条筛选结果写入同一工作簿的一个工作表，返回 条件名 -> 工作表名"""
+    from excel_writer import write_excel_sheets
+
+    sheet_names = dict(zip(results, _unique_sheet_names(results)))
+    write_excel_sheets(
+        output_path, {sheet_names[name]: df for name, df in results.items()}, engine=engine
+    )
+    return sheet_names
+
+
+def run_batch(args: argparse.Namespace, profiler: Optional[Profiler] = None) -> None:
+    profiler = profiler or Profiler("filter_output")
+    specs = load_filter_specs(args.batch, args.status)
+    with profiler.stage("加载") as stage:
+        df = load_dataframe(
+            args.input,
+            args.date_column,
+            min(spec.start_date for spec in specs),
+            max(spec.end_date for spec in specs),
+        )
+        stage.rows, stage.bytes = len(df), path_bytes(args.input)
+    with profiler.stage("建立索引") as stage:
+        index = FilterIndex(
+            df,
+            date_column=args.date_column,
+            unit_column=args.unit_column,
+            status_column=args.status_column,
+        )
+        stage.rows = len(index.df)
+    with profiler.stage("筛选") as stage:
+        results = {
+            spec.name: index.select(
+                unit_keys=spec.unit_keys,
+                start_date=spec.start_date,
+                end_date=spec.end_date,
+                status=spec.status,
+            )
+            for spec in specs
+        }
+        stage.rows = sum(len(filtered) for filtered in results.values())
+
+    with profiler.stage("保存") as stage:
+        if args.batch_output_dir:
+            file_names = _unique_sheet_names(results)
+            targets = {}
+            for (name, filtered), file_name in zip(results.items(), file_names):
+                target = args.batch_output_dir / f"{file_name}.xlsx"
+                save_results(filtered, target, args.excel_engine)
+                targets[name] = str(target)
+            stage.bytes = path_bytes(*targets.values())
+        else:
+            sheet_names = save_batch_results(results, args.output, args.excel_engine)
+            targets = {name: f"{args.output} [{sheet}]" for name, sheet in sheet_names.items()}
+            stage.bytes = path_bytes(args.output)
+        stage.rows = sum(len(filtered) for filtered in results.values())
+
+    print("=" * 60)
+    print("批量筛选完成")
+    print(f"输入文件: {args.input}")
+    print(f"读取行数: {len(df)}")
+    print(f"筛选条件: {len(specs)} 条")
+    for spec in specs:
+        print(
+            f"- {spec.name}: 日期 {spec.start_date:%Y-%m-%d} 至 {spec.end_date:%Y-%m-%d}; "
+            f"机组 {', '.join(spec.unit_ids)}; 状态 {spec.status or '全部'}; "
+            f"结果 {len(results[spec.name])} 行 -> {targets[spec.name]}"
+        )
+    print(f"用时: {format_duration(profiler.total_seconds)}")
+    print("=" * 60)
 
 
 def main() -> None:
     parser = build_parser()
     args = parser.parse_args()
 
+    from excel_writer import resolve_engine
+
+    try:
+        resolve_engine(args.excel_engine)
+    except ValueError as exc:
+        parser.error(str(exc))
+
+    profiler = Profiler.from_args("filter_output", args)
+    if args.batch is not None:
+        run_batch(args, profiler)
+        profiler.finish()
+        return
+
+    if args.start_date is None or args.end_date is None:
+        parser.error("非批量模式必须提供 --start-date 和 --end-date。")
     if args.start_date > args.end_date:
         parser.error("开始日期不能晚于结束日期。")
 
     args.unit_ids, args.unit_keys = _collect_unit_ids(args, parser)
     args.status = args.status.strip()
 
-    df = load_dataframe(args.input, args.date_column)
-    filtered = filter_dataframe(
-        df,
-        date_column=args.date_column,
-        unit_column=args.unit_column,
-        status_column=args.status_column,
-        unit_ids=args.unit_ids,
-        unit_keys=args.unit_keys,
-        start_date=args.start_date,
-        end_date=args.end_date,
-        status=args.status,
-    )
-
-    save_results(filtered, args.output)
+    with profiler.stage("加载") as stage:
+        df = load_dataframe(args.input, args.date_column, args.start_date, args.end_date)
+        stage.rows, stage.bytes = len(df), path_bytes(args.input)
+    with profiler.stage("筛选") as stage:
+        filtered = filter_dataframe(
+            df,
+            date_column=args.date_column,
+            unit_column=args.unit_column,
+            status_column=args.status_column,
+            unit_ids=args.unit_ids,
+            unit_keys=args.unit_keys,
+            start_date=args.start_date,
+            end_date=args.end_date,
+            status=args.status,
+        )
+        stage.rows = len(filtered)
+
+    with profiler.stage("保存") as stage:
+        save_results(filtered, args.output, args.excel_engine)
+        stage.rows, stage.bytes = len(filtered), path_bytes(args.output)
 
     print("=" * 60)
     print("数据筛选完成")
     print(f"输入文件: {args.input}")
-    print(f"总行数: {len(df)}")
+    print(f"读取行数: {len(df)}")
     print(
         f"筛选条件: 日期 {args.start_date:%Y-%m-%d} 至 {args.end_date:%Y-%m-%d}; "
         f"机组 {', '.join(args.unit_ids)}; 状态 {args.status or '全部'}"
@@ -262,7 +575,9 @@ def main() -> None:
         preview = filtered.head(10)
         print("示例数据(前10行):")
         print(preview.to_string(index=False))
+    print(f"用时: {format_duration(profiler.total_seconds)}")
     print("=" * 60)
+    profiler.finish()
 
 
 if __name__ == "__main__":
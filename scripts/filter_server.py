@@ -0,0 +1,271 @@
+"""常驻内存的交易量价筛选服务。
+
+启动时读取一次合并后的交易数据并建立机组键/状态/日期掩码索引，之后通过本机 HTTP
+接口回答与 filter_output 相同口径的筛选请求；源文件的修改时间变化后自动重新加载。
+
+    python scripts/filter_server.py --input data_output/output.xlsx --port 8765
+    curl -G 'http://127.0.0.1:8765/filter' --data-urlencode start_date=2026-03-02 \
+        --data-urlencode end_date=2026-03-03 --data-urlencode units=1号机组,2号机组
+
+查询参数中的中文需要按 UTF-8 百分号编码（如上面的 --data-urlencode），直接写在 URL 里的原始字节
+不保证按 UTF-8 解码。
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import threading
+import time
+import traceback
+from datetime import date
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import parse_qs, urlparse
+
+from filter_output import (
+    DEFAULT_INPUT,
+    FilterIndex,
+    load_dataframe,
+    normalize_unit_ids,
+    parse_date,
+    split_unit_list,
+)
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8765
+DEFAULT_CACHE_LIMIT = 256
+
+
+class QueryError(ValueError):
+    """请求参数不合法，对应 HTTP 400。"""
+
+
+class ResidentTable:
+    """常驻内存的交易表及其筛选索引，按源文件修改时间自动重新加载。"""
+
+    def __init__(self, path: Path, *, date_column: str, unit_column: str, status_column: str,
+                 cache_limit: Optional[int] = DEFAULT_CACHE_LIMIT):
+        self.path = path
+        self.date_column = date_column
+        self.unit_column = unit_column
+        self.status_column = status_column
+        self.cache_limit = cache_limit
+        self.index: Optional[FilterIndex] = None
+        self.mtime_ns: Optional[int] = None
+        self.loaded_at: Optional[float] = None
+        self.load_seconds = 0.0
+        self._lock = threading.Lock()
+
+    def _stat_mtime(self) -> Optional[int]:
+        try:
+            return self.path.stat().st_mtime_ns
+        except FileNotFoundError:
+            return None
+
+    def reload(self) -> None:
+        started = time.perf_counter()
+        mtime_ns = self._stat_mtime()
+        df = load_dataframe(self.path, self.date_column)
+        index = FilterIndex(
+            df,
+            date_column=self.date_column,
+            unit_column=self.unit_column,
+            status_column=self.status_column,
+            cache_limit=self.cache_limit,
+        )
+        index.unit_key_series  # 加载时就建好机组键，首个请求不用等待
+        self.index = index
+        self.mtime_ns = mtime_ns
+        self.loaded_at = time.time()
+        self.load_seconds = time.perf_counter() - started
+        print(f"已加载 {self.path}: {len(df)} 行, 用时 {self.load_seconds:.2f} 秒", flush=True)
+
+    def current(self) -> FilterIndex:
+        """返回最新的索引；源文件被改写时先重新加载，文件暂时缺失时继续使用旧数据"""
+        mtime_ns = self._stat_mtime()
+        if self.index is not None and (mtime_ns is None or mtime_ns == self.mtime_ns):
+            return self.index
+        with self._lock:
+            if self.index is None or (mtime_ns is not None and mtime_ns != self.mtime_ns):
+                self.reload()
+        return self.index
+
+    def status(self) -> Dict[str, object]:
+        index = self.current()
+        return {
+            "input": str(self.path),
+            "rows": len(index.df),
+            "columns": [str(column) for column in index.df.columns],
+            "mtime_ns": self.mtime_ns,
+            "loaded_at": self.loaded_at,
+            "load_seconds": round(self.load_seconds, 3),
+        }
+
+
+def _first(params: Dict[str, List[str]], name: str) -> Optional[str]:
+    values = params.get(name)
+    return values[0] if values else None
+
+
+def _query_date(value: Optional[str], name: str) -> date:
+    if not value:
+        raise QueryError(f"缺少参数 {name}")
+    try:
+        return parse_date(value.strip())
+    except argparse.ArgumentTypeError as exc:
+        raise QueryError(str(exc)) from exc
+
+
+def parse_query(params: Dict[str, List[str]], default_status: str) -> Tuple[date, date, List[str], List[Optional[str]], str]:
+    """把查询参数解析为 (start_date, end_date, unit_ids, unit_keys, status)"""
+    start_date = _query_date(_first(params, "start_date"), "start_date")
+    end_date = _query_date(_first(params, "end_date"), "end_date")
+    if start_date > end_date:
+        raise QueryError("开始日期不能晚于结束日期")
+    raw_units: List[str] = []
+    for value in params.get("units", []):
+        raw_units.extend(split_unit_list(value))
+    for name in ("s1", "s2"):
+        raw_units.extend(params.get(name, []))
+    unit_ids, unit_keys = normalize_unit_ids(raw_units)
+    if not unit_ids:
+        raise QueryError("必须至少提供一个机组编号 (units 或 s1/s2)")
+    status = _first(params, "status")
+    return start_date, end_date, unit_ids, unit_keys, default_status if status is None else status
+
+
+def parse_limit(params: Dict[str, List[str]]) -> Optional[int]:
+    """limit 为返回的最多行数（非负整数），未提供时返回 None"""
+    value = _first(params, "limit")
+    if not value:
+        return None
+    try:
+        limit = int(value)
+    except ValueError as exc:
+        raise QueryError(f"limit 应为整数: {value!r}") from exc
+    if limit < 0:
+        raise QueryError(f"limit 不能为负数: {limit}")
+    return limit
+
+
+def build_handler(table: ResidentTable, default_status: str):
+    class FilterRequestHandler(BaseHTTPRequestHandler):
+        def _send(self, code: int, body: bytes, content_type: str) -> None:
+            self.send_response(code)
+            self.send_header("Content-Type", content_type)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def _send_json(self, code: int, payload) -> None:
+            body = json.dumps(payload, ensure_ascii=False, default=str).encode("utf-8")
+            self._send(code, body, "application/json; charset=utf-8")
+
+        def _handle(self, params: Dict[str, List[str]]) -> None:
+            path = urlparse(self.path).path
+            try:
+                if path == "/health":
+                    self._send_json(200, table.status())
+                elif path == "/filter":
+                    self._filter(params)
+                else:
+                    self._send_json(404, {"error": f"未知路径 {path}，可用 /filter 或 /health"})
+            except QueryError as exc:
+                self._send_json(400, {"error": str(exc)})
+            except SystemExit as exc:
+                self._send_json(500, {"error": str(exc)})
+            except Exception as exc:
+                # 重新加载或筛选时的其他错误：记录堆栈，并返回 500 而不是直接断开连接
+                traceback.print_exc()
+                self._send_json(500, {"error": f"{type(exc).__name__}: {exc}"})
+
+        def _filter(self, params: Dict[str, List[str]]) -> None:
+            started = time.perf_counter()
+            start_date, end_date, unit_ids, unit_keys, status = parse_query(params, default_status)
+            limit = parse_limit(params)
+            index = table.current()
+            filtered = index.select(
+                unit_keys=unit_keys, start_date=start_date, end_date=end_date, status=status
+            )
+            if limit is not None:
+                filtered = filtered.head(limit)
+            if (_first(params, "format") or "json").lower() == "csv":
+                body = filtered.to_csv(index=False).encode("utf-8-sig")
+                self._send(200, body, "text/csv; charset=utf-8")
+                return
+            payload = json.loads(filtered.to_json(orient="split", index=False, date_format="iso", force_ascii=False))
+            payload.update({
+                "rows": len(filtered),
+                "units": unit_ids,
+                "status": status,
+                "elapsed_ms": round((time.perf_counter() - started) * 1000, 3),
+            })
+            self._send_json(200, payload)
+
+        def do_GET(self) -> None:  # noqa: N802 - http.server naming
+            self._handle(parse_qs(urlparse(self.path).query))
+
+        def do_POST(self) -> None:  # noqa: N802 - http.server naming
+            length = int(self.headers.get("Content-Length") or 0)
+            try:
+                body = json.loads(self.rfile.read(length) or b"{}")
+            except json.JSONDecodeError:
+                self._send_json(400, {"error": "请求体不是合法 JSON"})
+                return
+            if not isinstance(body, dict):
+                self._send_json(400, {"error": "请求体应为 JSON 对象"})
+                return
+            params = {
+                key: [str(item) for item in value] if isinstance(value, list) else [str(value)]
+                for key, value in body.items()
+                if value is not None
+            }
+            self._handle(params)
+
+        def log_message(self, format: str, *args) -> None:  # noqa: A002 - http.server signature
+            print(f"{self.address_string()} - {format % args}", flush=True)
+
+    return FilterRequestHandler
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description="常驻内存的交易量价筛选服务 (本机 HTTP)。")
+    parser.add_argument("--input", type=Path, default=DEFAULT_INPUT, help="合并后的交易数据文件 (默认: %(default)s)")
+    parser.add_argument("--host", default=DEFAULT_HOST, help="监听地址 (默认: %(default)s)")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT, help="监听端口 (默认: %(default)s)")
+    parser.add_argument("--status", default="运行", help="请求未指定 status 时使用的机组状态 (默认: %(default)s)")
+    parser.add_argument("--date-column", default="日期", help="日期列列名 (默认: %(default)s)")
+    parser.add_argument("--unit-column", default="机组名称", help="机组编号/名称所在列 (默认: %(default)s)")
+    parser.add_argument("--status-column", default="机组状态", help="状态列列名 (默认: %(default)s)")
+    parser.add_argument(
+        "--cache-limit",
+        type=int,
+        default=DEFAULT_CACHE_LIMIT,
+        help="每类掩码最多缓存的条件数 (默认: %(default)s)",
+    )
+    return parser
+
+
+def main() -> None:
+    args = build_parser().parse_args()
+    table = ResidentTable(
+        args.input,
+        date_column=args.date_column,
+        unit_column=args.unit_column,
+        status_column=args.status_column,
+        cache_limit=args.cache_limit,
+    )
+    table.reload()
+    server = ThreadingHTTPServer((args.host, args.port), build_handler(table, args.status))
+    print(f"筛选服务已启动: http://{args.host}:{server.server_address[1]}/filter", flush=True)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,141 @@
+"""merge_data_files 的增量缓存：按文件指纹缓存每个文件解析后的工作表。"""
+from __future__ import annotations
+
+import hashlib
+import json
+from pathlib import Path
+from typing import Dict, Iterable, Optional, Tuple
+
+import pandas as pd
+
+from columnar_store import find_frame, read_frame, remove_frame, write_frame
+
+MANIFEST_NAME = "manifest.json"
+MANIFEST_VERSION = 1
+HASH_CHUNK_SIZE = 1 << 20
+
+
+def file_sha256(path: Path) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as fh:
+        for chunk in iter(lambda: fh.read(HASH_CHUNK_SIZE), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class MergeCache:
+    """以 路径 + 大小 + 修改时间 + 内容哈希 为键的解析结果缓存
+
+    manifest.json 记录每个输入文件的指纹和对应的列式缓存文件；
+    大小和修改时间都没变时直接命中，变了再比较内容哈希，哈希相同（例如只是被重新拷贝）也算命中。
+    没有读取到有效数据的文件（解析失败或不是公司数据文件）也按同样的指纹记一条跳过条目，文件不变时不再重新解析。
+    """
+
+    def __init__(self, cache_dir: Path):
+        self.cache_dir = Path(cache_dir)
+        self.manifest_path = self.cache_dir / MANIFEST_NAME
+        self.entries: Dict[str, dict] = self._load_manifest()
+        self._dirty = False
+
+    def _load_manifest(self) -> Dict[str, dict]:
+        if not self.manifest_path.exists():
+            return {}
+        try:
+            manifest = json.loads(self.manifest_path.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return {}
+        if manifest.get("version") != MANIFEST_VERSION:
+            return {}
+        return manifest.get("files", {})
+
+    @staticmethod
+    def _key(file_path: Path) -> str:
+        return str(Path(file_path).resolve())
+
+    def _sidecar_stem(self, digest: str, table: str) -> Path:
+        return self.cache_dir / f"{digest[:16]}.{table}"
+
+    def _fresh_entry(self, file_path: Path) -> Optional[dict]:
+        """文件未变且缓存文件齐全时返回清单条目"""
+        entry = self.entries.get(self._key(file_path))
+        if entry is None:
+            return None
+        stat = file_path.stat()
+        if (entry["size"], entry["mtime_ns"]) != (stat.st_size, stat.st_mtime_ns):
+            if entry["size"] != stat.st_size or entry["sha256"] != file_sha256(file_path):
+                return None
+            entry["mtime_ns"] = stat.st_mtime_ns
+            self._dirty = True
+        if any(find_frame(self._sidecar_stem(entry["sha256"], table), allow_pickle=True) is None for table in entry["tables"]):
+            return None
+        return entry
+
+    def contains(self, file_path: Path) -> bool:
+        """只检查是否命中、不读取缓存数据，之后再用 lookup 逐个读取"""
+        return self._fresh_entry(file_path) is not None
+
+    def skipped(self, file_path: Path) -> bool:
+        """文件未变且上次没有读取到有效数据"""
+        entry = self._fresh_entry(file_path)
+        return entry is not None and entry.get("skipped", False)
+
+    def lookup(self, file_path: Path) -> Optional[Tuple[str, Dict[str, pd.DataFrame]]]:
+        """命中时返回 (公司名称, 各工作表数据)，未命中返回 None"""
+        entry = self._fresh_entry(file_path)
+        if entry is None:
+            return None
+        result = {}
+        for table in entry["tables"]:
+            path = find_frame(self._sidecar_stem(entry["sha256"], table), allow_pickle=True)
+            if path is None:
+                return None
+            result[table] = read_frame(path, allow_pickle=True)
+        return entry["company"], result
+
+    def store(self, file_path: Path, company_name: str, result: Dict[str, pd.DataFrame]) -> None:
+        stat = file_path.stat()
+        digest = file_sha256(file_path)
+        for table, df in result.items():
+            write_frame(df, self._sidecar_stem(digest, table), allow_pickle=True)
+        old_entry = self.entries.get(self._key(file_path))
+        if old_entry is not None and old_entry["sha256"] != digest:
+            self._remove_sidecars(old_entry)
+        self.entries[self._key(file_path)] = {
+            "size": stat.st_size,
+            "mtime_ns": stat.st_mtime_ns,
+            "sha256": digest,
+            "company": company_name,
+            "tables": list(result),
+        }
+        self._dirty = True
+
+    def store_skipped(self, file_path: Path, company_name: str) -> None:
+        """记录没有读取到有效数据的文件，不写缓存数据"""
+        self.store(file_path, company_name, {})
+        self.entries[self._key(file_path)]["skipped"] = True
+
+    def prune(self, file_paths: Iterable[Path]) -> int:
+        """移除已经不在输入目录中的文件的缓存，返回移除的数量"""
+        keep = {self._key(path) for path in file_paths}
+        stale = [key for key in self.entries if key not in keep]
+        for key in stale:
+            self._remove_sidecars(self.entries.pop(key))
+        if stale:
+            self._dirty = True
+        return len(stale)
+
+    def _remove_sidecars(self, entry: dict) -> None:
+        if any(other is not entry and other["sha256"] == entry["sha256"] for other in self.entries.values()):
+            return
+        for table in entry["tables"]:
+            remove_frame(self._sidecar_stem(entry["sha256"], table))
+
+    def save(self) -> None:
+        if not self._dirty:
+            return
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        manifest = {"version": MANIFEST_VERSION, "files": self.entries}
+        tmp_path = self.manifest_path.with_suffix(".tmp")
+        tmp_path.write_text(json.dumps(manifest, ensure_ascii=False, indent=2), encoding="utf-8")
+        tmp_path.replace(self.manifest_path)
+        self._dirty = False
@@ -1,14 +1,61 @@
+import argparse
+import shutil
+import numpy as np
+import openpyxl
 import pandas as pd
+from contextlib import contextmanager
+from openpyxl.workbook.workbook import Workbook
 from pathlib import Path
 import re
-from concurrent.futures import ThreadPoolExecutor, as_completed
-from typing import Dict, Tuple
+from typing import Dict, Iterator, List, Optional, Tuple, Union
 import warnings
 import time
-from datetime import timedelta
+
+from columnar_store import (
+    PARTITION_FORMATS,
+    ColumnarUnavailable,
+    parquet_available,
+    partition_dir,
+    write_columnar_copies,
+    write_date_partitions,
+)
+from excel_writer import EXCEL_ENGINES, write_excel_chunks
+from executors import BACKENDS, create_executor, iter_completed, worker_count
+from merge_cache import MergeCache
+from merge_stream import StreamingAssembler, category_union, write_streaming_columnar
+from profiler import Profiler, add_profile_arguments, format_duration, path_bytes
 
 warnings.filterwarnings('ignore', category=UserWarning)
 
+# 结果键 -> 源文件中的工作表名称
+SHEET_NAMES = {
+    'basic': "1.基础信息",
+    'day_ahead': "1.日前申报-信息",
+    'trade_price': "1.交易量价数据信息",
+}
+
+# 可以用 openpyxl 只读模式流式读取的格式（.xls 仍交给 pandas/xlrd）
+STREAMING_SUFFIXES = ('.xlsx', '.xlsm')
+
+# 与 pandas read_excel 默认 na_values 一致的空值字符串
+NA_STRINGS = frozenset({
+    '', '#N/A', '#N/A N/A', '#NA', '-1.#IND', '-1.#QNAN', '-NaN', '-nan', '1.#IND',
+    '1.#QNAN', '<NA>', 'N/A', 'NA', 'NULL', 'NaN', 'None', 'n/a', 'nan', 'null',
+})
+
+# 在每一行都重复的标识列，从读取到输出都以 category 保存
+CATEGORY_COLUMNS = ('公司名称', '机组名称')
+
+# 结果键 -> 合并输出中的工作表名称
+OUTPUT_SHEETS = {
+    'basic': "基础信息",
+    'day_ahead': "日前申报信息",
+    'trade_price': "交易量价数据信息",
+}
+
+# 打包后的数据表：(列名列表, 每列一个 NumPy 数组)
+PackedFrame = Tuple[List[str], List]
+
 
 def extract_company_name(filename: str) -> str:
     """从文件名中提取公司名称"""
@@ -35,11 +82,101 @@ def clean_dataframe(df: pd.DataFrame) -> pd.DataFrame:
     return df
 
 
-def read_sheet_optimized(file_path: Path, sheet_name: str, company_name: str) -> pd.DataFrame:
-    """优化的读取单个工作表的函数"""
+def make_column_names(header_row: List) -> List:
+    """按 pandas 的规则生成列名：空表头记为 Unnamed: i，重名列追加 .1/.2 后缀"""
+    names = []
+    seen: Dict = {}
+    for index, value in enumerate(header_row):
+        name = f"Unnamed: {index}" if value is None else value
+        if name in seen:
+            seen[name] += 1
+            name = f"{name}.{seen[name]}"
+            while name in seen:
+                name = f"{name}.1"
+        seen.setdefault(name, 0)
+        names.append(name)
+    return names
+
+
+def to_typed_column(values: List) -> pd.Series:
+    """把一列原始单元格值转换成带类型的数组（数值/日期/文本）"""
+    series = pd.Series(values)
+    if series.dtype == object:
+        series = series.mask(series.isin(NA_STRINGS))
+        try:
+            # 与 read_excel 一致：以文本形式存储的数字也解析为数值
+            series = pd.to_numeric(series)
+        except (ValueError, TypeError):
+            series = series.infer_objects()
+    if series.dtype.kind == 'f' and series.notna().all() and np.array_equal(series, series.round()):
+        # 整数单元格在 xlsx 中常以浮点数保存，和 read_excel 一样还原为整数
+        series = series.astype('int64')
+    return series
+
+
+def read_sheet_streaming(worksheet, header: int = 1) -> pd.DataFrame:
+    """用 openpyxl 只读模式逐行读取工作表，直接写入按列存放的数组
+
+    与 pd.read_excel(header=header) 的约定一致：跳过前 header 行，下一行作为表头。
+    只读模式不会为每个单元格建立对象模型，大表的内存占用基本只有结果数组本身。
+    """
+    if not (worksheet.max_row and worksheet.max_column) or worksheet.calculate_dimension() == "A1:A1":
+        # 部分导出工具不写 dimension 信息（此时 calculate_dimension 会报错）或只写 A1:A1，需要重新计算表格范围
+        worksheet.reset_dimensions()
+
+    rows = worksheet.iter_rows(values_only=True)
+    for _ in range(header):
+        if next(rows, None) is None:
+            return pd.DataFrame()
+    header_row = next(rows, None)
+    if header_row is None:
+        return pd.DataFrame()
+
+    columns: List[List] = [[] for _ in header_row]
+    row_count = 0
+    for row in rows:
+        if all(value is None for value in row):
+            continue
+        if len(row) > len(columns):
+            columns.extend([None] * row_count for _ in range(len(row) - len(columns)))
+        for column, value in zip(columns, row):
+            column.append(value)
+        for column in columns[len(row):]:
+            column.append(None)
+        row_count += 1
+
+    names = make_column_names(list(header_row) + [None] * (len(columns) - len(header_row)))
+    df = pd.DataFrame({index: to_typed_column(values) for index, values in enumerate(columns)})
+    df.columns = names
+    return df
+
+
+@contextmanager
+def open_workbook(file_path: Path) -> Iterator[Union[Workbook, pd.ExcelFile]]:
+    """打开工作簿：xlsx 使用 openpyxl 只读模式，其余格式交给 pandas"""
+    if file_path.suffix.lower() in STREAMING_SUFFIXES:
+        workbook = openpyxl.load_workbook(file_path, read_only=True, data_only=True, keep_links=False)
+        try:
+            yield workbook
+        finally:
+            workbook.close()
+    else:
+        with pd.ExcelFile(file_path) as workbook:
+            yield workbook
+
+
+def read_sheet_optimized(source: Union[Path, pd.ExcelFile, Workbook], sheet_name: str, company_name: str) -> pd.DataFrame:
+    """优化的读取单个工作表的函数
+
+    source 可以是文件路径，也可以是已经打开的工作簿（避免重复解析工作簿）；
+    openpyxl 只读工作簿走流式读取，其余情况使用 pd.read_excel
+    """
     try:
         # 读取数据，从第2行开始（header=1）
-        df = pd.read_excel(file_path, sheet_name=sheet_name, header=1)
+        if isinstance(source, Workbook):
+            df = read_sheet_streaming(source[sheet_name], header=1)
+        else:
+            df = pd.read_excel(source, sheet_name=sheet_name, header=1)
         
         # 清理空列和空行
         df = clean_dataframe(df)
@@ -49,12 +186,16 @@ def read_sheet_optimized(file_path: Path, sheet_name: str, company_name: str) ->
             return pd.DataFrame()
         
         # 更新公司名称列的值（已经确认所有文件都有这个列）
+        # 公司名称在每一行都重复，直接存为只有一个类别的 category（每行只占一个字节的编码）
+        company_column = pd.Categorical.from_codes(np.zeros(len(df), dtype=np.int8), categories=[company_name])
         if '公司名称' in df.columns:
             # 使用从文件名提取的公司名称覆盖原有值
-            df['公司名称'] = company_name
+            df['公司名称'] = company_column
         else:
             # 理论上不会走到这里，但保险起见还是加上
-            df.insert(0, '公司名称', company_name)
+            df.insert(0, '公司名称', company_column)
+        if '机组名称' in df.columns:
+            df['机组名称'] = df['机组名称'].astype('category')
         
         return df
         
@@ -67,17 +208,13 @@ def process_single_file(file_path: Path) -> Tuple[str, Dict[str, pd.DataFrame]]:
     """处理单个文件，返回公司名称和三个数据表"""
     company_name = extract_company_name(file_path.name)
     
-    result = {
-        'basic': pd.DataFrame(),
-        'day_ahead': pd.DataFrame(),
-        'trade_price': pd.DataFrame()
-    }
+    result = {key: pd.DataFrame() for key in SHEET_NAMES}
     
     try:
-        # 读取三个工作表
-        result['basic'] = read_sheet_optimized(file_path, "1.基础信息", company_name)
-        result['day_ahead'] = read_sheet_optimized(file_path, "1.日前申报-信息", company_name)
-        result['trade_price'] = read_sheet_optimized(file_path, "1.交易量价数据信息", company_name)
+        # 只打开一次工作簿（zip 容器和共享字符串表只解析一次），再依次读取三个工作表
+        with open_workbook(file_path) as workbook:
+            for key, sheet_name in SHEET_NAMES.items():
+                result[key] = read_sheet_optimized(workbook, sheet_name, company_name)
         
         return company_name, result
         
@@ -86,17 +223,93 @@ def process_single_file(file_path: Path) -> Tuple[str, Dict[str, pd.DataFrame]]:
         return company_name, result
 
 
-def merge_data_files(max_workers: int = 4):
+def pack_frame(df: pd.DataFrame) -> PackedFrame:
+    """把数据框拆成列名和 NumPy 列数组（category 列保留编码+类别），跨进程传输时比直接 pickle DataFrame 更省"""
+    arrays = []
+    for i in range(df.shape[1]):
+        column = df.iloc[:, i]
+        arrays.append(column.array if isinstance(column.dtype, pd.CategoricalDtype) else column.to_numpy())
+    return list(df.columns), arrays
+
+
+def concat_frames(frames: List[pd.DataFrame]) -> pd.DataFrame:
+    """合并多个数据框，公司名称/机组名称先统一为排序后的类别，合并结果仍是 category 而不会退化成字符串"""
+    for column in CATEGORY_COLUMNS:
+        parts = [df[column] for df in frames if column in df.columns]
+        if not parts:
+            continue
+        dtype = category_union([
+            part.cat.categories.to_numpy(dtype=object)
+            if isinstance(part.dtype, pd.CategoricalDtype)
+            else part.dropna().unique().astype(object)
+            for part in parts
+        ])
+        frames = [
+            df.assign(**{column: df[column].astype(dtype)}) if column in df.columns else df
+            for df in frames
+        ]
+    return pd.concat(frames, ignore_index=True)
+
+
+def unpack_frame(packed: PackedFrame) -> pd.DataFrame:
+    """pack_frame 的逆操作"""
+    columns, arrays = packed
+    if not columns:
+        return pd.DataFrame()
+    df = pd.DataFrame(dict(enumerate(arrays)), copy=False)
+    df.columns = columns
+    return df
+
+
+def process_single_file_packed(file_path: Path) -> Tuple[str, Dict[str, PackedFrame], float]:
+    """供工作进程调用：处理单个文件并返回打包后的结果和读取用时（秒）"""
+    started = time.perf_counter()
+    company_name, result = process_single_file(file_path)
+    return company_name, {key: pack_frame(df) for key, df in result.items()}, time.perf_counter() - started
+
+
+def table_overview(df: pd.DataFrame) -> dict:
+    """统计报告用的概况：行数、列名、公司列表、前 3 行"""
+    return {
+        'rows': len(df),
+        'columns': df.columns.tolist(),
+        'companies': df['公司名称'].unique().tolist(),
+        'company_count': df['公司名称'].nunique(),
+        'head': df.head(3),
+    }
+
+
+def merge_data_files(
+    max_workers: Optional[int] = None,
+    backend: str = 'process',
+    input_dir: Union[str, Path] = "data_input",
+    output_path: Union[str, Path] = "data_output/output.xlsx",
+    use_cache: bool = True,
+    cache_dir: Optional[Union[str, Path]] = None,
+    partition_freq: str = 'D',
+    excel_engine: str = 'auto',
+    streaming: bool = False,
+    profiler: Optional[Profiler] = None,
+):
     """
     合并 data_input 目录中的所有 Excel 文件
     
     Args:
-        max_workers: 并行处理的最大线程数，默认为4
+        max_workers: 并行处理的最大工作进程/线程数，默认为 CPU 核心数
+        backend: 并行后端，process（默认）、thread 或 serial
+        input_dir: 输入目录，默认为 data_input
+        output_path: 输出文件路径，默认为 data_output/output.xlsx
+        use_cache: 是否启用增量缓存，只重新解析新增或修改过的文件
+        cache_dir: 缓存目录，默认为输出目录下的 .merge_cache
+        partition_freq: 交易量价数据的日期分区粒度，D 按天（默认）、M 按月
+        excel_engine: 写出 XLSX 的方式，auto（默认，有 xlsxwriter 时使用）、xlsxwriter 或 openpyxl
+        streaming: 流式合并，每个文件处理完就暂存到磁盘，最后逐块写出，内存中同时只保留一个文件的数据
+        profiler: 记录各阶段用时的 Profiler，默认新建一个（只计时，不输出汇总）
     """
     # 开始计时
-    start_time = time.time()
+    profiler = profiler or Profiler("merge_data_files")
     
-    data_dir = Path("data_input")
+    data_dir = Path(input_dir)
 
     if not data_dir.exists():
         print(f"❌ 错误：目录 {data_dir} 不存在")
@@ -121,58 +334,124 @@ def merge_data_files(max_workers: int = 4):
     success_count = 0
     fail_count = 0
 
-    # 使用线程池并行处理文件
-    print("🚀 开始并行处理文件...\n")
-    
+    # 流式合并：各表暂存到输出目录下，不在内存中累积
+    assembler = StreamingAssembler(Path(output_path).parent, CATEGORY_COLUMNS) if streaming else None
+
+    # 增量缓存：大小/修改时间/内容哈希都没变的文件直接读取缓存，只解析新增或修改过的文件
+    cache = None
+    cached_files = []
+    skipped_files = []
+    pending_files = excel_files
+    if use_cache:
+        cache = MergeCache(Path(cache_dir) if cache_dir else Path(output_path).parent / ".merge_cache")
+        removed_count = cache.prune(excel_files)
+        pending_files = []
+        for file_path in excel_files:
+            if cache.skipped(file_path):
+                skipped_files.append(file_path)
+            elif cache.contains(file_path):
+                cached_files.append(file_path)
+            else:
+                pending_files.append(file_path)
+        print(f"♻️  缓存命中 {len(cached_files)} 个文件，需要解析 {len(pending_files)} 个文件"
+              + (f"，跳过 {len(skipped_files)} 个无有效数据的文件" if skipped_files else "")
+              + (f"，清理 {removed_count} 个已删除文件的缓存" if removed_count else ""))
+        print("=" * 100)
+
+    def collect_result(file_path: Path, company_name: str, result: Dict[str, pd.DataFrame], from_cache: bool = False):
+        nonlocal success_count, fail_count
+
+        # 统计各表的行数
+        basic_rows = len(result['basic']) if not result['basic'].empty else 0
+        day_ahead_rows = len(result['day_ahead']) if not result['day_ahead'].empty else 0
+        trade_price_rows = len(result['trade_price']) if not result['trade_price'].empty else 0
+        
+        if basic_rows > 0 or day_ahead_rows > 0 or trade_price_rows > 0:
+            print(f"✅ {file_path.name}" + ("（缓存）" if from_cache else ""))
+            print(f"   公司: {company_name}")
+            print(f"   基础信息: {basic_rows} 行 | 日前申报: {day_ahead_rows} 行 | 交易量价: {trade_price_rows} 行")
+            success_count += 1
+            if cache is not None and not from_cache:
+                cache.store(file_path, company_name, result)
+        else:
+            print(f"⚠️  {file_path.name} - 没有读取到有效数据")
+            fail_count += 1
+            if cache is not None and not from_cache:
+                cache.store_skipped(file_path, company_name)
+        
+        # 添加到列表（只添加非空数据）；流式合并时直接暂存到磁盘
+        for key, frames in (('basic', all_basic_info), ('day_ahead', all_day_ahead_info), ('trade_price', all_trade_price_info)):
+            if result[key].empty:
+                continue
+            if assembler is not None:
+                assembler.add(key, result[key])
+            else:
+                frames.append(result[key])
+
+    def record_file(file_path: Path, seconds: float, result: Dict[str, pd.DataFrame], source: str):
+        profiler.record_file(file_path.name, seconds, sum(len(df) for df in result.values()),
+                             path_bytes(file_path), source)
+
     # 文件处理阶段计时
-    file_processing_start = time.time()
+    file_stage = profiler.start_stage("文件处理")
+
+    # 上次没有读取到有效数据且未修改的文件不再解析
+    for file_path in skipped_files:
+        record_file(file_path, 0.0, {}, 'cache')
+        print(f"⚠️  {file_path.name} - 没有读取到有效数据（缓存）")
+        fail_count += 1
+        print("-" * 100)
+
+    # 缓存结果逐个读取，不会同时全部载入内存
+    for file_path in cached_files:
+        lookup_start = time.perf_counter()
+        hit = cache.lookup(file_path)
+        if hit is None:
+            pending_files.append(file_path)
+            continue
+        company_name, result = hit
+        record_file(file_path, time.perf_counter() - lookup_start, result, 'cache')
+        collect_result(file_path, company_name, result, from_cache=True)
+        del hit, result
+        print("-" * 100)
+
+    # 使用进程池/线程池并行处理文件
+    if pending_files:
+        print(f"🚀 开始并行处理文件（后端: {backend}）...\n")
     
-    with ThreadPoolExecutor(max_workers=max_workers) as executor:
-        # 提交所有任务
-        future_to_file = {executor.submit(process_single_file, file_path): file_path 
-                          for file_path in excel_files}
-        
+    # 流式合并时最多同时提交 2 倍工作数的任务，已完成但未写出的结果不会堆积
+    window = 2 * worker_count(max_workers) if streaming else None
+    with create_executor(backend, max_workers) as executor:
         # 处理完成的任务
-        for future in as_completed(future_to_file):
-            file_path = future_to_file[future]
+        for file_path, future in iter_completed(executor, process_single_file_packed, pending_files, window):
             try:
-                company_name, result = future.result()
-                
-                # 统计各表的行数
-                basic_rows = len(result['basic']) if not result['basic'].empty else 0
-                day_ahead_rows = len(result['day_ahead']) if not result['day_ahead'].empty else 0
-                trade_price_rows = len(result['trade_price']) if not result['trade_price'].empty else 0
-                
-                if basic_rows > 0 or day_ahead_rows > 0 or trade_price_rows > 0:
-                    print(f"✅ {file_path.name}")
-                    print(f"   公司: {company_name}")
-                    print(f"   基础信息: {basic_rows} 行 | 日前申报: {day_ahead_rows} 行 | 交易量价: {trade_price_rows} 行")
-                    success_count += 1
-                else:
-                    print(f"⚠️  {file_path.name} - 没有读取到有效数据")
-                    fail_count += 1
-                
-                # 添加到列表（只添加非空数据）
-                if not result['basic'].empty:
-                    all_basic_info.append(result['basic'])
-                if not result['day_ahead'].empty:
-                    all_day_ahead_info.append(result['day_ahead'])
-                if not result['trade_price'].empty:
-                    all_trade_price_info.append(result['trade_price'])
-                
+                company_name, packed, seconds = future.result()
+                result = {key: unpack_frame(value) for key, value in packed.items()}
+                record_file(file_path, seconds, result, 'parse')
+                collect_result(file_path, company_name, result)
             except Exception as e:
                 print(f"❌ {file_path.name} 处理失败: {e}")
                 fail_count += 1
+            del future
             
             print("-" * 100)
 
+    if cache is not None:
+        cache.save()
+
     # 文件处理完成，显示用时
-    file_processing_time = time.time() - file_processing_start
-    print(f"\n⏱️  文件处理完成，用时: {timedelta(seconds=int(file_processing_time))}")
+    file_stage.stop(rows=sum(record.rows or 0 for record in profiler.files), bytes=path_bytes(*excel_files))
+    print(f"\n⏱️  文件处理完成，用时: {format_duration(file_stage.seconds)}")
     
     # 检查是否有数据
-    if not all_basic_info and not all_day_ahead_info and not all_trade_price_info:
+    if assembler is not None:
+        collected = {key: None for key in assembler.tables()}
+    else:
+        collected = {key: frames for key, frames in (('basic', all_basic_info), ('day_ahead', all_day_ahead_info), ('trade_price', all_trade_price_info)) if frames}
+    if not collected:
         print("\n❌ 错误：所有文件都没有读取到有效数据")
+        if assembler is not None:
+            assembler.cleanup()
         return
 
     # 合并数据
@@ -180,84 +459,121 @@ def merge_data_files(max_workers: int = 4):
     print("=" * 100)
     
     # 数据合并阶段计时
-    merge_start = time.time()
+    merge_stage = profiler.start_stage("数据合并")
     
     merged_data = {}
+    # 各表的行数和列名；流式合并时由各文件的统计得到，不实际拼接数据
+    shapes = {}
     
-    if all_basic_info:
-        print("🔄 合并基础信息...")
-        merged_data['basic'] = pd.concat(all_basic_info, ignore_index=True)
-        # 再次清理（确保合并后没有重复的空列）
-        merged_data['basic'] = clean_dataframe(merged_data['basic'])
-        print(f"   ✓ 完成: {len(merged_data['basic'])} 行, {len(merged_data['basic'].columns)} 列")
-    else:
-        print("⚠️  基础信息: 没有有效数据")
-
-    if all_day_ahead_info:
-        print("🔄 合并日前申报信息...")
-        merged_data['day_ahead'] = pd.concat(all_day_ahead_info, ignore_index=True)
-        merged_data['day_ahead'] = clean_dataframe(merged_data['day_ahead'])
-        print(f"   ✓ 完成: {len(merged_data['day_ahead'])} 行, {len(merged_data['day_ahead'].columns)} 列")
-    else:
-        print("⚠️  日前申报: 没有有效数据")
-
-    if all_trade_price_info:
-        print("🔄 合并交易量价数据信息...")
-        merged_data['trade_price'] = pd.concat(all_trade_price_info, ignore_index=True)
-        merged_data['trade_price'] = clean_dataframe(merged_data['trade_price'])
-        print(f"   ✓ 完成: {len(merged_data['trade_price'])} 行, {len(merged_data['trade_price'].columns)} 列")
-    else:
-        print("⚠️  交易量价: 没有有效数据")
+    for key, sheet_name, short_name in (('basic', "基础信息", "基础信息"), ('day_ahead', "日前申报信息", "日前申报"), ('trade_price', "交易量价数据信息", "交易量价")):
+        if key not in collected:
+            print(f"⚠️  {short_name}: 没有有效数据")
+            continue
+        print(f"🔄 合并{sheet_name}...")
+        if assembler is not None:
+            shapes[key] = (assembler.row_count(key), assembler.columns(key))
+        else:
+            merged_data[key] = concat_frames(collected[key])
+            # 再次清理（确保合并后没有重复的空列）
+            merged_data[key] = clean_dataframe(merged_data[key])
+            shapes[key] = (len(merged_data[key]), merged_data[key].columns.tolist())
+        print(f"   ✓ 完成: {shapes[key][0]} 行, {len(shapes[key][1])} 列")
+    collected.clear()
+    all_basic_info.clear()
+    all_day_ahead_info.clear()
+    all_trade_price_info.clear()
 
     # 数据合并完成，显示用时
-    merge_time = time.time() - merge_start
-    print(f"\n⏱️  数据合并完成，用时: {timedelta(seconds=int(merge_time))}")
+    merge_stage.stop(rows=sum(rows for rows, _ in shapes.values()))
+    print(f"\n⏱️  数据合并完成，用时: {format_duration(merge_stage.seconds)}")
     
     # 保存到 Excel 文件
-    output_path = "data_output/output.xlsx"
     output_dir = Path(output_path).parent
-    output_dir.mkdir(exist_ok=True)
+    output_dir.mkdir(parents=True, exist_ok=True)
 
     print(f"\n💾 保存到: {output_path}")
     print("=" * 100)
     
     # 文件保存阶段计时
-    save_start = time.time()
+    save_stage = profiler.start_stage("文件保存")
     
     try:
-        with pd.ExcelWriter(output_path, engine='openpyxl') as writer:
-            sheets_written = 0
-            
-            if 'basic' in merged_data and not merged_data['basic'].empty:
-                merged_data['basic'].to_excel(writer, sheet_name="基础信息", index=False)
-                sheets_written += 1
-                print(f"   ✓ 写入工作表: 基础信息 ({len(merged_data['basic'])} 行)")
-            
-            if 'day_ahead' in merged_data and not merged_data['day_ahead'].empty:
-                merged_data['day_ahead'].to_excel(writer, sheet_name="日前申报信息", index=False)
-                sheets_written += 1
-                print(f"   ✓ 写入工作表: 日前申报信息 ({len(merged_data['day_ahead'])} 行)")
-            
-            if 'trade_price' in merged_data and not merged_data['trade_price'].empty:
-                merged_data['trade_price'].to_excel(writer, sheet_name="交易量价数据信息", index=False)
-                sheets_written += 1
-                print(f"   ✓ 写入工作表: 交易量价数据信息 ({len(merged_data['trade_price'])} 行)")
-            
-            if sheets_written == 0:
-                # 如果没有任何数据，创建一个提示工作表
-                pd.DataFrame({'提示': ['所有工作表都没有有效数据']}).to_excel(
-                    writer, sheet_name="提示", index=False
-                )
-                print(f"   ⚠️  创建提示工作表（无有效数据）")
+        written_keys = [key for key in OUTPUT_SHEETS if shapes.get(key, (0,))[0] > 0]
+        if assembler is not None:
+            # 逐块写出，工作表按暂存顺序追加
+            sheets = {OUTPUT_SHEETS[key]: (shapes[key][1], assembler.iter_chunks(key)) for key in written_keys}
+        else:
+            sheets = {OUTPUT_SHEETS[key]: (merged_data[key].columns, [merged_data[key]]) for key in written_keys}
+        if not sheets:
+            # 如果没有任何数据，创建一个提示工作表
+            sheets["提示"] = (['提示'], [pd.DataFrame({'提示': ['所有工作表都没有有效数据']})])
+        engine_used = write_excel_chunks(output_path, sheets, engine=excel_engine)
+        if not written_keys:
+            print(f"   ⚠️  创建提示工作表（无有效数据）")
+        for key in written_keys:
+            print(f"   ✓ 写入工作表: {OUTPUT_SHEETS[key]} ({shapes[key][0]} 行)")
+        print(f"   ✓ 写出方式: {engine_used}")
+        
+        # 同时写出列式副本，下游脚本优先读取，XLSX 只作为导出格式
+        # 交易量价数据按日期分区，下游按日期范围筛选时只读取相关分区
+        trade_partition_dir = partition_dir(Path(output_path), 'trade_price')
+        if assembler is not None:
+            columnar_paths, partitions, notes = write_streaming_columnar(
+                assembler, Path(output_path), written_keys, 'trade_price', trade_partition_dir, '日期', partition_freq,
+            )
+        else:
+            columnar_paths, notes = write_columnar_copies(
+                Path(output_path),
+                {key: df for key, df in merged_data.items() if not df.empty},
+            )
+            trade_price_df = merged_data.get('trade_price')
+            partitions = None
+            if (
+                parquet_available() and trade_price_df is not None
+                and not trade_price_df.empty and '日期' in trade_price_df.columns
+            ):
+                try:
+                    partitions = write_date_partitions(trade_price_df, trade_partition_dir, '日期', partition_freq)
+                except ColumnarUnavailable as e:
+                    notes.append(f"trade_price 无法写成 Parquet 日期分区（{e}），下游将读取 XLSX")
+        for note in notes:
+            print(f"   ⚠️  {note}")
+        for path in columnar_paths.values():
+            print(f"   ✓ 写入列式副本: {path}")
+        if partitions is not None:
+            print(f"   ✓ 写入日期分区: {trade_partition_dir} ({len(partitions)} 个分区)")
+        else:
+            shutil.rmtree(trade_partition_dir, ignore_errors=True)
+        
+        # 统计报告用的概况
+        if assembler is not None:
+            overview = {
+                key: {
+                    'rows': shapes[key][0],
+                    'columns': shapes[key][1],
+                    'companies': assembler.companies(key),
+                    'company_count': int(pd.notna(assembler.companies(key)).sum()),
+                    'head': assembler.head(key, 3),
+                }
+                for key in written_keys
+            }
+        else:
+            overview = {key: table_overview(merged_data[key]) for key in written_keys}
         
         # 文件保存完成，显示用时
-        save_time = time.time() - save_start
-        print(f"\n⏱️  文件保存完成，用时: {timedelta(seconds=int(save_time))}")
+        save_stage.stop(
+            rows=sum(rows for rows, _ in shapes.values()),
+            bytes=path_bytes(output_path, *columnar_paths.values(), trade_partition_dir),
+        )
+        print(f"\n⏱️  文件保存完成，用时: {format_duration(save_stage.seconds)}")
         print(f"\n✅ 保存完成！")
         
     except Exception as e:
         print(f"\n❌ 保存文件时出错: {e}")
         return
+    finally:
+        if assembler is not None:
+            assembler.cleanup()
     
     # 打印最终统计信息
     print("\n" + "=" * 100)
@@ -267,27 +583,27 @@ def merge_data_files(max_workers: int = 4):
     print(f"  ✅ 成功: {success_count} 个")
     print(f"  ❌ 失败: {fail_count} 个")
     
-    if 'basic' in merged_data and not merged_data['basic'].empty:
+    if 'basic' in overview:
         print(f"\n【基础信息】")
-        print(f"  总行数: {len(merged_data['basic']):,}")
-        print(f"  总列数: {len(merged_data['basic'].columns)}")
-        print(f"  列名: {', '.join(merged_data['basic'].columns.tolist())}")
-        print(f"  公司数: {merged_data['basic']['公司名称'].nunique()}")
-        print(f"  公司列表: {', '.join(merged_data['basic']['公司名称'].unique().tolist())}")
+        print(f"  总行数: {overview['basic']['rows']:,}")
+        print(f"  总列数: {len(overview['basic']['columns'])}")
+        print(f"  列名: {', '.join(overview['basic']['columns'])}")
+        print(f"  公司数: {overview['basic']['company_count']}")
+        print(f"  公司列表: {', '.join(map(str, overview['basic']['companies']))}")
     
-    if 'day_ahead' in merged_data and not merged_data['day_ahead'].empty:
+    if 'day_ahead' in overview:
         print(f"\n【日前申报信息】")
-        print(f"  总行数: {len(merged_data['day_ahead']):,}")
-        print(f"  总列数: {len(merged_data['day_ahead'].columns)}")
-        print(f"  列名: {', '.join(merged_data['day_ahead'].columns.tolist())}")
-        print(f"  公司数: {merged_data['day_ahead']['公司名称'].nunique()}")
+        print(f"  总行数: {overview['day_ahead']['rows']:,}")
+        print(f"  总列数: {len(overview['day_ahead']['columns'])}")
+        print(f"  列名: {', '.join(overview['day_ahead']['columns'])}")
+        print(f"  公司数: {overview['day_ahead']['company_count']}")
     
-    if 'trade_price' in merged_data and not merged_data['trade_price'].empty:
+    if 'trade_price' in overview:
         print(f"\n【交易量价数据信息】")
-        print(f"  总行数: {len(merged_data['trade_price']):,}")
-        print(f"  总列数: {len(merged_data['trade_price'].columns)}")
-        print(f"  列名: {', '.join(merged_data['trade_price'].columns.tolist())}")
-        print(f"  公司数: {merged_data['trade_price']['公司名称'].nunique()}")
+        print(f"  总行数: {overview['trade_price']['rows']:,}")
+        print(f"  总列数: {len(overview['trade_price']['columns'])}")
+        print(f"  列名: {', '.join(overview['trade_price']['columns'])}")
+        print(f"  公司数: {overview['trade_price']['company_count']}")
     
     print("=" * 100)
 
@@ -296,32 +612,66 @@ def merge_data_files(max_workers: int = 4):
     print("📋 数据预览")
     print("=" * 100)
     
-    if 'basic' in merged_data and not merged_data['basic'].empty:
+    if 'basic' in overview:
         print("\n【基础信息】前 3 行:")
-        print(merged_data['basic'].head(3).to_string(index=False))
+        print(overview['basic']['head'].to_string(index=False))
     
-    if 'day_ahead' in merged_data and not merged_data['day_ahead'].empty:
+    if 'day_ahead' in overview:
         print("\n【日前申报信息】前 3 行:")
-        print(merged_data['day_ahead'].head(3).to_string(index=False))
+        print(overview['day_ahead']['head'].to_string(index=False))
     
-    if 'trade_price' in merged_data and not merged_data['trade_price'].empty:
+    if 'trade_price' in overview:
         print("\n【交易量价数据信息】前 3 行:")
-        print(merged_data['trade_price'].head(3).to_string(index=False))
+        print(overview['trade_price']['head'].to_string(index=False))
     
     print("\n" + "=" * 100)
     print("🎉 处理完成！")
     print("=" * 100)
     
+
     # 计算并显示总用时
-    total_time = time.time() - start_time
-    print(f"\n⏱️  总用时: {timedelta(seconds=int(total_time))}")
-    print(f"   - 文件处理: {timedelta(seconds=int(file_processing_time))}")
-    print(f"   - 数据合并: {timedelta(seconds=int(merge_time))}")
-    print(f"   - 文件保存: {timedelta(seconds=int(save_time))}")
+    print(f"\n⏱️  总用时: {format_duration(profiler.total_seconds)}")
+    print(f"   - 文件处理: {format_duration(file_stage.seconds)}")
+    print(f"   - 数据合并: {format_duration(merge_stage.seconds)}")
+    print(f"   - 文件保存: {format_duration(save_stage.seconds)}")
     print("=" * 100)
 
 
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="合并 data_input 目录中的公司 Excel 文件。")
+    parser.add_argument("--backend", choices=BACKENDS, default='process',
+                        help="并行后端 (默认: %(default)s)")
+    parser.add_argument("--max-workers", type=int, default=None,
+                        help="最大工作进程/线程数 (默认: CPU 核心数)")
+    parser.add_argument("--input-dir", type=Path, default=Path("data_input"))
+    parser.add_argument("--output-path", type=Path, default=Path("data_output/output.xlsx"))
+    parser.add_argument("--cache-dir", type=Path, default=None,
+                        help="增量缓存目录 (默认: 输出目录下的 .merge_cache)")
+    parser.add_argument("--no-cache", action="store_true",
+                        help="不使用增量缓存，重新解析所有文件")
+    parser.add_argument("--partition-freq", choices=sorted(PARTITION_FORMATS), default='D',
+                        help="交易量价数据的日期分区粒度：D 按天，M 按月 (默认: %(default)s)")
+    parser.add_argument("--excel-engine", choices=EXCEL_ENGINES, default='auto',
+                        help="XLSX 写出方式：auto 优先 xlsxwriter，未安装时用 openpyxl (默认: %(default)s)")
+    parser.add_argument("--streaming", action="store_true",
+                        help="流式合并：每个文件处理完就暂存到磁盘，最后逐块写出，峰值内存约为单个文件的大小")
+    add_profile_arguments(parser)
+    return parser.parse_args()
+
+
 if __name__ == "__main__":
-    # 可以调整 max_workers 参数来控制并行处理的线程数
-    # 根据你的 CPU 核心数调整，建议值：2-8
-    merge_data_files(max_workers=4)
\ No newline at end of file
+    args = parse_args()
+    profiler = Profiler.from_args("merge_data_files", args)
+    merge_data_files(
+        max_workers=args.max_workers,
+        backend=args.backend,
+        input_dir=args.input_dir,
+        output_path=args.output_path,
+        use_cache=not args.no_cache,
+        cache_dir=args.cache_dir,
+        partition_freq=args.partition_freq,
+        excel_engine=args.excel_engine,
+        streaming=args.streaming,
+        profiler=profiler,
+    )
+    profiler.finish()
\ No newline at end of file
@@ -0,0 +1,294 @@
+"""merge_data_files 的流式合并：内存中同时只保留一个文件的数据。
+
+每个文件解析完成后，各表立即写成磁盘上的暂存片段，并记录列顺序、非空列、类型和类别等统计；
+所有文件处理完后按全局统计确定输出的列（去掉 Unnamed 列和在所有文件中都为空的列）和类型，
+再逐个片段读回、对齐后写出 XLSX、列式副本（Parquet 行组）和日期分区。结果与一次性 concat 后
+clean_dataframe 相同。
+"""
+from __future__ import annotations
+
+import shutil
+import tempfile
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+from columnar_store import (
+    MISSING_PYARROW_WARNING,
+    PARQUET_SUFFIX,
+    ColumnarUnavailable,
+    columnar_stem,
+    parquet_available,
+    partition_keys,
+    read_frame,
+    remove_frame,
+    write_frame,
+    write_partition_manifest,
+)
+
+
+def _is_unnamed(column) -> bool:
+    return isinstance(column, str) and column.startswith("Unnamed")
+
+
+@dataclass
+class TableStats:
+    """一张表所有暂存片段的统计"""
+
+    columns: List = field(default_factory=list)  # 按首次出现顺序
+    non_empty: set = field(default_factory=set)  # 至少在一个文件中有值的列
+    dtypes: Dict[object, list] = field(default_factory=dict)  # 列 -> 各片段中的类型
+    categories: Dict[object, list] = field(default_factory=dict)  # 类别列 -> 各片段中的类别
+    companies: list = field(default_factory=list)  # 各片段中的公司名称（保持出现顺序）
+    chunks: List[Path] = field(default_factory=list)
+    rows: int = 0
+
+
+def combine_dtypes(dtypes: Sequence, missing: bool):
+    """与 pd.concat 一致地推断合并后的列类型；missing 表示有片段缺少这一列（会补 NaN）"""
+    first = dtypes[0]
+    if all(dtype == first for dtype in dtypes):
+        if missing and isinstance(first, np.dtype):
+            if first.kind in "iu":
+                return np.dtype("float64")
+            if first.kind == "b":
+                return np.dtype(object)
+        return first
+    if all(isinstance(dtype, np.dtype) and dtype.kind in "iuf" for dtype in dtypes):
+        combined = np.result_type(*dtypes)
+        return np.dtype("float64") if missing and combined.kind in "iu" else combined
+    return np.dtype(object)
+
+
+def category_union(parts: Sequence[np.ndarray]) -> pd.CategoricalDtype:
+    """各片段类别的并集，按取值排序
+
+    类别顺序决定下游 groupby 的结果顺序；排序后与文件的处理先后（缓存命中、并行完成顺序）无关，
+    也与按字符串分组时的字典序一致。
+    """
+    values = pd.unique(np.concatenate(parts)) if parts else np.array([], dtype=object)
+    try:
+        values = np.sort(values)
+    except TypeError:  # 混合类型时按文字排序
+        values = np.asarray(sorted(values, key=str), dtype=object)
+    return pd.CategoricalDtype(values)
+
+
+def _same_dtype(left, right) -> bool:
+    # 无序 category 比较时忽略类别顺序，这里要求顺序也一致
+    if isinstance(left, pd.CategoricalDtype) and isinstance(right, pd.CategoricalDtype):
+        return left.categories.equals(right.categories)
+    return left == right
+
+
+class StreamingAssembler:
+    """把各文件的表暂存到磁盘，之后按统一的列和类型逐块读回"""
+
+    def __init__(self, spool_parent: Path, category_columns: Sequence[str] = (), company_column: str = "公司名称"):
+        spool_parent.mkdir(parents=True, exist_ok=True)
+        self.spool_dir = Path(tempfile.mkdtemp(prefix=".merge_spool-", dir=spool_parent))
+        self.category_columns = tuple(category_columns)
+        self.company_column = company_column
+        self.stats: Dict[str, TableStats] = {}
+        self._resolved: Dict[str, tuple] = {}
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.cleanup()
+        return False
+
+    def cleanup(self) -> None:
+        shutil.rmtree(self.spool_dir, ignore_errors=True)
+
+    def add(self, table: str, df: pd.DataFrame) -> None:
+        """记录统计并写出暂存片段；Unnamed 列和全空行在这里就去掉"""
+        df = df.loc[:, [not _is_unnamed(column) for column in df.columns]]
+        df = df.dropna(axis=0, how="all")
+        if df.empty:
+            return
+        stats = self.stats.setdefault(table, TableStats())
+        for column in df.columns:
+            if column not in stats.dtypes:
+                stats.columns.append(column)
+                stats.dtypes[column] = []
+            stats.dtypes[column].append(df[column].dtype)
+        stats.non_empty.update(df.columns[df.notna().any().to_numpy()])
+        for column in self.category_columns:
+            if column in df.columns:
+                part = df[column]
+                stats.categories.setdefault(column, []).append(
+                    part.cat.categories.to_numpy(dtype=object)
+                    if isinstance(part.dtype, pd.CategoricalDtype)
+                    else part.dropna().unique().astype(object)
+                )
+        if self.company_column in df.columns:
+            stats.companies = list(pd.unique(np.concatenate([
+                np.asarray(stats.companies, dtype=object),
+                np.asarray(df[self.company_column].unique(), dtype=object),
+            ])))
+        stats.rows += len(df)
+        stats.chunks.append(write_frame(
+            df.reset_index(drop=True), self.spool_dir / f"{table}.{len(stats.chunks):05d}", allow_pickle=True
+        ))
+        self._resolved.pop(table, None)
+
+    def tables(self) -> List[str]:
+        return list(self.stats)
+
+    def _resolve(self, table: str) -> tuple:
+        if table not in self._resolved:
+            stats = self.stats[table]
+            columns = [column for column in stats.columns if column in stats.non_empty]
+            dtypes = {}
+            for column in columns:
+                if column in stats.categories:
+                    dtypes[column] = category_union(stats.categories[column])
+                else:
+                    seen = stats.dtypes[column]
+                    dtypes[column] = combine_dtypes(seen, missing=len(seen) < len(stats.chunks))
+            self._resolved[table] = (columns, dtypes)
+        return self._resolved[table]
+
+    def columns(self, table: str) -> List:
+        return list(self._resolve(table)[0])
+
+    def row_count(self, table: str) -> int:
+        return self.stats[table].rows
+
+    def companies(self, table: str) -> list:
+        return list(self.stats[table].companies)
+
+    def iter_chunks(self, table: str) -> Iterator[pd.DataFrame]:
+        """按暂存顺序逐块产生对齐到全局列和类型的数据"""
+        columns, dtypes = self._resolve(table)
+        for path in self.stats[table].chunks:
+            chunk = read_frame(path, allow_pickle=True).reindex(columns=columns)
+            changed = {column: dtype for column, dtype in dtypes.items() if not _same_dtype(chunk[column].dtype, dtype)}
+            yield chunk.astype(changed) if changed else chunk
+
+    def head(self, table: str, n: int = 5) -> pd.DataFrame:
+        parts = []
+        remaining = n
+        for chunk in self.iter_chunks(table):
+            parts.append(chunk.head(remaining))
+            remaining -= len(parts[-1])
+            if remaining <= 0:
+                break
+        return pd.concat(parts, ignore_index=True)
+
+
+class ParquetChunkWriter:
+    """每个数据块写成 Parquet 文件中的一个行组；第一块确定文件结构"""
+
+    def __init__(self, path: Path):
+        self.path = path
+        self._writer = None
+        self._schema = None
+
+    def write(self, chunk: pd.DataFrame) -> None:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        if self._writer is None:
+            schema = pa.Schema.from_pandas(chunk, preserve_index=False)
+            # 第一块里全空的对象列推断为 null 类型，按字符串处理以便后续块写入
+            for i, schema_field in enumerate(schema):
+                if pa.types.is_null(schema_field.type):
+                    schema = schema.set(i, schema_field.with_type(pa.string()))
+            self._schema = schema
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self._writer = pq.ParquetWriter(self.path, schema)
+        self._writer.write_table(pa.Table.from_pandas(chunk, schema=self._schema, preserve_index=False))
+
+    def close(self) -> None:
+        if self._writer is not None:
+            self._writer.close()
+            self._writer = None
+
+    def abort(self) -> None:
+        self.close()
+        self.path.unlink(missing_ok=True)
+
+
+class PartitionChunkWriter:
+    """按日期分区逐块追加：每块在每个分区中写成一个 part-NNNNN 片段，清单在 close 时最后写入"""
+
+    def __init__(self, directory: Path, date_column: str = "日期", freq: str = "D"):
+        self.directory = directory
+        self.date_column = date_column
+        self.freq = freq
+        self.names: set = set()
+        self._sequence = 0
+        shutil.rmtree(directory, ignore_errors=True)
+        directory.mkdir(parents=True)
+
+    def write(self, chunk: pd.DataFrame) -> None:
+        keys = partition_keys(chunk[self.date_column], self.freq)
+        for name, part in chunk.groupby(keys, sort=True):
+            write_frame(part.reset_index(drop=True), self.directory / name / f"part-{self._sequence:05d}")
+            self.names.add(name)
+        self._sequence += 1
+
+    def abort(self) -> None:
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+    def close(self) -> List[str]:
+        names = sorted(self.names)
+        write_partition_manifest(self.directory, self.date_column, self.freq, names)
+        return names
+
+
+def write_streaming_columnar(
+    assembler: StreamingAssembler,
+    workbook_path: Path,
+    tables: Sequence[str],
+    partition_table: Optional[str] = None,
+    partition_directory: Optional[Path] = None,
+    date_column: str = "日期",
+    freq: str = "D",
+):
+    """逐块写出各表的 Parquet 列式副本，以及 partition_table 的日期分区
+
+    返回 (写出的副本 {表名: 路径}, 分区名列表或 None, 警告信息列表)。未安装 pyarrow 或
+    某张表无法写成 Parquet 时不写这张表的副本和分区（删除旧副本），下游会退回读取 XLSX。
+    """
+    copies: Dict[str, Path] = {}
+    partitions = None
+    warnings: List[str] = []
+    for table in tables:
+        stem = columnar_stem(workbook_path, table)
+        remove_frame(stem)
+        copy_writer = ParquetChunkWriter(stem.with_name(stem.name + PARQUET_SUFFIX)) if parquet_available() else None
+        partition_writer = None
+        if table == partition_table and date_column in assembler.columns(table) and parquet_available():
+            partition_writer = PartitionChunkWriter(partition_directory, date_column, freq)
+        if copy_writer is None and partition_writer is None:
+            continue
+        for chunk in assembler.iter_chunks(table):
+            if copy_writer is not None:
+                try:
+                    copy_writer.write(chunk)
+                except Exception as e:
+                    copy_writer.abort()
+                    copy_writer = None
+                    warnings.append(f"{table} 无法写成 Parquet 副本（{e}），下游将读取 XLSX")
+            if partition_writer is not None:
+                try:
+                    partition_writer.write(chunk)
+                except ColumnarUnavailable as e:
+                    partition_writer.abort()
+                    partition_writer = None
+                    warnings.append(f"{table} 无法写成 Parquet 日期分区（{e}），下游将读取 XLSX")
+        if copy_writer is not None:
+            copy_writer.close()
+            copies[table] = copy_writer.path
+        if partition_writer is not None:
+            partitions = partition_writer.close()
+    if not parquet_available():
+        warnings.append(MISSING_PYARROW_WARNING)
+    return copies, partitions, warnings
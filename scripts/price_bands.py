@@ -0,0 +1,85 @@
+"""价格带引擎：每个价格只分桶一次，各项分析复用同一份价格带编码。
+
+价格带为闭区间 (名称, 下限, 上限)，可以任意多个、允许重叠。所有价格带的下限和上限
+（取 nextafter 使上限包含在内）合成一个升序的边界数组，np.digitize 一次把每个价格
+映射到边界之间的一个区间（编码）；缺失值单独一个编码。每个价格带对应一组区间，记在
+布尔查找表中，所以某个价格带的掩码只是一次查表，增加价格带也不会多扫描数据。
+"""
+from __future__ import annotations
+
+from typing import Dict, Iterator, Sequence, Tuple
+
+import numpy as np
+
+BandSpec = Tuple[str, float, float]
+
+
+class PriceBandSet:
+    """一组闭区间价格带及其边界数组和 [价格带, 编码] 查找表"""
+
+    def __init__(self, bands: Sequence[BandSpec]):
+        bands = tuple((str(label), float(low), float(high)) for label, low, high in bands)
+        if not bands:
+            raise ValueError("至少需要一个价格带")
+        labels = [label for label, _, _ in bands]
+        duplicated = sorted({label for label in labels if labels.count(label) > 1})
+        if duplicated:
+            raise ValueError(f"价格带名称重复: {', '.join(duplicated)}")
+        for label, low, high in bands:
+            if np.isnan(low) or np.isnan(high):
+                raise ValueError(f"价格带 {label} 的上下限不能为空")
+            if low > high:
+                raise ValueError(f"价格带 {label} 的下限 {low:g} 大于上限 {high:g}")
+        self.bands = bands
+        self.labels = labels
+        self._index: Dict[str, int] = {label: k for k, label in enumerate(labels)}
+        uppers = [np.nextafter(high, np.inf) for _, _, high in bands]
+        self.edges = np.unique(np.asarray([low for _, low, _ in bands] + uppers, dtype="float64"))
+        # np.digitize 的结果为 0..len(edges)，编码 i (1 <= i < len(edges)) 表示 [edges[i-1], edges[i])；
+        # 缺失值的编码为 len(edges) + 1
+        self.missing_code = len(self.edges) + 1
+        self.n_codes = len(self.edges) + 2
+        lookup = np.zeros((len(bands), self.n_codes), dtype=bool)
+        for k, ((_, low, _), upper) in enumerate(zip(bands, uppers)):
+            first = np.searchsorted(self.edges, low) + 1
+            # 上限为 +inf 时 nextafter 不变，+inf 本身落在最后一个边界之后的编码
+            last = np.searchsorted(self.edges, upper) + int(upper == np.inf)
+            lookup[k, first:last + 1] = True
+        self.lookup = lookup
+
+    def __iter__(self) -> Iterator[BandSpec]:
+        return iter(self.bands)
+
+    def __len__(self) -> int:
+        return len(self.bands)
+
+    def __repr__(self) -> str:
+        return f"PriceBandSet({list(self.bands)!r})"
+
+    def index(self, label: str) -> int:
+        try:
+            return self._index[label]
+        except KeyError:
+            raise KeyError(f"未定义的价格带: {label}，可选值: {', '.join(self.labels)}") from None
+
+    def codes(self, prices) -> np.ndarray:
+        """每个价格所在区间的编码（int16），整列只分桶一次"""
+        prices = np.asarray(prices, dtype="float64")
+        codes = np.digitize(prices, self.edges).astype(np.int16)
+        codes[np.isnan(prices)] = self.missing_code
+        return codes
+
+    def mask(self, codes: np.ndarray, label: str) -> np.ndarray:
+        """编码落在价格带 label 内的布尔掩码"""
+        return self.lookup[self.index(label)][codes]
+
+    def band_counts(self, code_counts: np.ndarray) -> np.ndarray:
+        """各编码的点数（最后一维长度为 n_codes）换算为各价格带的点数"""
+        return code_counts @ self.lookup.T.astype(np.int64)
+
+    def grouped_counts(self, group_codes: np.ndarray, codes: np.ndarray, n_groups: int) -> np.ndarray:
+        """按分组编码（0..n_groups-1）统计各价格带的点数，形状为 (n_groups, 价格带数)"""
+        code_counts = np.bincount(
+            group_codes.astype(np.int64) * self.n_codes + codes, minlength=n_groups * self.n_codes
+        ).reshape(n_groups, self.n_codes)
+        return self.band_counts(code_counts)
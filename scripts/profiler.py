@@ -0,0 +1,254 @@
+"""各脚本共用的阶段计时与资源统计。
+
+阶段计时始终开启（开销只是几次 perf_counter 调用），脚本用它打印毫秒精度的用时；
+加上 --profile 后在结束时额外打印汇总表（每个阶段的用时、行数、字节数、峰值内存，以及逐个文件的
+读取用时），并把同样的内容写成 JSON，便于在不同版本之间比较性能回归。
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import platform
+import sys
+import time
+import unicodedata
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass, field
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Union
+
+try:
+    import resource
+except ImportError:  # Windows 没有 resource 模块，不统计峰值内存
+    resource = None
+
+DEFAULT_PROFILE_DIR = Path("profile")
+
+
+def _proc_peak_rss_mb() -> Optional[float]:
+    # Linux 上 ru_maxrss 在 exec 之后保留父进程 fork 时的大小，VmHWM 只统计当前程序
+    try:
+        with open("/proc/self/status", encoding="ascii") as fh:
+            for line in fh:
+                if line.startswith("VmHWM:"):
+                    return round(int(line.split()[1]) / 1024, 1)
+    except (OSError, ValueError):
+        pass
+    return None
+
+
+def peak_rss_mb(children: bool = False) -> Optional[float]:
+    """当前进程（children=True 时为已结束的子进程中最大的那个）的峰值常驻内存，单位 MB"""
+    if not children:
+        peak = _proc_peak_rss_mb()
+        if peak is not None:
+            return peak
+    if resource is None:
+        return None
+    usage = resource.getrusage(resource.RUSAGE_CHILDREN if children else resource.RUSAGE_SELF)
+    # Linux 上 ru_maxrss 的单位是 KB，macOS 上是字节
+    scale = 1024 * 1024 if sys.platform == "darwin" else 1024
+    return round(usage.ru_maxrss / scale, 1)
+
+
+def format_duration(seconds: float) -> str:
+    """格式化为 H:MM:SS.mmm，保留毫秒"""
+    minutes, secs = divmod(max(seconds, 0.0), 60)
+    hours, minutes = divmod(int(minutes), 60)
+    return f"{hours}:{minutes:02d}:{secs:06.3f}"
+
+
+def _display_width(text: str) -> int:
+    # 中文等全角字符在终端中占两列
+    return sum(2 if unicodedata.east_asian_width(char) in "WF" else 1 for char in text)
+
+
+def _pad(text: str, width: int, left: bool) -> str:
+    padding = " " * (width - _display_width(text))
+    return text + padding if left else padding + text
+
+
+def path_bytes(*paths: Union[str, Path, None]) -> int:
+    """文件或目录（递归）的总字节数，不存在的路径记为 0"""
+    total = 0
+    for path in paths:
+        if path is None:
+            continue
+        path = Path(path)
+        if path.is_file():
+            total += path.stat().st_size
+        elif path.is_dir():
+            total += sum(child.stat().st_size for child in path.rglob("*") if child.is_file())
+    return total
+
+
+@dataclass
+class StageRecord:
+    name: str
+    ms: float = 0.0
+    rows: Optional[int] = None
+    bytes: Optional[int] = None
+    peak_rss_mb: Optional[float] = None
+    _started: float = field(default=0.0, repr=False)
+
+    @property
+    def seconds(self) -> float:
+        return self.ms / 1000
+
+    def stop(self, rows: Optional[int] = None, bytes: Optional[int] = None) -> "StageRecord":  # noqa: A002
+        """结束计时；rows/bytes 为该阶段处理的行数和读写的字节数"""
+        self.ms = round((time.perf_counter() - self._started) * 1000, 3)
+        if rows is not None:
+            self.rows = int(rows)
+        if bytes is not None:
+            self.bytes = int(bytes)
+        self.peak_rss_mb = peak_rss_mb()
+        return self
+
+
+@dataclass
+class FileRecord:
+    name: str
+    ms: float
+    rows: Optional[int] = None
+    bytes: Optional[int] = None
+    source: Optional[str] = None
+
+
+class Profiler:
+    """记录各阶段和各输入文件的用时；enabled 为 False 时只计时、不打印汇总也不写 JSON"""
+
+    def __init__(self, script: str, enabled: bool = False, json_path: Optional[Path] = None):
+        self.script = script
+        self.enabled = enabled
+        self.json_path = json_path
+        self.started_at = datetime.now()
+        self.stages: List[StageRecord] = []
+        self.files: List[FileRecord] = []
+        self._started = time.perf_counter()
+
+    @classmethod
+    def from_args(cls, script: str, args: argparse.Namespace) -> "Profiler":
+        return cls(script, enabled=args.profile, json_path=args.profile_json)
+
+    def start_stage(self, name: str) -> StageRecord:
+        record = StageRecord(name, _started=time.perf_counter())
+        self.stages.append(record)
+        return record
+
+    @contextmanager
+    def stage(self, name: str) -> Iterator[StageRecord]:
+        """with profiler.stage("加载") as stage: ...; 可在块内设置 stage.rows / stage.bytes"""
+        record = self.start_stage(name)
+        try:
+            yield record
+        finally:
+            record.stop()
+
+    def record_file(
+        self,
+        name: str,
+        seconds: float,
+        rows: Optional[int] = None,
+        bytes: Optional[int] = None,  # noqa: A002
+        source: Optional[str] = None,
+    ) -> None:
+        self.files.append(FileRecord(name, round(seconds * 1000, 3), rows, bytes, source))
+
+    @property
+    def total_seconds(self) -> float:
+        return time.perf_counter() - self._started
+
+    def report(self) -> Dict[str, object]:
+        return {
+            "script": self.script,
+            "argv": sys.argv[1:],
+            "started_at": self.started_at.isoformat(timespec="seconds"),
+            "total_ms": round(self.total_seconds * 1000, 3),
+            "peak_rss_mb": peak_rss_mb(),
+            "children_peak_rss_mb": peak_rss_mb(children=True),
+            "python": platform.python_version(),
+            # platform.platform() 会启动子进程，污染子进程峰值内存的统计
+            "platform": f"{platform.system()}-{platform.release()}-{platform.machine()}",
+            "stages": [
+                {key: value for key, value in asdict(stage).items() if not key.startswith("_")}
+                for stage in self.stages
+            ],
+            "files": [asdict(record) for record in self.files],
+        }
+
+    def format_table(self) -> str:
+        report = self.report()
+
+        def cell(value) -> str:
+            if value is None:
+                return "-"
+            if isinstance(value, float):
+                return f"{value:,.3f}" if value < 1e6 else f"{value:,.0f}"
+            return f"{value:,}" if isinstance(value, int) else str(value)
+
+        def table(headers: List[str], rows: List[List]) -> List[str]:
+            cells = [[cell(value) for value in row] for row in rows]
+            widths = [
+                max([_display_width(header)] + [_display_width(row[i]) for row in cells])
+                for i, header in enumerate(headers)
+            ]
+            # 第一列（名称）左对齐，其余数值列右对齐
+            lines = ["  ".join(_pad(header, width, i == 0) for i, (header, width) in enumerate(zip(headers, widths)))]
+            lines += [
+                "  ".join(_pad(value, width, i == 0) for i, (value, width) in enumerate(zip(row, widths)))
+                for row in cells
+            ]
+            return lines
+
+        lines = [f"性能统计: {self.script}"]
+        lines += table(
+            ["stage", "ms", "rows", "bytes", "peak_rss_mb"],
+            [[stage["name"], stage["ms"], stage["rows"], stage["bytes"], stage["peak_rss_mb"]] for stage in report["stages"]],
+        )
+        if self.files:
+            durations = sorted(record.ms for record in self.files)
+            lines.append("")
+            lines += table(
+                ["file", "ms", "rows", "bytes", "source"],
+                [[record.name, record.ms, record.rows, record.bytes, record.source] for record in self.files],
+            )
+            lines.append(
+                f"文件读取: {len(durations)} 个, 中位数 {durations[len(durations) // 2]:,.3f} ms, "
+                f"最慢 {durations[-1]:,.3f} ms"
+            )
+        lines.append("")
+        lines.append(
+            f"总用时: {report['total_ms']:,.3f} ms | 峰值内存: {cell(report['peak_rss_mb'])} MB"
+            f" (子进程 {cell(report['children_peak_rss_mb'])} MB)"
+        )
+        return "\n".join(lines)
+
+    def default_json_path(self) -> Path:
+        return DEFAULT_PROFILE_DIR / f"{self.script}-{self.started_at:%Y%m%d-%H%M%S}.json"
+
+    def finish(self) -> Optional[Path]:
+        """--profile 时打印汇总表并写出 JSON，返回 JSON 路径"""
+        if not self.enabled:
+            return None
+        print(self.format_table())
+        path = Path(self.json_path) if self.json_path else self.default_json_path()
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(json.dumps(self.report(), ensure_ascii=False, indent=2), encoding="utf-8")
+        print(f"性能统计已写入: {path}")
+        return path
+
+
+def add_profile_arguments(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument(
+        "--profile",
+        action="store_true",
+        help="结束时打印各阶段用时/行数/字节数/峰值内存的汇总表，并写出 JSON",
+    )
+    parser.add_argument(
+        "--profile-json",
+        type=Path,
+        default=None,
+        help=f"性能统计 JSON 的路径 (默认: {DEFAULT_PROFILE_DIR}/<脚本名>-<时间>.json)",
+    )
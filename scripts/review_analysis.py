@@ -3,11 +3,28 @@
 from __future__ import annotations
 
 import argparse
+from collections.abc import Mapping
+from functools import partial
 from pathlib import Path
-from typing import Dict, Tuple
+from typing import Callable, Dict, Iterator, Sequence, Tuple
 
+import numpy as np
 import pandas as pd
 
+from columnar_store import SHEET_TABLES, find_columnar_copy
+from dataset_loader import (
+    TRADE_SCHEMA,
+    date_range_bounds,
+    load_spot_prices,
+    read_excel_table,
+    read_merged_table,
+    select_date_range,
+)
+from excel_writer import EXCEL_ENGINES, write_excel_sheets
+from executors import BACKENDS, create_executor
+from price_bands import BandSpec, PriceBandSet
+from profiler import Profiler, add_profile_arguments, format_duration, path_bytes
+
 HOURS_PER_RECORD = 4  # 96 点制到 24 小时
 COEFFICIENT = 660
 SUMMARY_KEY = "output"
@@ -28,6 +45,24 @@ DEEP_RESULT_COLUMNS = [
     "中长期平均持仓",
     "深调套利（元）",
 ]
+INFO_COLUMNS = ["公司名称", "机组名称", "机组容量"]
+# 两项分析实际用到的交易量价数据列
+ANALYSIS_COLUMNS = list(dict.fromkeys([
+    *TRADE_SCHEMA,
+    *STATUS_COLUMN_CANDIDATES,
+    *TIME_COLUMN_CANDIDATES,
+]))
+# 交易量价数据的价格带：深调收益取日前价格的低价带，高价区间取日前/日内价格的高价带
+LOW_PRICE_BAND = "低价"
+HIGH_PRICE_BAND = "高价"
+TRADE_PRICE_BANDS = PriceBandSet(((LOW_PRICE_BAND, 0.0, 200.0), (HIGH_PRICE_BAND, 300.0, 1500.0)))
+TRADE_PRICE_COLUMNS = ("日前出清节点价格", "日内出清节点价格")
+# 现货价格带：(名称, 下限, 上限)，闭区间；摘要中第一个为"0价"，最后一个为"高价"
+SPOT_PRICE_BANDS = PriceBandSet((("0-200", 0.0, 200.0), ("300-1500", 566.0, 1500.0)))
+SPOT_PRICE_COLUMNS = {"日前": "日前出清价格(元/MWh)", "实时": "实时出清价格(元/MWh)"}
+SPOT_FILE_PATTERN = "现货出清电价_REPORT*.xlsx"
+PERIOD_COLUMN = "周期"
+PERIOD_FREQUENCIES = {"daily": "D", "weekly": "W", "monthly": "M"}
 HIGH_RESULT_COLUMNS = [
     "单位",
     "日前高价时长",
@@ -51,6 +86,13 @@ def resolve_status_column(df: pd.DataFrame) -> str | None:
     return None
 
 
+def running_status_mask(df: pd.DataFrame, status_column: str) -> np.ndarray:
+    """机组状态（去掉首尾空白）为 运行 的行；只对状态的不同取值做字符串处理"""
+    codes, uniques = pd.factorize(df[status_column])
+    running = pd.Index(uniques).astype(str).str.strip() == RUNNING_STATUS
+    return np.append(np.asarray(running, dtype=bool), False).take(codes)
+
+
 def build_company_time_group_keys(df: pd.DataFrame) -> list[str]:
     keys = ["公司名称", "日期"]
     for column in TIME_COLUMN_CANDIDATES:
@@ -59,91 +101,410 @@ def build_company_time_group_keys(df: pd.DataFrame) -> list[str]:
     return keys
 
 
-def compute_company_holding_position(
-    summary_df: pd.DataFrame, contract_power: pd.Series
-) -> pd.Series:
-    status_column = resolve_status_column(summary_df)
-    if status_column is None:
-        raise ValueError(f"{SUMMARY_KEY} 缺少列: 机组运行状态/机组状态")
-
-    group_keys = build_company_time_group_keys(summary_df)
-    groupers = [summary_df[key] for key in group_keys]
+def build_match_key(df: pd.DataFrame, categories: pd.Index | None = None) -> pd.Series:
+    """公司名称 + 机组名称 组成的机组匹配键，结果为 category
+
+    先用两列的类别编码组成整数对 (公司编码, 机组编码)，只对出现过的整数对拼接一次文字标签，
+    不再逐行拼接字符串。categories 不为空时把结果编码到这组类别上（例如让基础信息和交易数据共用同一组键），
+    不在其中的键记为缺失。
+    """
+    company = df["公司名称"].astype("category")
+    unit = df["机组名称"].astype("category")
+    company_codes = company.cat.codes.to_numpy(dtype=np.int64)
+    unit_codes = unit.cat.codes.to_numpy(dtype=np.int64)
+    valid = (company_codes >= 0) & (unit_codes >= 0)
+    pair_codes = np.where(valid, company_codes * len(unit.cat.categories) + unit_codes, -1)
+
+    pair_index, pairs = pd.factorize(pair_codes[valid])
+    labels = pd.Index(
+        company.cat.categories.to_numpy(dtype=object)[pairs // len(unit.cat.categories)]
+        + unit.cat.categories.to_numpy(dtype=object)[pairs % len(unit.cat.categories)]
+    )
+    # 不同的整数对可能拼出相同的文字（如 "A1"+"2" 与 "A"+"12"），与按文字匹配的口径保持一致
+    if categories is None:
+        label_codes, categories = pd.factorize(labels)
+    else:
+        label_codes = categories.get_indexer(labels)
+    codes = np.full(len(df), -1, dtype=np.int64)
+    codes[valid] = label_codes[pair_index]
+    return pd.Series(pd.Categorical.from_codes(codes, categories=categories), index=df.index)
+
+
+class CapacityIndex:
+    """基础信息中 匹配键 -> 机组容量 的查找表，机组容量为 0 或无法解析的记为缺失
+
+    同一 匹配键 在基础信息中出现多次时取第一行。fingerprint 是基础信息相关列的逐行哈希，
+    用来判断基础信息是否变化。
+    """
+
+    def __init__(self, info_df: pd.DataFrame):
+        self.fingerprint = info_fingerprint(info_df)
+        keys = build_match_key(info_df)
+        key_codes = keys.cat.codes.to_numpy()
+        capacity = pd.to_numeric(info_df["机组容量"], errors="coerce").to_numpy(dtype="float64", na_value=np.nan)
+        present = key_codes >= 0
+        unique_codes, first_rows = np.unique(key_codes[present], return_index=True)
+        self.keys = keys.cat.categories
+        self.capacity = np.full(len(self.keys), np.nan)
+        self.capacity[unique_codes] = capacity[present][first_rows]
+        self.capacity[self.capacity == 0] = np.nan
+
+    def matches(self, info_df: pd.DataFrame) -> bool:
+        return np.array_equal(self.fingerprint, info_fingerprint(info_df))
+
+    def attach(self, summary_df: pd.DataFrame) -> None:
+        """在 summary_df 上原地生成 匹配键 和 机组容量 列
+
+        先把交易数据的每个 匹配键 类别在查找表中定位一次，再按类别编码 take 出每行的容量，
+        不需要与基础信息 merge（merge 会复制整张交易表）。
+        """
+        match_key = build_match_key(summary_df)
+        positions = self.keys.get_indexer(match_key.cat.categories)
+        # 末尾追加一个缺失值，编码为 -1（匹配键缺失）的行取到它
+        by_category = np.append(np.where(positions >= 0, self.capacity[positions], np.nan), np.nan)
+        summary_df["匹配键"] = match_key
+        summary_df["机组容量"] = by_category.take(match_key.cat.codes.to_numpy())
+
+
+_CAPACITY_INDEX: CapacityIndex | None = None
+
+
+def info_fingerprint(info_df: pd.DataFrame) -> np.ndarray:
+    columns = [column for column in INFO_COLUMNS if column in info_df.columns]
+    return pd.util.hash_pandas_object(info_df[columns], index=False).to_numpy()
+
+
+def capacity_index(info_df: pd.DataFrame) -> CapacityIndex:
+    """返回基础信息的机组容量查找表；各次分析复用同一份，基础信息变化时重新建立"""
+    global _CAPACITY_INDEX
+    if _CAPACITY_INDEX is None or not _CAPACITY_INDEX.matches(info_df):
+        _CAPACITY_INDEX = CapacityIndex(info_df)
+    return _CAPACITY_INDEX
+
+
+class HoldingAggregate:
+    """按 公司、日期、时间 区间汇总的中长期电量与运行容量，用来求公司口径中长期持仓
+
+    table 每行是一个区间，列为 (掩码名, "电量"/"容量") 的求和，行数只有交易数据的机组数分之一。
+    各行通过区间编码（table 中的行号）取回所在区间的持仓，不必在整张交易表上 transform；
+    追加新日期的数据时用 append 只汇总新增的行。
+    """
+
+    def __init__(self, group_keys: Sequence[str], names: Sequence[str]):
+        self.group_keys = list(group_keys)
+        self.names = list(names)
+        columns = pd.MultiIndex.from_product([self.names, ["电量", "容量"]])
+        self.table = pd.DataFrame(columns=columns, dtype=float)
+        self.table.index = pd.MultiIndex.from_arrays([[] for _ in self.group_keys], names=self.group_keys)
+
+    @classmethod
+    def from_frame(
+        cls,
+        summary_df: pd.DataFrame,
+        contract_powers: Mapping[str, pd.Series],
+        row_masks: Mapping[str, pd.Series],
+    ) -> Tuple["HoldingAggregate", np.ndarray]:
+        """汇总 summary_df，返回 (汇总表, 每行的区间编码)"""
+        aggregate = cls(build_company_time_group_keys(summary_df), list(row_masks))
+        return aggregate, aggregate.append(summary_df, contract_powers, row_masks)
+
+    @staticmethod
+    def _masked_columns(
+        summary_df: pd.DataFrame,
+        contract_powers: Mapping[str, pd.Series],
+        row_masks: Mapping[str, pd.Series],
+    ) -> np.ndarray:
+        """每行计入求和的值，列顺序与 table 相同；掩码未选中的行按 0 计"""
+        status_column = resolve_status_column(summary_df)
+        if status_column is None:
+            raise ValueError(f"{SUMMARY_KEY} 缺少列: 机组运行状态/机组状态")
+        running_mask = running_status_mask(summary_df, status_column)
+        capacity = summary_df["机组容量"].to_numpy(dtype="float64", na_value=np.nan)
+        running_capacity = np.where(running_mask & ~np.isnan(capacity), capacity, 0.0)
+        columns = []
+        for name, row_mask in row_masks.items():
+            selected = row_mask.to_numpy(dtype=bool)
+            contract_power = np.nan_to_num(contract_powers[name].to_numpy(dtype="float64", na_value=np.nan), nan=0.0)
+            columns.append(np.where(selected, contract_power, 0.0))
+            columns.append(np.where(selected, running_capacity, 0.0))
+        return np.column_stack(columns)
+
+    def append(
+        self,
+        summary_df: pd.DataFrame,
+        contract_powers: Mapping[str, pd.Series],
+        row_masks: Mapping[str, pd.Series],
+    ) -> np.ndarray:
+        """把 summary_df 的行计入汇总表（已有区间累加，新区间追加），返回这些行的区间编码
+
+        区间键有缺失的行编码为 -1，持仓按 0 计。
+        """
+        if list(row_masks) != self.names:
+            raise ValueError(f"掩码应为 {self.names}，实际为 {list(row_masks)}")
+        grouped = summary_df.groupby([summary_df[key] for key in self.group_keys], observed=True, sort=False)
+        # 键缺失的行 ngroup 为 NaN（整列随之变为 float）
+        local_codes = grouped.ngroup().fillna(-1).to_numpy(dtype=np.int64)
+        present = local_codes >= 0
+        group_codes = local_codes[present]
+        n_groups = grouped.ngroups
+        values = self._masked_columns(summary_df, contract_powers, row_masks)[present]
+        sums = np.column_stack([
+            np.bincount(group_codes, weights=values[:, column], minlength=n_groups)
+            for column in range(values.shape[1])
+        ]) if n_groups else np.zeros((0, len(self.table.columns)))
+        # 每个区间取第一行的键
+        _, first_rows = np.unique(group_codes, return_index=True)
+        keys = pd.MultiIndex.from_frame(summary_df.loc[present, self.group_keys].iloc[first_rows])
+
+        positions = self.table.index.get_indexer(keys) if len(self.table) else np.full(len(keys), -1)
+        existing = positions >= 0
+        if existing.any():
+            self.table.iloc[positions[existing]] += sums[existing]
+        if not existing.all():
+            added = pd.DataFrame(sums[~existing], index=keys[~existing], columns=self.table.columns)
+            positions[~existing] = np.arange(len(self.table), len(self.table) + len(added))
+            self.table = pd.concat([self.table, added]) if len(self.table) else added
+        codes = np.full(len(summary_df), -1, dtype=np.int64)
+        codes[present] = positions[group_codes]
+        return codes
+
+    def holding_ratios(self) -> pd.DataFrame:
+        """每个区间、每组掩码的公司口径中长期持仓"""
+        ratios = {}
+        for name in self.names:
+            company_contract_power = self.table[(name, "电量")]
+            company_running_capacity = self.table[(name, "容量")]
+            holding_ratio = (company_contract_power / company_running_capacity).where(
+                company_running_capacity > 0, 0
+            )
+            ratios[name] = holding_ratio.replace([float("inf"), float("-inf")], 0).fillna(0) * HOURS_PER_RECORD
+        return pd.DataFrame(ratios, index=self.table.index)
+
+    def holdings(self, codes: np.ndarray, index: pd.Index) -> pd.DataFrame:
+        """按区间编码取回每行的持仓，返回以掩码名为列、以 index 为索引的 DataFrame"""
+        ratios = self.holding_ratios()
+        columns = {}
+        for name in self.names:
+            # 末尾追加 0，编码为 -1 的行取到它
+            by_interval = np.append(ratios[name].to_numpy(dtype="float64"), 0.0)
+            columns[name] = by_interval.take(codes)
+        return pd.DataFrame(columns, index=index)
+
+
+def compute_masked_holding_positions(
+    summary_df: pd.DataFrame,
+    contract_powers: Mapping[str, pd.Series],
+    row_masks: Mapping[str, pd.Series],
+) -> pd.DataFrame:
+    """一次分组算出多组行各自的公司口径中长期持仓
 
-    contract_power = contract_power.fillna(0)
-    company_contract_power = contract_power.groupby(groupers).transform("sum")
+    每组只统计 row_masks 中对应掩码选中的行（其余行按 0 计入分组求和），结果与只在这些行上
+    调用 compute_company_holding_position 相同。返回以掩码名为列、与 summary_df 同索引的 DataFrame。
+    """
+    aggregate, codes = HoldingAggregate.from_frame(summary_df, contract_powers, row_masks)
+    return aggregate.holdings(codes, summary_df.index)
 
-    running_mask = (
-        summary_df[status_column].fillna("").astype(str).str.strip() == RUNNING_STATUS
-    )
-    running_capacity = summary_df["机组容量"].where(running_mask, 0).fillna(0)
-    company_running_capacity = running_capacity.groupby(groupers).transform("sum")
 
-    holding_ratio = (company_contract_power / company_running_capacity).where(
-        company_running_capacity > 0, 0
-    )
-    return holding_ratio.replace([float("inf"), float("-inf")], 0).fillna(0) * HOURS_PER_RECORD
+def compute_company_holding_position(
+    summary_df: pd.DataFrame, contract_power: pd.Series
+) -> pd.Series:
+    all_rows = pd.Series(True, index=summary_df.index)
+    return compute_masked_holding_positions(summary_df, {"全部": contract_power}, {"全部": all_rows})["全部"]
 
 
-def analyze_spot_prices(path: Path) -> Tuple[pd.DataFrame, pd.DataFrame]:
+def find_spot_files(path: Path) -> list[Path]:
+    """path 为目录时返回其中所有 现货出清电价_REPORT*.xlsx（按文件名排序）"""
+    if path.is_dir():
+        files = sorted(path.glob(SPOT_FILE_PATTERN))
+        if not files:
+            raise FileNotFoundError(f"目录 {path} 中没有 {SPOT_FILE_PATTERN} 文件")
+        return files
     if not path.exists():
         raise FileNotFoundError(f"找不到现货出清电价文件: {path}")
-
-    df = pd.read_excel(path)
-    df = df[df["序号"] != "均价"].copy()
-    df["日期"] = pd.to_datetime(df["日期"])
-    data_date = df["日期"].dropna().iloc[0]
-
-    day_ahead_avg = df["日前出清价格(元/MWh)"].mean()
-    real_time_avg = df["实时出清价格(元/MWh)"].mean()
-
-    day_ahead_low_count = ((df["日前出清价格(元/MWh)"] >= 0) &
-                           (df["日前出清价格(元/MWh)"] <= 200)).sum()
-    real_time_low_count = ((df["实时出清价格(元/MWh)"] >= 0) &
-                           (df["实时出清价格(元/MWh)"] <= 200)).sum()
-
-    day_ahead_high_count = ((df["日前出清价格(元/MWh)"] >= 566) &
-                            (df["日前出清价格(元/MWh)"] <= 1500)).sum()
-    real_time_high_count = ((df["实时出清价格(元/MWh)"] >= 566) &
-                            (df["实时出清价格(元/MWh)"] <= 1500)).sum()
-
-    detail_df = pd.DataFrame([
-        {
-            "指标": "日前",
-            "均价": day_ahead_avg,
-            "0-200区间点数": day_ahead_low_count,
-            "0-200区间小时": day_ahead_low_count * 15 / 60,
-            "300-1500区间点数": day_ahead_high_count,
-            "300-1500区间小时": day_ahead_high_count * 15 / 60,
-        },
-        {
-            "指标": "实时",
-            "均价": real_time_avg,
-            "0-200区间点数": real_time_low_count,
-            "0-200区间小时": real_time_low_count * 15 / 60,
-            "300-1500区间点数": real_time_high_count,
-            "300-1500区间小时": real_time_high_count * 15 / 60,
-        },
-    ])
-
+    return [path]
+
+
+def load_spot_days(path: Path) -> pd.DataFrame:
+    """读取一个或一个目录的现货出清电价文件，去掉 均价 行；日期为空的行归入同一文件中前一行的日期"""
+    files = find_spot_files(path)
+    frames = []
+    for file_path in files:
+        df = load_spot_prices(file_path)
+        df = df[df["序号"] != "均价"].copy()
+        df["日期"] = df["日期"].ffill().bfill().dt.normalize()
+        frames.append(df)
+    df = pd.concat(frames, ignore_index=True) if len(frames) > 1 else frames[0]
+    if len(files) > 1:
+        # 多个文件包含同一天时以后面的文件为准
+        df = df.drop_duplicates(["日期", "序号"], keep="last").reset_index(drop=True)
+    return df
+
+
+def _format_month_day(value: pd.Timestamp) -> str:
+    return value.strftime("%m月%d日").lstrip("0").replace("月0", "月")
+
+
+def analyze_spot_price_days(
+    path: Path, bands: PriceBandSet = SPOT_PRICE_BANDS
+) -> Tuple[pd.DataFrame, pd.DataFrame, pd.DataFrame]:
+    """现货电价的 (摘要, 全部日期合计的区间统计, 逐日区间统计)
+
+    日期和价格各编码一次，逐日的点数、均价和各价格带点数都由 np.bincount 分组求得。
+    """
+    df = load_spot_days(path)
+    day_codes, days = pd.factorize(df["日期"], sort=True)
+    valid_day = day_codes >= 0
+    day_codes = day_codes[valid_day]
+    n_days = len(days)
+
+    daily_rows = []
+    overall_rows = []
+    for metric, column in SPOT_PRICE_COLUMNS.items():
+        prices = df[column].to_numpy(dtype="float64", na_value=np.nan)[valid_day]
+        present = ~np.isnan(prices)
+        day_counts = np.bincount(day_codes[present], minlength=n_days)
+        day_sums = np.bincount(day_codes[present], weights=prices[present], minlength=n_days)
+        band_counts = bands.grouped_counts(day_codes, bands.codes(prices), n_days)
+
+        def band_fields(counts) -> dict:
+            fields = {}
+            for (label, _, _), count in zip(bands, counts):
+                fields[f"{label}区间点数"] = count
+                fields[f"{label}区间小时"] = count * 15 / 60
+            return fields
+
+        with np.errstate(invalid="ignore", divide="ignore"):
+            day_means = day_sums / day_counts
+        for day_index, day in enumerate(days):
+            daily_rows.append({"日期": day, "指标": metric, "均价": day_means[day_index], **band_fields(band_counts[day_index])})
+        # 合计均价按全部有效价格计算（含日期缺失的行），与单日文件的口径一致
+        overall_rows.append({
+            "指标": metric,
+            "均价": df[column].mean(),
+            **band_fields(band_counts.sum(axis=0)),
+        })
+
+    detail_df = pd.DataFrame(overall_rows)
+    daily_df = pd.DataFrame(daily_rows)
+    if n_days > 0:
+        daily_df = daily_df.sort_values(["日期"], kind="stable").reset_index(drop=True)
+
+    low_label, high_label = bands.labels[0], bands.labels[-1]
+    date_text = _format_month_day(days[0]) if n_days else ""
+    if n_days > 1:
+        date_text += f"至{_format_month_day(days[-1])}"
+    day_ahead, real_time = detail_df.iloc[0], detail_df.iloc[1]
     summary_text = (
-        f"{data_date.strftime('%m月%d日').lstrip('0').replace('月0', '月')}"
-        f"现货日前均价{day_ahead_avg:.1f}元/兆瓦时，实时均价{real_time_avg:.2f}元/兆瓦时。"
-        f"现货日前0价约{detail_df.loc[0, '0-200区间小时']:.2f}小时，实时0价约{detail_df.loc[1, '0-200区间小时']:.2f}小时；"
-        f"现货日前高价约{detail_df.loc[0, '300-1500区间小时']:.2f}小时，实时高价约{detail_df.loc[1, '300-1500区间小时']:.2f}小时。"
+        f"{date_text}"
+        f"现货日前均价{day_ahead['均价']:.1f}元/兆瓦时，实时均价{real_time['均价']:.2f}元/兆瓦时。"
+        f"现货日前0价约{day_ahead[f'{low_label}区间小时']:.2f}小时，实时0价约{real_time[f'{low_label}区间小时']:.2f}小时；"
+        f"现货日前高价约{day_ahead[f'{high_label}区间小时']:.2f}小时，实时高价约{real_time[f'{high_label}区间小时']:.2f}小时。"
         "火电机组核心收益点在于："
     )
     summary_df = pd.DataFrame([{"摘要": summary_text}])
+    return summary_df, detail_df, daily_df
+
+
+def analyze_spot_prices(
+    path: Path, bands: PriceBandSet = SPOT_PRICE_BANDS
+) -> Tuple[pd.DataFrame, pd.DataFrame]:
+    """现货电价的 (摘要, 区间统计)；path 可以是多日文件或包含多个 REPORT 文件的目录"""
+    summary_df, detail_df, _ = analyze_spot_price_days(path, bands)
     return summary_df, detail_df
 
 
-def load_output_workbook(path: Path) -> Dict[str, pd.DataFrame]:
-    if not path.exists():
-        raise FileNotFoundError(f"找不到合并后的输出文件: {path}")
-    data = pd.read_excel(path, sheet_name=None)
-    if SUMMARY_KEY not in data:
-        if SOURCE_KEY not in data:
+class LazyWorkbook(Mapping):
+    """按需解析工作表的只读映射：某个工作表第一次被访问时才读取，之后复用结果。"""
+
+    def __init__(self, loaders: Dict[str, Callable[[], pd.DataFrame]]):
+        self._loaders = loaders
+        self._frames: Dict[str, pd.DataFrame] = {}
+
+    def __getitem__(self, key: str) -> pd.DataFrame:
+        if key not in self._frames:
+            if key not in self._loaders:
+                raise KeyError(key)
+            self._frames[key] = self._loaders[key]()
+        return self._frames[key]
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._loaders)
+
+    def __len__(self) -> int:
+        return len(self._loaders)
+
+    def loaded_sheets(self) -> list[str]:
+        return list(self._frames)
+
+    def loaded_rows(self) -> int:
+        """已解析的工作表的总行数，不触发加载；同一份数据（如 output 别名）只计一次"""
+        distinct = {id(frame): frame for frame in self._frames.values()}
+        return sum(len(frame) for frame in distinct.values())
+
+
+def columnar_loaders(
+    path: Path,
+    trade_columns: Sequence[str] | None,
+    start_date: pd.Timestamp | None,
+    end_date: pd.Timestamp | None,
+) -> Dict[str, Callable[[], pd.DataFrame]] | None:
+    """merge_data_files 写在工作簿旁边的列式副本的读取函数，缺少分析所需的表时返回 None"""
+    copies = {sheet: find_columnar_copy(path, table) for sheet, table in SHEET_TABLES.items()}
+    if copies[SOURCE_KEY] is None or copies[INFO_KEY] is None:
+        return None
+    table_columns = {SOURCE_KEY: trade_columns, INFO_KEY: INFO_COLUMNS}
+    return {
+        sheet: partial(
+            read_merged_table,
+            path,
+            SHEET_TABLES[sheet],
+            table_columns.get(sheet),
+            start_date if sheet == SOURCE_KEY else None,
+            end_date if sheet == SOURCE_KEY else None,
+        )
+        for sheet, copy in copies.items()
+        if copy is not None
+    }
+
+
+def excel_loaders(
+    excel_file: pd.ExcelFile, trade_columns: Sequence[str] | None
+) -> Dict[str, Callable[[], pd.DataFrame]]:
+    """工作簿中各工作表的读取函数；交易量价和基础信息按声明的列类型解析"""
+    loaders = {}
+    for sheet in excel_file.sheet_names:
+        if sheet in (SOURCE_KEY, SUMMARY_KEY):
+            loaders[sheet] = partial(read_excel_table, excel_file, "trade_price", sheet, trade_columns)
+        elif sheet == INFO_KEY:
+            loaders[sheet] = partial(read_excel_table, excel_file, "basic", sheet, INFO_COLUMNS)
+        else:
+            loaders[sheet] = partial(excel_file.parse, sheet)
+    return loaders
+
+
+def load_output_workbook(
+    path: Path,
+    start_date: pd.Timestamp | None = None,
+    end_date: pd.Timestamp | None = None,
+    trade_columns: Sequence[str] | None = None,
+) -> LazyWorkbook:
+    """加载合并结果
+
+    给出日期范围且存在日期分区时，交易量价数据只读取范围内的分区；
+    trade_columns 不为空时交易量价数据只读取这些列（例如 ANALYSIS_COLUMNS）。
+    """
+    loaders = columnar_loaders(path, trade_columns, start_date, end_date)
+    if loaders is None:
+        if not path.exists():
+            raise FileNotFoundError(f"找不到合并后的输出文件: {path}")
+        # 只读取工作表目录，具体的工作表在第一次访问时才解析
+        loaders = excel_loaders(pd.ExcelFile(path), trade_columns)
+    data = LazyWorkbook(loaders)
+    if SUMMARY_KEY not in loaders:
+        if SOURCE_KEY not in loaders:
             raise KeyError("在工作簿中找不到 `交易量价数据信息` 表，无法创建合并数据。")
-        data[SUMMARY_KEY] = data[SOURCE_KEY].copy()
+        # 计算函数都会先复制输入，这里直接共用同一份数据
+        loaders[SUMMARY_KEY] = partial(data.__getitem__, SOURCE_KEY)
     return data
 
 
@@ -166,56 +527,90 @@ def ensure_columns(summary_df: pd.DataFrame, info_df: pd.DataFrame) -> None:
         raise ValueError(f"基础信息 缺少必需列: {missing_info}")
 
 
-def compute_deep_adjustment(
-    data_out: Dict[str, pd.DataFrame], start_date: pd.Timestamp, end_date: pd.Timestamp
-) -> Tuple[pd.DataFrame, pd.DataFrame]:
-    summary_df = data_out[SUMMARY_KEY].copy()
-    info_df = data_out[INFO_KEY]
-    ensure_columns(summary_df, info_df)
-
-    summary_df["日期"] = pd.to_datetime(summary_df["日期"])
-    summary_df = summary_df[
-        (summary_df["日期"] >= start_date) &
-        (summary_df["日期"] <= end_date) &
-        (summary_df["日前出清节点价格"] >= 0) &
-        (summary_df["日前出清节点价格"] <= 200)
-    ]
-    if summary_df.empty:
-        return pd.DataFrame(columns=DEEP_RESULT_COLUMNS), summary_df
+def has_inter_provincial(summary_df: pd.DataFrame) -> bool:
+    return "省间中长期上网电量" in summary_df.columns and "省间中长期均价" in summary_df.columns
 
-    numeric_cols = [
-        "日前中标出力",
-        "省内中长期上网电量",
-        "省内中长期均价",
-        "日前出清节点价格",
-        "日内实际出力",
-    ]
-    has_inter = "省间中长期上网电量" in summary_df.columns and "省间中长期均价" in summary_df.columns
-    if has_inter:
-        numeric_cols.extend(["省间中长期上网电量", "省间中长期均价"])
-    for col in numeric_cols:
-        if col in summary_df.columns:
-            summary_df[col] = pd.to_numeric(summary_df[col], errors="coerce")
-
-    summary_df["匹配键"] = summary_df["公司名称"] + summary_df["机组名称"]
-    capacity_mapping = pd.DataFrame({
-        "匹配键": info_df["公司名称"] + info_df["机组名称"],
-        "机组容量": pd.to_numeric(info_df["机组容量"], errors="coerce"),
-    })
-    summary_df = summary_df.merge(capacity_mapping, on="匹配键", how="left")
-    summary_df["机组容量"] = pd.to_numeric(summary_df["机组容量"], errors="coerce").replace(0, pd.NA)
+
+def compute_contract_power(summary_df: pd.DataFrame, fill_missing: bool = False) -> pd.Series:
+    """省内 + 省间中长期上网电量；省间缺失按 0 计，fill_missing 时省内缺失也按 0 计"""
+    contract_power = summary_df["省内中长期上网电量"]
+    if fill_missing:
+        contract_power = contract_power.fillna(0)
+    if has_inter_provincial(summary_df):
+        contract_power = contract_power + summary_df["省间中长期上网电量"].fillna(0)
+    return contract_power
+
+
+def prepare_review_frame(
+    data_out: Mapping[str, pd.DataFrame], start_date: pd.Timestamp, end_date: pd.Timestamp
+) -> pd.DataFrame:
+    """深调收益和高价区间共用的准备：取日期区间的副本、生成 匹配键 并查出机组容量
+
+    返回的表仍按日期排序；有省间数据时省间电量/均价的缺失值已填 0。
+    """
+    summary_df = select_date_range(data_out[SUMMARY_KEY], "trade_price", start_date, end_date)
     if summary_df.empty:
-        return pd.DataFrame(columns=DEEP_RESULT_COLUMNS), summary_df
+        return summary_df
 
-    if has_inter:
+    capacity_index(data_out[INFO_KEY]).attach(summary_df)
+    if has_inter_provincial(summary_df):
         summary_df["省间中长期上网电量"] = summary_df["省间中长期上网电量"].fillna(0)
         summary_df["省间中长期均价"] = summary_df["省间中长期均价"].fillna(0)
-        contract_power = summary_df["省内中长期上网电量"] + summary_df["省间中长期上网电量"]
+    return summary_df
+
+
+def window_mask(summary_df: pd.DataFrame, start_date: pd.Timestamp, end_date: pd.Timestamp) -> pd.Series:
+    lower, upper = date_range_bounds(summary_df, start_date, end_date)
+    mask = np.zeros(len(summary_df), dtype=bool)
+    mask[lower:upper] = True
+    return pd.Series(mask, index=summary_df.index)
+
+
+def price_band_codes(summary_df: pd.DataFrame, bands: PriceBandSet = TRADE_PRICE_BANDS) -> Dict[str, np.ndarray]:
+    """日前/日内出清节点价格各分桶一次，得到每行的价格带编码"""
+    return {
+        column: bands.codes(summary_df[column].to_numpy(dtype="float64", na_value=np.nan))
+        for column in TRADE_PRICE_COLUMNS
+    }
+
+
+def low_price_mask(
+    summary_df: pd.DataFrame,
+    start_date: pd.Timestamp,
+    end_date: pd.Timestamp,
+    band_codes: Mapping[str, np.ndarray] | None = None,
+) -> pd.Series:
+    """窗口内日前价格落在低价带的行；band_codes 为 price_band_codes 的结果，缺省时现算"""
+    codes = (band_codes or price_band_codes(summary_df))["日前出清节点价格"]
+    return window_mask(summary_df, start_date, end_date) & TRADE_PRICE_BANDS.mask(codes, LOW_PRICE_BAND)
+
+
+def take_rows(
+    summary_df: pd.DataFrame, holding_position: pd.Series, row_mask: pd.Series
+) -> Tuple[pd.DataFrame, np.ndarray]:
+    return summary_df.loc[row_mask].copy(), holding_position[row_mask].to_numpy()
+
+
+def summarize_deep_adjustment(
+    summary_df: pd.DataFrame, holding_position: np.ndarray, period_column: str | None = None
+) -> Tuple[pd.DataFrame, pd.DataFrame]:
+    """在准备好的低价时段行上计算深调收益；holding_position 是这些行的公司口径中长期持仓
+
+    给出 period_column 时按该列分周期汇总，结果的第一列为周期。
+    """
+    periods = [period_column] if period_column else []
+    if summary_df.empty:
+        return (
+            pd.DataFrame(columns=[*periods, *DEEP_RESULT_COLUMNS]),
+            summary_df.drop(columns=["匹配键", "机组容量"], errors="ignore"),
+        )
+
+    contract_power = compute_contract_power(summary_df)
+    if has_inter_provincial(summary_df):
         intra_value = summary_df["省内中长期上网电量"] * summary_df["省内中长期均价"]
         inter_value = summary_df["省间中长期上网电量"] * summary_df["省间中长期均价"]
         total_contract_value = intra_value + inter_value
     else:
-        contract_power = summary_df["省内中长期上网电量"]
         total_contract_value = summary_df["省内中长期上网电量"] * summary_df["省内中长期均价"]
 
     contract_price = total_contract_value / contract_power
@@ -231,15 +626,15 @@ def compute_deep_adjustment(
          / HOURS_PER_RECORD
     ).where(condition, 0).fillna(0)
 
-    summary_df["中长期平均持仓"] = compute_company_holding_position(summary_df, contract_power)
+    summary_df["中长期平均持仓"] = holding_position
     status_column = resolve_status_column(summary_df)
-    running_mask = summary_df[status_column].fillna("").astype(str).str.strip() == RUNNING_STATUS
+    running_mask = running_status_mask(summary_df, status_column)
     summary_df["单台深调平均负荷"] = (
         summary_df["日内实际出力"] / summary_df["机组容量"]
     ).where(running_mask)
     filtered_output = summary_df.copy()
 
-    unit_df = summary_df.groupby("匹配键", as_index=False).agg(
+    unit_df = summary_df.groupby([*periods, "匹配键"], as_index=False, observed=True).agg(
         公司名称=("公司名称", "first"),
         日前低价时长_小时_=("日前出清节点价格", "count"),
         现货价格_=("日前出清节点价格", "mean"),
@@ -248,7 +643,7 @@ def compute_deep_adjustment(
         深调套利_元_=("深调套利收入", "sum"),
     )
 
-    result_df = unit_df.groupby("公司名称", as_index=False).agg(
+    result_df = unit_df.groupby([*periods, "公司名称"], as_index=False, observed=True).agg(
         日前低价时长_小时_=("日前低价时长_小时_", "mean"),
         现货价格_=("现货价格_", "mean"),
         深调平均负荷_=("深调平均负荷_", "mean"),
@@ -256,117 +651,102 @@ def compute_deep_adjustment(
         深调套利_元_=("深调套利_元_", "sum"),
     )
     company_holding_df = (
-        summary_df.groupby(build_company_time_group_keys(summary_df), as_index=False)["中长期平均持仓"]
+        summary_df.groupby([*periods, *build_company_time_group_keys(summary_df)], as_index=False, observed=True)["中长期平均持仓"]
         .first()
-        .groupby("公司名称", as_index=False)["中长期平均持仓"]
+        .groupby([*periods, "公司名称"], as_index=False, observed=True)["中长期平均持仓"]
         .mean()
         .rename(columns={"中长期平均持仓": "中长期平均持仓_"})
     )
     result_df = (
         result_df.drop(columns=["中长期平均持仓_"])
-        .merge(company_holding_df, on="公司名称", how="left")
+        .merge(company_holding_df, on=[*periods, "公司名称"], how="left")
     )
     result_df = result_df[
-        ["公司名称", "日前低价时长_小时_", "现货价格_", "深调平均负荷_", "中长期平均持仓_", "深调套利_元_"]
+        [*periods, "公司名称", "日前低价时长_小时_", "现货价格_", "深调平均负荷_", "中长期平均持仓_", "深调套利_元_"]
     ]
     result_df["日前低价时长_小时_"] /= HOURS_PER_RECORD
-    result_df.columns = DEEP_RESULT_COLUMNS
+    result_df.columns = [*periods, *DEEP_RESULT_COLUMNS]
     return result_df, filtered_output
 
 
-def compute_high_price_stats(
-    data_out: Dict[str, pd.DataFrame], start_date: pd.Timestamp, end_date: pd.Timestamp
+def aggregate_high_price_units(
+    summary_df: pd.DataFrame,
+    day_ahead_high_mask: pd.Series,
+    real_time_high_mask: pd.Series,
+    period_column: str | None = None,
 ) -> pd.DataFrame:
-    summary_df = data_out[SUMMARY_KEY].copy()
-    info_df = data_out[INFO_KEY].copy()
-
-    summary_df["日期"] = pd.to_datetime(summary_df["日期"])
-    summary_df = summary_df[
-        (summary_df["日期"] >= start_date) &
-        (summary_df["日期"] <= end_date)
-    ]
-    if summary_df.empty:
-        return pd.DataFrame(columns=HIGH_RESULT_COLUMNS)
-
-    numeric_cols = [
-        "日前中标出力",
-        "省内中长期上网电量",
-        "日前出清节点价格",
-        "日内实际出力",
-        "日内出清节点价格",
-    ]
-    has_inter = "省间中长期上网电量" in summary_df.columns and "省间中长期均价" in summary_df.columns
-    if has_inter:
-        numeric_cols.append("省间中长期上网电量")
-    for col in numeric_cols:
-        if col in summary_df.columns:
-            summary_df[col] = pd.to_numeric(summary_df[col], errors="coerce")
-
-    summary_df["匹配键"] = summary_df["公司名称"] + summary_df["机组名称"]
-    capacity_mapping = pd.DataFrame({
-        "匹配键": info_df["公司名称"] + info_df["机组名称"],
-        "机组容量": pd.to_numeric(info_df["机组容量"], errors="coerce"),
+    """按 匹配键（给出 period_column 时按 周期 + 匹配键）一次分组聚合出每台机组的高价区间统计（掩码求和/计数/均值）。"""
+    unit_keys = summary_df["匹配键"]
+    groupers = [summary_df[period_column], unit_keys] if period_column else unit_keys
+    masked = pd.DataFrame({
+        "日前高价点数": day_ahead_high_mask,
+        "实时高价点数": real_time_high_mask,
+        "日前现货高价均价": summary_df["日前出清节点价格"].where(day_ahead_high_mask),
+        "实时现货高价均价": summary_df["日内出清节点价格"].where(real_time_high_mask),
+        "中长期平均持仓": summary_df["中长期平均持仓_公司口径"].where(day_ahead_high_mask),
+        "日前高价中标出力": summary_df["日前中标出力"].where(day_ahead_high_mask),
+        "实时高价实际出力": summary_df["日内实际出力"].where(real_time_high_mask),
     })
-    summary_df = summary_df.merge(capacity_mapping, on="匹配键", how="left")
-    summary_df["机组容量"] = pd.to_numeric(summary_df["机组容量"], errors="coerce").replace(0, pd.NA)
-    if summary_df.empty:
-        return pd.DataFrame(columns=HIGH_RESULT_COLUMNS)
-
-    day_ahead_high_mask = (summary_df["日前出清节点价格"] >= 300) & (summary_df["日前出清节点价格"] <= 1500)
-    real_time_high_mask = (summary_df["日内出清节点价格"] >= 300) & (summary_df["日内出清节点价格"] <= 1500)
-    if has_inter:
-        contract_power_all = (
-            summary_df["省内中长期上网电量"].fillna(0) +
-            summary_df["省间中长期上网电量"].fillna(0)
-        )
-    else:
-        contract_power_all = summary_df["省内中长期上网电量"].fillna(0)
-    summary_df["中长期平均持仓_公司口径"] = compute_company_holding_position(summary_df, contract_power_all)
-
-    unit_stats = []
-    for unit_key in summary_df["匹配键"].dropna().unique():
-        unit_data = summary_df[summary_df["匹配键"] == unit_key]
-        day_ahead_high_data = unit_data[day_ahead_high_mask[unit_data.index]]
-        real_time_high_data = unit_data[real_time_high_mask[unit_data.index]]
-
-        day_ahead_high_hours = len(day_ahead_high_data) / HOURS_PER_RECORD
-        real_time_high_hours = len(real_time_high_data) / HOURS_PER_RECORD
-        day_ahead_high_avg_price = day_ahead_high_data["日前出清节点价格"].mean() if len(day_ahead_high_data) > 0 else 0
-        real_time_high_avg_price = real_time_high_data["日内出清节点价格"].mean() if len(real_time_high_data) > 0 else 0
-
-        capacity = unit_data["机组容量"].iloc[0]
-        if len(day_ahead_high_data) > 0:
-            mid_long_position = day_ahead_high_data["中长期平均持仓_公司口径"].mean()
-        else:
-            mid_long_position = 0
+    unit_df = masked.groupby(groupers, sort=False, observed=True).agg({
+        "日前高价点数": "sum",
+        "实时高价点数": "sum",
+        "日前现货高价均价": "mean",
+        "实时现货高价均价": "mean",
+        "中长期平均持仓": "mean",
+        "日前高价中标出力": "mean",
+        "实时高价实际出力": "mean",
+    })
+    if unit_df.empty:
+        return pd.DataFrame()
+
+    # 公司名称和机组容量取每台机组的第一行（与逐机组循环时的 iloc[0] 一致）
+    first_rows = summary_df.loc[unit_keys.notna(), ["匹配键", "公司名称", "机组容量"]]
+    unit_index = unit_df.index.get_level_values("匹配键") if period_column else unit_df.index
+    first_rows = first_rows.drop_duplicates("匹配键").set_index("匹配键").reindex(unit_index)
+    first_rows.index = unit_df.index
+    capacity = pd.to_numeric(first_rows["机组容量"], errors="coerce")
+
+    has_day_ahead = unit_df["日前高价点数"] > 0
+    has_real_time = unit_df["实时高价点数"] > 0
+    valid_capacity = capacity > 0
+    return pd.DataFrame({
+        "公司名称": first_rows["公司名称"],
+        "日前高价时长": unit_df["日前高价点数"] / HOURS_PER_RECORD,
+        "实时高价时长": unit_df["实时高价点数"] / HOURS_PER_RECORD,
+        "日前现货高价均价": unit_df["日前现货高价均价"].where(has_day_ahead, 0),
+        "实时现货高价均价": unit_df["实时现货高价均价"].where(has_real_time, 0),
+        "中长期平均持仓": unit_df["中长期平均持仓"].where(has_day_ahead, 0),
+        "高价日前平均中标负荷": (unit_df["日前高价中标出力"] / capacity).where(has_day_ahead & valid_capacity, 0),
+        "高价实时平均负荷": (unit_df["实时高价实际出力"] / capacity).where(has_real_time & valid_capacity, 0),
+    }).rename_axis([period_column, "匹配键"] if period_column else "匹配键").reset_index()
+
+
+def summarize_high_price_stats(
+    summary_df: pd.DataFrame,
+    holding_position: np.ndarray,
+    period_column: str | None = None,
+    band_codes: Mapping[str, np.ndarray] | None = None,
+) -> pd.DataFrame:
+    """在准备好的高价窗口行上计算高价区间统计；holding_position 是这些行的公司口径中长期持仓
 
-        day_ahead_avg_output = (
-            day_ahead_high_data["日前中标出力"].mean() / capacity
-            if len(day_ahead_high_data) > 0 and capacity and capacity > 0 else 0
-        )
-        real_time_avg_output = (
-            real_time_high_data["日内实际出力"].mean() / capacity
-            if len(real_time_high_data) > 0 and capacity and capacity > 0 else 0
-        )
+    给出 period_column 时按该列分周期汇总，结果的第一列为周期。band_codes 为这些行的
+    price_band_codes，缺省时现算。
+    """
+    periods = [period_column] if period_column else []
+    if summary_df.empty:
+        return pd.DataFrame(columns=[*periods, *HIGH_RESULT_COLUMNS])
 
-        unit_stats.append(
-            {
-                "匹配键": unit_key,
-                "公司名称": unit_data["公司名称"].iloc[0],
-                "日前高价时长": day_ahead_high_hours,
-                "实时高价时长": real_time_high_hours,
-                "日前现货高价均价": day_ahead_high_avg_price,
-                "实时现货高价均价": real_time_high_avg_price,
-                "中长期平均持仓": mid_long_position,
-                "高价日前平均中标负荷": day_ahead_avg_output,
-                "高价实时平均负荷": real_time_avg_output,
-            }
-        )
+    band_codes = band_codes or price_band_codes(summary_df)
+    day_ahead_high_mask, real_time_high_mask = (
+        pd.Series(TRADE_PRICE_BANDS.mask(band_codes[column], HIGH_PRICE_BAND), index=summary_df.index)
+        for column in TRADE_PRICE_COLUMNS
+    )
+    summary_df["中长期平均持仓_公司口径"] = holding_position
 
-    result_df = pd.DataFrame(unit_stats)
+    result_df = aggregate_high_price_units(summary_df, day_ahead_high_mask, real_time_high_mask, period_column)
     if result_df.empty:
-        return pd.DataFrame(columns=HIGH_RESULT_COLUMNS)
-    final_df = result_df.groupby("公司名称", as_index=False).agg(
+        return pd.DataFrame(columns=[*periods, *HIGH_RESULT_COLUMNS])
+    final_df = result_df.groupby([*periods, "公司名称"], as_index=False, observed=True).agg(
         {
             "日前高价时长": "mean",
             "实时高价时长": "mean",
@@ -380,51 +760,245 @@ def compute_high_price_stats(
     final_df["中长期平均持仓"] = final_df["中长期平均持仓"].apply(format_pct)
     final_df["高价日前平均中标负荷"] = final_df["高价日前平均中标负荷"].apply(format_pct)
     final_df["高价实时平均负荷"] = final_df["高价实时平均负荷"].apply(format_pct)
-    final_df.columns = HIGH_RESULT_COLUMNS
+    final_df.columns = [*periods, *HIGH_RESULT_COLUMNS]
     return final_df
 
 
-def write_results(output_path: Path, dfs: Dict[str, pd.DataFrame]) -> None:
-    output_path.parent.mkdir(parents=True, exist_ok=True)
-    with pd.ExcelWriter(output_path) as writer:
-        for sheet_name, df in dfs.items():
-            df.to_excel(writer, sheet_name=sheet_name[:31], index=False)
+def summarize_review(
+    prepared: pd.DataFrame,
+    deep_window: Tuple[pd.Timestamp, pd.Timestamp] | None,
+    high_window: Tuple[pd.Timestamp, pd.Timestamp] | None,
+    period_column: str | None = None,
+) -> Dict[str, pd.DataFrame]:
+    """在 prepare_review_frame 的结果（或其中若干公司的行）上计算持仓并汇总两项分析"""
+    row_masks: Dict[str, pd.Series] = {}
+    contract_powers: Dict[str, pd.Series] = {}
+    # 两项分析共用一次价格分桶
+    band_codes = price_band_codes(prepared)
+    if deep_window is not None:
+        row_masks["深调收益"] = low_price_mask(prepared, *deep_window, band_codes=band_codes)
+        contract_powers["深调收益"] = compute_contract_power(prepared)
+    if high_window is not None:
+        row_masks["高价区间"] = window_mask(prepared, *high_window)
+        contract_powers["高价区间"] = compute_contract_power(prepared, fill_missing=True)
+    if prepared.empty:
+        holdings = pd.DataFrame(index=prepared.index, columns=list(row_masks), dtype=float)
+    else:
+        holdings = compute_masked_holding_positions(prepared, contract_powers, row_masks)
+
+    results: Dict[str, pd.DataFrame] = {}
+    if deep_window is not None:
+        results["深调收益"], results["深调区间明细"] = summarize_deep_adjustment(
+            *take_rows(prepared, holdings["深调收益"], row_masks["深调收益"]), period_column
+        )
+    if high_window is not None:
+        high_rows = row_masks["高价区间"].to_numpy()
+        results["高价区间"] = summarize_high_price_stats(
+            *take_rows(prepared, holdings["高价区间"], row_masks["高价区间"]),
+            period_column,
+            {column: codes[high_rows] for column, codes in band_codes.items()},
+        )
+    return results
+
+
+def concat_company_results(
+    partials: Sequence[Dict[str, pd.DataFrame]], period_column: str | None
+) -> Dict[str, pd.DataFrame]:
+    """合并各公司的汇总结果：汇总表按 (周期,) 单位 排序，明细按原来的行顺序排列"""
+    results = {}
+    for name in partials[0]:
+        frames = [partial[name] for partial in partials if not partial[name].empty] or [partials[0][name]]
+        frame = pd.concat(frames)
+        if name == "深调区间明细":
+            frame = frame.sort_index()
+        elif period_column is not None:
+            frame = frame.sort_values([period_column, "单位"], kind="stable")
+        results[name] = frame
+    return results
+
+
+def run_review(
+    data_out: Mapping[str, pd.DataFrame],
+    deep_window: Tuple[pd.Timestamp, pd.Timestamp] | None,
+    high_window: Tuple[pd.Timestamp, pd.Timestamp] | None,
+    period: str | None = None,
+    backend: str = "serial",
+    max_workers: int | None = None,
+) -> Dict[str, pd.DataFrame]:
+    """在两个窗口的并集上只准备一次数据，再分别算出深调收益和高价区间
+
+    两项分析的公司口径持仓（深调只统计低价时段、高价区间统计整个窗口）在同一次分组中求出。
+    窗口为 None 的分析不计算；返回 "深调收益"/"深调区间明细"/"高价区间" 中对应的表。
+    period 为 PERIOD_FREQUENCIES 中的一项时，窗口按日/周/月切分，各表增加 周期 列（长表）。
+    持仓按 公司、日期、时间 分组，不会跨周期，所以各周期共用同一次持仓计算。
+    backend 为 process/thread 时按 公司名称 拆分准备好的数据，各公司的持仓和汇总在执行器中并行计算。
+    """
+    windows = [window for window in (deep_window, high_window) if window is not None]
+    if deep_window is not None:
+        ensure_columns(data_out[SUMMARY_KEY], data_out[INFO_KEY])
+    prepared = prepare_review_frame(
+        data_out, min(start for start, _ in windows), max(end for _, end in windows)
+    )
+    period_column = None
+    if period is not None:
+        period_column = PERIOD_COLUMN
+        prepared[PERIOD_COLUMN] = prepared["日期"].dt.to_period(PERIOD_FREQUENCIES[period])
+
+    if backend == "serial" or prepared.empty:
+        results = summarize_review(prepared, deep_window, high_window, period_column)
+    else:
+        # 持仓按 公司、日期、时间 分组，各公司的计算互不依赖；公司名称缺失的行也单独作为一组，与串行结果一致
+        company_frames = [frame for _, frame in prepared.groupby("公司名称", observed=True, dropna=False)]
+        with create_executor(backend, max_workers) as executor:
+            futures = [
+                executor.submit(summarize_review, frame, deep_window, high_window, period_column)
+                for frame in company_frames
+            ]
+            partials = [future.result() for future in futures]
+        results = concat_company_results(partials, period_column)
+
+    for name, frame in results.items():
+        frame = frame.reset_index(drop=True)
+        if period_column is not None and period_column in frame.columns:
+            frame[period_column] = frame[period_column].astype(str)
+        results[name] = frame
+    return results
+
+
+def compute_deep_adjustment(
+    data_out: Mapping[str, pd.DataFrame], start_date: pd.Timestamp, end_date: pd.Timestamp
+) -> Tuple[pd.DataFrame, pd.DataFrame]:
+    results = run_review(data_out, (start_date, end_date), None)
+    return results["深调收益"], results["深调区间明细"]
+
+
+def compute_high_price_stats(
+    data_out: Mapping[str, pd.DataFrame], start_date: pd.Timestamp, end_date: pd.Timestamp
+) -> pd.DataFrame:
+    return run_review(data_out, None, (start_date, end_date))["高价区间"]
+
+
+def write_results(output_path: Path, dfs: Dict[str, pd.DataFrame], engine: str = "auto") -> None:
+    write_excel_sheets(output_path, {sheet_name[:31]: df for sheet_name, df in dfs.items()}, engine=engine)
+
+
+def parse_spot_band(value: str) -> BandSpec:
+    """解析 名称=下限:上限，例如 0-200=0:200"""
+    try:
+        label, bounds = value.split("=", 1)
+        low, high = (float(part) for part in bounds.split(":"))
+    except ValueError as exc:
+        raise argparse.ArgumentTypeError(f"价格带 {value!r} 应为 名称=下限:上限，例如 0-200=0:200") from exc
+    return label.strip(), low, high
 
 
 def parse_args() -> argparse.Namespace:
     parser = argparse.ArgumentParser(description="Run review analysis pipeline.")
-    parser.add_argument("--spot-path", type=Path, default=Path("data_input/现货出清电价_REPORT0.xlsx"))
+    parser.add_argument(
+        "--period",
+        choices=sorted(PERIOD_FREQUENCIES),
+        help="按日/周/月批量复盘 [--period-start, --period-end]，结果为带 周期 列的长表（忽略 deep/high 日期参数）",
+    )
+    parser.add_argument("--period-start", help="批量复盘起始日期，与 --period 一起使用")
+    parser.add_argument("--period-end", help="批量复盘结束日期，与 --period 一起使用")
+    parser.add_argument(
+        "--backend",
+        choices=BACKENDS,
+        default="serial",
+        help="按公司并行计算的执行方式 (默认: %(default)s)；process 适合季度、全省范围的复盘",
+    )
+    parser.add_argument("--max-workers", type=int, default=None, help="并行进程/线程数，默认为 CPU 核心数")
+    parser.add_argument(
+        "--excel-engine",
+        choices=EXCEL_ENGINES,
+        default="auto",
+        help="结果 XLSX 的写出方式：auto 优先 xlsxwriter，未安装时用 openpyxl (默认: %(default)s)",
+    )
+    parser.add_argument(
+        "--spot-path",
+        type=Path,
+        default=Path("data_input/现货出清电价_REPORT0.xlsx"),
+        help=f"现货出清电价文件（可含多天），或包含多个 {SPOT_FILE_PATTERN} 的目录 (默认: %(default)s)",
+    )
+    parser.add_argument(
+        "--spot-band",
+        action="append",
+        type=parse_spot_band,
+        default=None,
+        metavar="名称=下限:上限",
+        help="现货价格带（闭区间，可重复，可以重叠；摘要取第一个为 0 价、最后一个为高价），默认: "
+        + ", ".join(f"{label}={low:g}:{high:g}" for label, low, high in SPOT_PRICE_BANDS),
+    )
     parser.add_argument("--output-workbook", type=Path, default=Path("data_output/output.xlsx"))
     parser.add_argument("--result-path", type=Path, default=Path("data_output/review_results.xlsx"))
     parser.add_argument("--deep-start-date", default=DEEP_START_DATE)
     parser.add_argument("--deep-end-date", default=DEEP_END_DATE)
     parser.add_argument("--high-start-date", default=HIGH_START_DATE)
     parser.add_argument("--high-end-date", default=HIGH_END_DATE)
-    return parser.parse_args()
+    parser.add_argument(
+        "--prune-columns",
+        action="store_true",
+        help="交易量价数据只读取分析用到的列（深调区间明细也只包含这些列）",
+    )
+    add_profile_arguments(parser)
+    args = parser.parse_args()
+    if args.period and not (args.period_start and args.period_end):
+        parser.error("--period 需要同时提供 --period-start 和 --period-end")
+    try:
+        args.spot_band = PriceBandSet(args.spot_band) if args.spot_band else SPOT_PRICE_BANDS
+    except ValueError as exc:
+        parser.error(str(exc))
+    return args
 
 
 def main() -> None:
     args = parse_args()
-    spot_summary_df, spot_detail_df = analyze_spot_prices(args.spot_path)
-    data_out = load_output_workbook(args.output_workbook)
-
-    deep_start = pd.to_datetime(args.deep_start_date)
-    deep_end = pd.to_datetime(args.deep_end_date)
-    high_start = pd.to_datetime(args.high_start_date)
-    high_end = pd.to_datetime(args.high_end_date)
-
-    deep_adjust_df, deep_filtered_df = compute_deep_adjustment(data_out, deep_start, deep_end)
-    high_price_df = compute_high_price_stats(data_out, high_start, high_end)
+    profiler = Profiler.from_args("review_analysis", args)
+    with profiler.stage("现货电价") as stage:
+        spot_summary_df, spot_detail_df, spot_daily_df = analyze_spot_price_days(args.spot_path, args.spot_band)
+        stage.rows, stage.bytes = len(spot_daily_df), path_bytes(args.spot_path)
+
+    if args.period:
+        deep_start = high_start = pd.to_datetime(args.period_start)
+        deep_end = high_end = pd.to_datetime(args.period_end)
+    else:
+        deep_start = pd.to_datetime(args.deep_start_date)
+        deep_end = pd.to_datetime(args.deep_end_date)
+        high_start = pd.to_datetime(args.high_start_date)
+        high_end = pd.to_datetime(args.high_end_date)
+    with profiler.stage("加载") as load_stage:
+        data_out = load_output_workbook(
+            args.output_workbook,
+            min(deep_start, high_start),
+            max(deep_end, high_end),
+            trade_columns=ANALYSIS_COLUMNS if args.prune_columns else None,
+        )
+        load_stage.bytes = path_bytes(args.output_workbook)
+
+    with profiler.stage("复盘分析") as stage:
+        review_frames = run_review(
+            data_out,
+            (deep_start, deep_end),
+            (high_start, high_end),
+            args.period,
+            backend=args.backend,
+            max_workers=args.max_workers,
+        )
+        stage.rows = sum(len(df) for df in review_frames.values())
+    # 工作表在分析中第一次用到时才解析，行数在分析结束后统计
+    load_stage.rows = data_out.loaded_rows()
 
     result_frames = {
         "现货摘录": spot_summary_df,
         "现货区间统计": spot_detail_df,
-        "深调收益": deep_adjust_df,
-        "深调区间明细": deep_filtered_df,
-        "高价区间": high_price_df,
+        "现货逐日统计": spot_daily_df,
+        **review_frames,
     }
-    write_results(args.result_path, result_frames)
-    print(f"分析完成，结果已保存到 {args.result_path}")
+    with profiler.stage("保存") as stage:
+        write_results(args.result_path, result_frames, engine=args.excel_engine)
+        stage.rows, stage.bytes = sum(len(df) for df in result_frames.values()), path_bytes(args.result_path)
+    print(f"分析完成，结果已保存到 {args.result_path}，用时 {format_duration(profiler.total_seconds)}")
+    profiler.finish()
 
 
 if __name__ == "__main__":
@@ -0,0 +1,274 @@
+#!/usr/bin/env python3
+"""Generate synthetic company workbooks, spot-price reports and merged outputs for local benchmarks.
+
+Layout under --root (same as the real pipeline expects):
+
+    data_input/<公司>-交易数据.xlsx          three sheets, title row + header row (header=1)
+    data_input/现货出清电价_REPORT0.xlsx     spot prices, 96 points per day plus a 均价 row per day
+    data_output/output.xlsx                  merged workbook as written by merge_data_files (--merged)
+    data_output/合并交易量价数据.xlsx        trade sheet only, for filter_output without columnar copies (--merged)
+"""
+from __future__ import annotations
+
+import argparse
+from datetime import date
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+POINTS_PER_DAY = 96
+DEFAULT_START_DATE = "2026-03-01"
+TRADE_SHEET = "1.交易量价数据信息"
+BASIC_SHEET = "1.基础信息"
+DAY_AHEAD_SHEET = "1.日前申报-信息"
+SPOT_FILE_NAME = "现货出清电价_REPORT0.xlsx"
+MERGED_WORKBOOK = "output.xlsx"
+MERGED_TRADE_WORKBOOK = "合并交易量价数据.xlsx"
+
+
+def company_names(count: int) -> list[str]:
+    return [f"测试电厂{index + 1:03d}" for index in range(count)]
+
+
+def unit_names(count: int) -> list[str]:
+    return [f"{index + 1}号机组" for index in range(count)]
+
+
+def time_labels() -> list[str]:
+    labels = []
+    for point in range(1, POINTS_PER_DAY + 1):
+        minutes = point * 15
+        labels.append(f"{minutes // 60:02d}:{minutes % 60:02d}")
+    return labels
+
+
+def build_basic_frame(company: str, units: int, seed: int = 0) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame({
+        "公司名称": company,
+        "机组名称": unit_names(units),
+        "机组容量": rng.choice([330.0, 350.0, 600.0, 660.0, 1000.0], size=units),
+        "机组类型": "燃煤",
+    })
+
+
+def build_price_curve(days: int, rng: np.random.Generator) -> np.ndarray:
+    """构造带峰谷形态的 96 点节点价格"""
+    phase = np.linspace(0, 2 * np.pi, POINTS_PER_DAY, endpoint=False)
+    shape = 380 - 260 * np.cos(phase - np.pi / 3)
+    curve = np.tile(shape, days) + rng.normal(0, 90, size=days * POINTS_PER_DAY)
+    return np.clip(curve, -50, 1500).round(2)
+
+
+def build_trade_frame(
+    company: str, units: int, days: int, start_date: date, seed: int = 0
+) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    capacities = build_basic_frame(company, units, seed)["机组容量"].to_numpy()
+    dates = pd.date_range(start_date, periods=days, freq="D")
+    day_ahead_price = build_price_curve(days, rng)
+    real_time_price = np.clip(day_ahead_price + rng.normal(0, 40, size=day_ahead_price.size), -50, 1500).round(2)
+
+    frames = []
+    for unit_index, unit in enumerate(unit_names(units)):
+        capacity = capacities[unit_index]
+        rows = days * POINTS_PER_DAY
+        running = np.repeat(rng.random(days) > 0.1, POINTS_PER_DAY)
+        load_ratio = np.clip(0.45 + (day_ahead_price / 1500) * 0.5 + rng.normal(0, 0.05, rows), 0.3, 1.0)
+        bid_output = np.where(running, capacity * load_ratio / 4, 0).round(3)
+        actual_output = np.where(running, bid_output * 4 * rng.uniform(0.95, 1.05, rows), 0).round(3)
+        frames.append(pd.DataFrame({
+            "公司名称": company,
+            "机组名称": unit,
+            "日期": np.repeat(dates, POINTS_PER_DAY),
+            "时间": np.tile(time_labels(), days),
+            "机组状态": np.where(running, "运行", "停运"),
+            "日前中标出力": bid_output,
+            "省内中长期上网电量": (capacity * rng.uniform(0.3, 0.6, rows) / 4).round(3),
+            "省内中长期均价": rng.uniform(360, 420, rows).round(2),
+            "省间中长期上网电量": (capacity * rng.uniform(0.0, 0.1, rows) / 4).round(3),
+            "省间中长期均价": rng.uniform(300, 450, rows).round(2),
+            "日前出清节点价格": day_ahead_price + rng.normal(0, 5, rows).round(2),
+            "日内实际出力": actual_output,
+            "日内出清节点价格": real_time_price + rng.normal(0, 5, rows).round(2),
+        }))
+    return pd.concat(frames, ignore_index=True)
+
+
+def build_day_ahead_frame(
+    company: str, units: int, days: int, start_date: date, seed: int = 0
+) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    dates = pd.date_range(start_date, periods=days, freq="D")
+    rows = []
+    for unit in unit_names(units):
+        for current in dates:
+            for segment in range(1, 6):
+                rows.append({
+                    "公司名称": company,
+                    "机组名称": unit,
+                    "日期": current,
+                    "申报段": segment,
+                    "申报出力": round(float(rng.uniform(100, 600)), 2),
+                    "申报价格": round(float(rng.uniform(200, 1200)), 2),
+                })
+    return pd.DataFrame(rows)
+
+
+def write_titled_sheets(path: Path, sheets: dict[str, pd.DataFrame]) -> None:
+    """按 header=1 的布局写入：第一行为标题，第二行为表头"""
+    with pd.ExcelWriter(path, engine="openpyxl") as writer:
+        for sheet_name, df in sheets.items():
+            df.to_excel(writer, sheet_name=sheet_name, index=False, startrow=1)
+            writer.sheets[sheet_name].cell(row=1, column=1, value=sheet_name.lstrip("1."))
+
+
+def write_company_workbook(
+    path: Path, company: str, units: int, days: int, start_date: date, seed: int = 0
+) -> Path:
+    write_titled_sheets(path, {
+        BASIC_SHEET: build_basic_frame(company, units, seed),
+        DAY_AHEAD_SHEET: build_day_ahead_frame(company, units, days, start_date, seed),
+        TRADE_SHEET: build_trade_frame(company, units, days, start_date, seed),
+    })
+    return path
+
+
+def generate_company_workbooks(
+    input_dir: Path,
+    companies: int,
+    units: int,
+    days: int,
+    start_date: date,
+) -> list[Path]:
+    input_dir.mkdir(parents=True, exist_ok=True)
+    paths = []
+    for index, company in enumerate(company_names(companies)):
+        path = input_dir / f"{company}-交易数据.xlsx"
+        paths.append(write_company_workbook(path, company, units, days, start_date, seed=index))
+    return paths
+
+
+def build_spot_frame(days: int, start_date: date, seed: int = 0) -> pd.DataFrame:
+    """REPORT0 布局：每天 96 个点（序号 1-96）后跟一行 均价"""
+    rng = np.random.default_rng(seed)
+    day_ahead = build_price_curve(days, rng).reshape(days, POINTS_PER_DAY)
+    real_time = np.clip(day_ahead + rng.normal(0, 40, size=day_ahead.shape), -50, 1500).round(2)
+    frames = []
+    for offset, current in enumerate(pd.date_range(start_date, periods=days, freq="D")):
+        frames.append(pd.DataFrame({
+            "序号": [str(point) for point in range(1, POINTS_PER_DAY + 1)] + ["均价"],
+            "日期": [current] * POINTS_PER_DAY + [pd.NaT],
+            "日前出清价格(元/MWh)": np.append(day_ahead[offset], day_ahead[offset].mean().round(2)),
+            "实时出清价格(元/MWh)": np.append(real_time[offset], real_time[offset].mean().round(2)),
+        }))
+    return pd.concat(frames, ignore_index=True)
+
+
+def write_spot_workbook(path: Path, days: int, start_date: date, seed: int = 0) -> Path:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    build_spot_frame(days, start_date, seed).to_excel(path, index=False)
+    return path
+
+
+def build_merged_frames(
+    companies: int, units: int, days: int, start_date: date
+) -> dict[str, pd.DataFrame]:
+    """与 merge_data_files 合并这些公司文件得到的三张表相同的数据"""
+    names = company_names(companies)
+    return {
+        "basic": pd.concat(
+            [build_basic_frame(name, units, seed=index) for index, name in enumerate(names)],
+            ignore_index=True,
+        ),
+        "day_ahead": pd.concat(
+            [build_day_ahead_frame(name, units, days, start_date, seed=index) for index, name in enumerate(names)],
+            ignore_index=True,
+        ),
+        "trade_price": pd.concat(
+            [build_trade_frame(name, units, days, start_date, seed=index) for index, name in enumerate(names)],
+            ignore_index=True,
+        ),
+    }
+
+
+def write_merged_outputs(
+    output_dir: Path,
+    companies: int,
+    units: int,
+    days: int,
+    start_date: date,
+    columnar: bool = True,
+) -> list[Path]:
+    """直接写出合并结果（不经过 merge_data_files），供 filter_output / review_analysis 基准使用
+
+    columnar 为 True 且安装了 pyarrow 时同时写出 merge_data_files 会写的列式副本和日期分区。
+    """
+    from columnar_store import parquet_available, partition_dir, write_columnar_copies, write_date_partitions
+    from excel_writer import EXCEL_MAX_ROWS, write_excel_sheets
+    from merge_data_files import OUTPUT_SHEETS
+
+    frames = build_merged_frames(companies, units, days, start_date)
+    too_large = [key for key, df in frames.items() if len(df) > EXCEL_MAX_ROWS]
+    if too_large:
+        raise ValueError(f"{', '.join(too_large)} 超过 Excel 单个工作表 {EXCEL_MAX_ROWS:,} 行的上限，请减小规模")
+    output_dir.mkdir(parents=True, exist_ok=True)
+    workbook = output_dir / MERGED_WORKBOOK
+    write_excel_sheets(workbook, {OUTPUT_SHEETS[key]: df for key, df in frames.items()})
+    if columnar and parquet_available():
+        write_columnar_copies(workbook, frames)
+        write_date_partitions(frames["trade_price"], partition_dir(workbook, "trade_price"))
+    trade_workbook = output_dir / MERGED_TRADE_WORKBOOK
+    write_excel_sheets(trade_workbook, {OUTPUT_SHEETS["trade_price"]: frames["trade_price"]})
+    return [workbook, trade_workbook]
+
+
+def generate_dataset(
+    root: Path,
+    companies: int,
+    units: int,
+    days: int,
+    start_date: date,
+    spot: bool = True,
+    merged: bool = False,
+) -> dict[str, list[Path]]:
+    """在 root 下生成一整套基准数据，返回各类文件的路径"""
+    written = {"companies": generate_company_workbooks(root / "data_input", companies, units, days, start_date)}
+    if spot:
+        written["spot"] = [write_spot_workbook(root / "data_input" / SPOT_FILE_NAME, days, start_date)]
+    if merged:
+        written["merged"] = write_merged_outputs(root / "data_output", companies, units, days, start_date)
+    return written
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Generate synthetic company workbooks.")
+    parser.add_argument("--root", type=Path, default=Path("bench_data"))
+    parser.add_argument("--companies", type=int, default=4)
+    parser.add_argument("--units", type=int, default=2)
+    parser.add_argument("--days", type=int, default=1)
+    parser.add_argument("--start-date", default=DEFAULT_START_DATE)
+    parser.add_argument("--no-spot", action="store_true", help="do not write the spot-price REPORT0 file")
+    parser.add_argument(
+        "--merged",
+        action="store_true",
+        help="also write data_output/output.xlsx (with columnar copies) and the trade-only merged workbook",
+    )
+    return parser.parse_args()
+
+
+def main() -> None:
+    args = parse_args()
+    start_date = pd.to_datetime(args.start_date).date()
+    written = generate_dataset(
+        args.root, args.companies, args.units, args.days, start_date,
+        spot=not args.no_spot, merged=args.merged,
+    )
+    print(f"已生成 {len(written['companies'])} 个公司文件: {args.root / 'data_input'}")
+    for path in written.get("spot", []) + written.get("merged", []):
+        print(f"已生成: {path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+"""CapacityIndex 与按 匹配键 merge 基础信息的原始写法对比"""
+from __future__ import annotations
+
+from datetime import date
+
+import numpy as np
+import pandas as pd
+
+import review_analysis as ra
+from synthetic_data import build_basic_frame, build_trade_frame, company_names
+
+
+def merged_capacity(summary_df: pd.DataFrame, info_df: pd.DataFrame) -> pd.Series:
+    """原来的写法：拼接 公司名称 + 机组名称 后 merge；重复的匹配键先只保留第一行，避免交易数据被复制"""
+    capacity_mapping = pd.DataFrame({
+        "匹配键": info_df["公司名称"] + info_df["机组名称"],
+        "机组容量": pd.to_numeric(info_df["机组容量"], errors="coerce"),
+    }).drop_duplicates("匹配键")
+    merged = pd.DataFrame({"匹配键": summary_df["公司名称"] + summary_df["机组名称"]}).merge(
+        capacity_mapping, on="匹配键", how="left"
+    )
+    return merged["机组容量"].replace(0, np.nan).astype("float64").set_axis(summary_df.index)
+
+
+def frames() -> tuple[pd.DataFrame, pd.DataFrame]:
+    names = company_names(3)
+    start = date(2026, 3, 1)
+    summary_df = pd.concat(
+        [build_trade_frame(name, 3, 1, start, seed=index) for index, name in enumerate(names)], ignore_index=True
+    )
+    info_df = pd.concat([build_basic_frame(name, 3, seed=index) for index, name in enumerate(names)], ignore_index=True)
+    info_df["机组容量"] = info_df["机组容量"].astype(object)
+    # 重复键（先出现的为准）、容量为 0、容量无法解析、基础信息中缺少的机组
+    duplicate = info_df.iloc[[0, 4]].assign(机组容量=[123.0, 456.0])
+    info_df.loc[1, "机组容量"] = 0
+    info_df.loc[2, "机组容量"] = "未知"
+    info_df = pd.concat([info_df.drop(index=8), duplicate], ignore_index=True)
+    return summary_df, info_df
+
+
+def test_attach_matches_merge_with_duplicate_keys():
+    summary_df, info_df = frames()
+    assert info_df.duplicated(["公司名称", "机组名称"]).any()
+    expected = merged_capacity(summary_df, info_df)
+    attached = summary_df.copy()
+    ra.CapacityIndex(info_df).attach(attached)
+    assert len(attached) == len(summary_df)
+    pd.testing.assert_series_equal(attached["机组容量"], expected, check_names=False)
+    assert attached["匹配键"].astype(str).tolist() == (summary_df["公司名称"] + summary_df["机组名称"]).tolist()
+    assert attached["机组容量"].isna().any()
+
+
+def test_attach_with_categorical_and_missing_names():
+    summary_df, info_df = frames()
+    summary_df = summary_df.astype({"公司名称": "category", "机组名称": "category"})
+    summary_df["机组名称"] = summary_df["机组名称"].cat.add_categories(["不存在的机组"])
+    summary_df.loc[0, "机组名称"] = "不存在的机组"
+    summary_df.loc[1, "公司名称"] = np.nan
+    expected = merged_capacity(summary_df.astype(object), info_df)
+    ra.CapacityIndex(info_df).attach(summary_df)
+    pd.testing.assert_series_equal(summary_df["机组容量"], expected, check_names=False)
+    assert summary_df["机组容量"].iloc[:2].isna().all()
+
+
+def test_capacity_index_is_rebuilt_when_info_changes():
+    _, info_df = frames()
+    first = ra.capacity_index(info_df)
+    assert ra.capacity_index(info_df.copy()) is first
+    changed = info_df.copy()
+    changed.loc[0, "机组容量"] = 999.0
+    assert ra.capacity_index(changed) is not first
@@ -0,0 +1,42 @@
+"""write_excel_chunks 在工作表超过 Excel 行数上限时报错，而不是静默截断"""
+from __future__ import annotations
+
+import pandas as pd
+import pytest
+
+import excel_writer
+from excel_writer import write_excel_chunks, write_excel_sheets
+
+ENGINES = [
+    pytest.param("xlsxwriter", marks=pytest.mark.skipif(not excel_writer.xlsxwriter_available(), reason="未安装 xlsxwriter")),
+    "openpyxl",
+]
+LIMIT = 10
+
+
+@pytest.fixture
+def small_limit(monkeypatch):
+    # 真实上限 1,048,575 行写一次要几十秒，这里把上限调小
+    monkeypatch.setattr(excel_writer, "EXCEL_MAX_ROWS", LIMIT)
+
+
+def frame(rows: int, start: int = 0) -> pd.DataFrame:
+    return pd.DataFrame({"序号": range(start, start + rows), "值": [0.5] * rows})
+
+
+@pytest.mark.parametrize("engine", ENGINES)
+def test_sheet_at_limit_is_written(tmp_path, small_limit, engine):
+    path = tmp_path / "out.xlsx"
+    write_excel_chunks(path, {"数据": (["序号", "值"], [frame(4), frame(LIMIT - 4, start=4)])}, engine=engine)
+    pd.testing.assert_frame_equal(pd.read_excel(path), frame(LIMIT))
+
+
+@pytest.mark.parametrize("engine", ENGINES)
+def test_sheet_over_limit_raises(tmp_path, small_limit, engine):
+    path = tmp_path / "out.xlsx"
+    with pytest.raises(ValueError, match="数据"):
+        write_excel_chunks(path, {"数据": (["序号", "值"], [frame(6), frame(LIMIT - 5, start=6)])}, engine=engine)
+    assert not path.exists()
+    with pytest.raises(ValueError, match="超限"):
+        write_excel_sheets(path, {"正常": frame(LIMIT), "超限": frame(LIMIT + 1)}, engine=engine)
+    assert not path.exists()
@@ -0,0 +1,24 @@
+"""筛选服务的查询参数解析：不合法的参数抛出 QueryError（HTTP 400）"""
+from __future__ import annotations
+
+import pytest
+
+from filter_server import QueryError, parse_limit, parse_query
+
+
+@pytest.mark.parametrize("value, expected", [(None, None), ("", None), ("0", 0), ("5", 5)])
+def test_parse_limit(value, expected):
+    params = {} if value is None else {"limit": [value]}
+    assert parse_limit(params) == expected
+
+
+@pytest.mark.parametrize("value", ["-5", "-1", "abc", "1.5"])
+def test_invalid_limit_is_rejected(value):
+    with pytest.raises(QueryError):
+        parse_limit({"limit": [value]})
+
+
+def test_parse_query_rejects_reversed_dates():
+    params = {"start_date": ["2026-03-03"], "end_date": ["2026-03-02"], "units": ["1号机组"]}
+    with pytest.raises(QueryError):
+        parse_query(params, "运行")
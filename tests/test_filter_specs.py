@@ -0,0 +1,42 @@
+"""批量筛选条件：重名的条件报错，名称不同但清理后相同的条件各占一个工作表"""
+from __future__ import annotations
+
+import json
+
+import pandas as pd
+import pytest
+
+from filter_output import load_filter_specs, save_batch_results
+
+
+def write_specs(path, records):
+    path.write_text(json.dumps({"filters": records}, ensure_ascii=False), encoding="utf-8")
+    return path
+
+
+def spec(name=None, **extra):
+    record = {"start_date": "2026-03-01", "end_date": "2026-03-02", "units": ["1号机组"], **extra}
+    if name is not None:
+        record["name"] = name
+    return record
+
+
+def test_duplicate_names_are_rejected(tmp_path):
+    path = write_specs(tmp_path / "specs.json", [spec("a/b:1"), spec("其他"), spec(" a/b:1 ", status="")])
+    with pytest.raises(SystemExit, match="第 3 条.*第 1 条"):
+        load_filter_specs(path, "运行")
+
+
+def test_default_names_follow_position(tmp_path):
+    path = write_specs(tmp_path / "specs.json", [spec(), spec("a"), spec()])
+    assert [item.name for item in load_filter_specs(path, "运行")] == ["筛选1", "a", "筛选3"]
+
+
+def test_names_sanitized_to_the_same_sheet_stay_separate(tmp_path):
+    path = write_specs(tmp_path / "specs.json", [spec("a/b:1"), spec("a_b_1")])
+    names = [item.name for item in load_filter_specs(path, "运行")]
+    results = {name: pd.DataFrame({"行": [position] * (position + 1)}) for position, name in enumerate(names)}
+    sheet_names = save_batch_results(results, tmp_path / "out.xlsx", engine="openpyxl")
+    assert sheet_names == {"a/b:1": "a_b_1", "a_b_1": "a_b_1_2"}
+    workbook = pd.read_excel(tmp_path / "out.xlsx", sheet_name=None)
+    assert {sheet: len(df) for sheet, df in workbook.items()} == {"a_b_1": 1, "a_b_1_2": 2}
@@ -0,0 +1,97 @@
+"""HoldingAggregate 与按区间 transform 求和的原始算法对比"""
+from __future__ import annotations
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import review_analysis as ra
+from synthetic_data import DEFAULT_START_DATE, build_basic_frame, build_trade_frame, company_names
+
+START = pd.Timestamp(DEFAULT_START_DATE)
+DAYS = 6
+
+
+def transform_holding(summary_df: pd.DataFrame, contract_power: pd.Series, row_mask: pd.Series) -> pd.Series:
+    """原来的写法：在整张交易表上按 公司、日期、时间 分组 transform 求和"""
+    groupers = [summary_df[key] for key in ra.build_company_time_group_keys(summary_df)]
+    status = summary_df[ra.resolve_status_column(summary_df)]
+    running_mask = status.fillna("").astype(str).str.strip() == ra.RUNNING_STATUS
+    contract_power = contract_power.fillna(0).where(row_mask, 0)
+    company_contract_power = contract_power.groupby(groupers, observed=True).transform("sum")
+    running_capacity = summary_df["机组容量"].where(running_mask, 0).fillna(0).where(row_mask, 0)
+    company_running_capacity = running_capacity.groupby(groupers, observed=True).transform("sum")
+    holding_ratio = (company_contract_power / company_running_capacity).where(company_running_capacity > 0, 0)
+    return holding_ratio.replace([float("inf"), float("-inf")], 0).fillna(0) * ra.HOURS_PER_RECORD
+
+
+def build_data_out(companies: int, units: int) -> dict[str, pd.DataFrame]:
+    """与 merge_data_files 输出相同结构的交易数据和基础信息"""
+    names = company_names(companies)
+    return {
+        ra.SUMMARY_KEY: pd.concat(
+            [build_trade_frame(name, units, DAYS, START.date(), seed=index) for index, name in enumerate(names)],
+            ignore_index=True,
+        ),
+        ra.INFO_KEY: pd.concat(
+            [build_basic_frame(name, units, seed=index) for index, name in enumerate(names)], ignore_index=True
+        ),
+    }
+
+
+@pytest.fixture(scope="module")
+def prepared():
+    summary_df = ra.prepare_review_frame(build_data_out(3, 3), START, START + pd.Timedelta(days=DAYS - 1))
+    # 一行缺少时间（区间键缺失），一行状态带空白，一行容量缺失
+    summary_df.loc[summary_df.index[5], "时间"] = None
+    summary_df.loc[summary_df.index[7], "机组状态"] = " 运行 "
+    summary_df.loc[summary_df.index[9], "机组容量"] = np.nan
+    contract_powers = {
+        "低价": ra.compute_contract_power(summary_df),
+        "全部": ra.compute_contract_power(summary_df, fill_missing=True),
+    }
+    row_masks = {
+        "低价": pd.Series(summary_df["日前出清节点价格"].to_numpy() <= 200, index=summary_df.index),
+        "全部": pd.Series(True, index=summary_df.index),
+    }
+    return summary_df, contract_powers, row_masks
+
+
+def subset(values: dict, index: pd.Index) -> dict:
+    return {name: series.loc[index] for name, series in values.items()}
+
+
+def test_full_aggregate_matches_transform(prepared):
+    summary_df, contract_powers, row_masks = prepared
+    result = ra.compute_masked_holding_positions(summary_df, contract_powers, row_masks)
+    for name in row_masks:
+        expected = transform_holding(summary_df, contract_powers[name], row_masks[name])
+        pd.testing.assert_series_equal(result[name], expected, check_names=False, rtol=1e-12)
+
+
+def test_append_matches_full_recompute(prepared):
+    summary_df, contract_powers, row_masks = prepared
+    full = ra.compute_masked_holding_positions(summary_df, contract_powers, row_masks)
+
+    # 按日期追加，其中前半段的区间拆在两次 append 中，检验已有区间的累加
+    first_half = summary_df["日期"] < START + pd.Timedelta(days=DAYS // 2)
+    odd = summary_df.index.to_numpy() % 2 == 1
+    parts = [summary_df[first_half & ~odd], summary_df[~first_half], summary_df[first_half & odd]]
+    aggregate, first_codes = ra.HoldingAggregate.from_frame(
+        parts[0], subset(contract_powers, parts[0].index), subset(row_masks, parts[0].index)
+    )
+    codes = [first_codes] + [
+        aggregate.append(part, subset(contract_powers, part.index), subset(row_masks, part.index))
+        for part in parts[1:]
+    ]
+    incremental = pd.concat([aggregate.holdings(part_codes, part.index) for part_codes, part in zip(codes, parts)])
+    pd.testing.assert_frame_equal(incremental.loc[summary_df.index], full, rtol=1e-12)
+    intervals = summary_df[ra.build_company_time_group_keys(summary_df)].dropna().drop_duplicates()
+    assert len(aggregate.table) == len(intervals)
+
+
+def test_append_rejects_other_masks(prepared):
+    summary_df, contract_powers, row_masks = prepared
+    aggregate, _ = ra.HoldingAggregate.from_frame(summary_df, contract_powers, row_masks)
+    with pytest.raises(ValueError):
+        aggregate.append(summary_df, contract_powers, {"全部": row_masks["全部"]})
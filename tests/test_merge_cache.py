@@ -0,0 +1,131 @@
+"""MergeCache 的命中与失效：按 路径 + 大小 + 修改时间 + 内容哈希 判断文件是否变化"""
+from __future__ import annotations
+
+import os
+import shutil
+from datetime import date
+
+import pandas as pd
+import pytest
+
+from merge_cache import MergeCache
+from merge_data_files import process_single_file
+from synthetic_data import SPOT_FILE_NAME, generate_company_workbooks, write_spot_workbook
+
+
+@pytest.fixture(scope="module")
+def source_dir(tmp_path_factory):
+    directory = tmp_path_factory.mktemp("data_input")
+    generate_company_workbooks(directory, companies=2, units=1, days=1, start_date=date(2026, 3, 1))
+    write_spot_workbook(directory / SPOT_FILE_NAME, days=1, start_date=date(2026, 3, 1))
+    return directory
+
+
+@pytest.fixture
+def input_dir(tmp_path, source_dir):
+    return shutil.copytree(source_dir, tmp_path / "data_input")
+
+
+def company_files(input_dir):
+    return sorted(path for path in input_dir.glob("*.xlsx") if path.name != SPOT_FILE_NAME)
+
+
+def cached(cache_dir, paths) -> MergeCache:
+    """解析并缓存 paths，保存清单后返回重新加载的缓存"""
+    cache = MergeCache(cache_dir)
+    for path in paths:
+        company_name, result = process_single_file(path)
+        cache.store(path, company_name, result)
+    cache.save()
+    return MergeCache(cache_dir)
+
+
+def test_lookup_returns_parsed_tables(tmp_path, input_dir):
+    path = company_files(input_dir)[0]
+    cache = cached(tmp_path / "cache", [path])
+    company_name, expected = process_single_file(path)
+    assert cache.contains(path)
+    hit_company, hit = cache.lookup(path)
+    assert hit_company == company_name
+    assert list(hit) == list(expected)
+    for table, df in expected.items():
+        pd.testing.assert_frame_equal(hit[table], df)
+
+
+def test_touched_file_still_hits(tmp_path, input_dir):
+    path = company_files(input_dir)[0]
+    cache = cached(tmp_path / "cache", [path])
+    stat = path.stat()
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+    assert cache.contains(path)
+    cache.save()
+    assert MergeCache(tmp_path / "cache").entries[str(path.resolve())]["mtime_ns"] == path.stat().st_mtime_ns
+
+
+def test_modified_file_misses(tmp_path, input_dir):
+    first, second = company_files(input_dir)
+    cache = cached(tmp_path / "cache", [first, second])
+    shutil.copyfile(second, first)
+    assert not cache.contains(first)
+    assert cache.contains(second)
+
+
+def test_same_size_with_new_content_misses(tmp_path, input_dir):
+    path = company_files(input_dir)[0]
+    cache = cached(tmp_path / "cache", [path])
+    stat = path.stat()
+    # 大小不变、修改时间变了时比较内容哈希
+    data = bytearray(path.read_bytes())
+    data[-1] ^= 0xFF
+    path.write_bytes(bytes(data))
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1))
+    assert path.stat().st_size == stat.st_size
+    assert not cache.contains(path)
+
+
+def test_missing_sidecar_misses(tmp_path, input_dir):
+    path = company_files(input_dir)[0]
+    cache = cached(tmp_path / "cache", [path])
+    next(path for path in (tmp_path / "cache").iterdir() if ".basic." in path.name).unlink()
+    assert not cache.contains(path)
+    assert cache.lookup(path) is None
+
+
+def test_store_replaces_old_sidecars(tmp_path, input_dir):
+    first, second = company_files(input_dir)
+    cache = cached(tmp_path / "cache", [first])
+    old_files = set((tmp_path / "cache").iterdir())
+    shutil.copyfile(second, first)
+    company_name, result = process_single_file(first)
+    cache.store(first, company_name, result)
+    cache.save()
+    remaining = set((tmp_path / "cache").iterdir())
+    assert remaining & old_files == {tmp_path / "cache" / "manifest.json"}
+
+
+def test_skipped_file_is_not_parsed_again(tmp_path, input_dir):
+    spot_path = input_dir / SPOT_FILE_NAME
+    company_name, result = process_single_file(spot_path)
+    assert all(df.empty for df in result.values())
+
+    cache = MergeCache(tmp_path / "cache")
+    cache.store_skipped(spot_path, company_name)
+    cache.save()
+    cache = MergeCache(tmp_path / "cache")
+    assert cache.skipped(spot_path)
+
+    with open(spot_path, "ab") as fh:
+        fh.write(b"\0")
+    assert not cache.skipped(spot_path)
+    assert not cache.contains(spot_path)
+
+
+def test_prune_drops_removed_files(tmp_path, input_dir):
+    first, second = company_files(input_dir)
+    cache = cached(tmp_path / "cache", [first, second])
+    sidecars = len(list((tmp_path / "cache").iterdir()))
+    assert cache.prune([second]) == 1
+    cache.save()
+    cache = MergeCache(tmp_path / "cache")
+    assert list(cache.entries) == [str(second.resolve())]
+    assert len(list((tmp_path / "cache").iterdir())) < sidecars
@@ -0,0 +1,61 @@
+"""StreamingAssembler 逐块读回的结果与 concat_frames 一次合并的结果对比"""
+from __future__ import annotations
+
+from datetime import date
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import merge_data_files as merge
+from merge_stream import StreamingAssembler
+from synthetic_data import build_basic_frame, build_trade_frame, company_names
+
+
+def company_frames() -> list[pd.DataFrame]:
+    """几家公司的交易数据，列和类型各不相同：类别/字符串公司名、Unnamed 列、缺列、全空行"""
+    start = date(2026, 3, 1)
+    names = company_names(4)
+    frames = [build_trade_frame(name, 2, 1, start, seed=index) for index, name in enumerate(names)]
+    frames[0] = frames[0].astype({"公司名称": "category", "机组名称": "category"})
+    frames[1]["Unnamed: 14"] = np.nan
+    frames[1].loc[3, :] = np.nan
+    frames[2] = frames[2].drop(columns=["省间中长期上网电量", "省间中长期均价"])
+    frames[3]["日前中标出力"] = frames[3]["日前中标出力"].round().astype("int64")
+    return frames
+
+
+def assembled(tmp_path, frames: list[pd.DataFrame]) -> tuple[StreamingAssembler, pd.DataFrame]:
+    assembler = StreamingAssembler(tmp_path, merge.CATEGORY_COLUMNS)
+    for df in frames:
+        assembler.add("trade_price", df)
+    return assembler, pd.concat(list(assembler.iter_chunks("trade_price")), ignore_index=True)
+
+
+@pytest.mark.parametrize("frames", [company_frames(), [build_basic_frame(name, 3) for name in company_names(3)]])
+def test_streaming_matches_concat(tmp_path, frames):
+    expected = merge.clean_dataframe(merge.concat_frames(frames)).reset_index(drop=True)
+    with StreamingAssembler(tmp_path, merge.CATEGORY_COLUMNS) as assembler:
+        for df in frames:
+            assembler.add("trade_price", df)
+        result = pd.concat(list(assembler.iter_chunks("trade_price")), ignore_index=True)
+        assert assembler.columns("trade_price") == list(expected.columns)
+        assert assembler.row_count("trade_price") == len(expected)
+        assert assembler.companies("trade_price") == list(expected["公司名称"].unique())
+    pd.testing.assert_frame_equal(result, expected)
+
+
+def test_categories_do_not_depend_on_file_order(tmp_path):
+    frames = company_frames()
+    _, forward = assembled(tmp_path, frames)
+    _, backward = assembled(tmp_path, frames[::-1])
+    for column in merge.CATEGORY_COLUMNS:
+        assert list(forward[column].cat.categories) == list(backward[column].cat.categories)
+        assert list(forward[column].cat.categories) == sorted(forward[column].dropna().unique())
+
+
+def test_cleanup_removes_spool(tmp_path):
+    assembler, _ = assembled(tmp_path, company_frames())
+    assert any(assembler.spool_dir.iterdir())
+    assembler.cleanup()
+    assert not assembler.spool_dir.exists()
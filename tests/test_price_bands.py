@@ -0,0 +1,53 @@
+"""PriceBandSet 的掩码与逐个价格带 (price >= low) & (price <= high) 比较的原始写法对比，重点是边界值"""
+from __future__ import annotations
+
+from datetime import date
+
+import numpy as np
+import pytest
+
+import review_analysis as ra
+from price_bands import PriceBandSet
+from synthetic_data import build_spot_frame
+
+EDGE_PRICES = np.array([
+    np.nan, -np.inf, -50.0, -1e-9, 0.0, 1e-9, 199.99, 200.0, np.nextafter(200.0, np.inf), 200.01,
+    299.99, 300.0, 565.99, 566.0, 799.99, 800.0, np.nextafter(800.0, np.inf), 1500.0, 1500.01, np.inf,
+])
+
+
+def band_mask(prices: np.ndarray, low: float, high: float) -> np.ndarray:
+    return (prices >= low) & (prices <= high)
+
+
+@pytest.mark.parametrize("bands", [
+    ra.TRADE_PRICE_BANDS,
+    ra.SPOT_PRICE_BANDS,
+    PriceBandSet([("0-200", 0, 200), ("200-800", 200, 800), ("800", 800, 800), ("全部", -np.inf, np.inf)]),
+])
+def test_masks_match_comparisons(bands):
+    spot = build_spot_frame(3, date(2026, 3, 1))["日前出清价格(元/MWh)"].to_numpy()
+    prices = np.concatenate([EDGE_PRICES, spot])
+    codes = bands.codes(prices)
+    for label, low, high in bands:
+        np.testing.assert_array_equal(bands.mask(codes, label), band_mask(prices, low, high), err_msg=label)
+
+
+def test_grouped_counts_match_comparisons():
+    bands = PriceBandSet([("0-200", 0, 200), ("200-800", 200, 800), ("800", 800, 800)])
+    groups = np.arange(len(EDGE_PRICES)) % 3
+    counts = bands.grouped_counts(groups, bands.codes(EDGE_PRICES), 3)
+    for k, (label, low, high) in enumerate(bands):
+        expected = [int(band_mask(EDGE_PRICES[groups == group], low, high).sum()) for group in range(3)]
+        assert counts[:, k].tolist() == expected, label
+
+
+@pytest.mark.parametrize("bands", [
+    [],
+    [("a", 0, 200), ("a", 300, 800)],
+    [("a", 800, 200)],
+    [("a", np.nan, 200)],
+])
+def test_invalid_bands(bands):
+    with pytest.raises(ValueError):
+        PriceBandSet(bands)
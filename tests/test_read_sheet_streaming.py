@@ -0,0 +1,46 @@
+"""openpyxl 只读流式读取与 pd.read_excel 对比，包括缺少或写错 dimension 信息的工作簿"""
+from __future__ import annotations
+
+import re
+import zipfile
+from datetime import date
+from pathlib import Path
+
+import pandas as pd
+import pytest
+
+import merge_data_files as merge
+from synthetic_data import write_company_workbook
+
+
+def rewrite_dimensions(source: Path, target: Path, replacement: str) -> Path:
+    """复制工作簿，把每个工作表的 <dimension .../> 替换为 replacement"""
+    with zipfile.ZipFile(source) as src, zipfile.ZipFile(target, "w", zipfile.ZIP_DEFLATED) as dst:
+        for item in src.infolist():
+            data = src.read(item.filename)
+            if item.filename.startswith("xl/worksheets/sheet"):
+                data = re.sub(rb"<dimension [^>]*/>", replacement.encode(), data)
+            dst.writestr(item, data)
+    return target
+
+
+@pytest.fixture(scope="module")
+def workbook(tmp_path_factory):
+    path = tmp_path_factory.mktemp("data_input") / "测试电厂001-交易数据.xlsx"
+    return write_company_workbook(path, "测试电厂001", units=2, days=1, start_date=date(2026, 3, 1))
+
+
+@pytest.mark.parametrize("replacement", ["", '<dimension ref="A1:A1"/>'])
+def test_sheets_without_dimension_match_read_excel(tmp_path, workbook, replacement):
+    path = rewrite_dimensions(workbook, tmp_path / workbook.name, replacement)
+    company_name, result = merge.process_single_file(path)
+    for key, sheet_name in merge.SHEET_NAMES.items():
+        expected = pd.read_excel(path, sheet_name=sheet_name, header=1)
+        assert not result[key].empty, sheet_name
+        assert result[key].shape == expected.shape, sheet_name
+        pd.testing.assert_frame_equal(
+            result[key].drop(columns="公司名称").astype(object),
+            expected.drop(columns="公司名称").astype(object),
+            check_dtype=False,
+        )
+        assert (result[key]["公司名称"] == company_name).all()
@@ -0,0 +1,36 @@
+"""run_review 按公司拆分并行计算的结果与串行计算一致"""
+from __future__ import annotations
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import review_analysis as ra
+from synthetic_data import DEFAULT_START_DATE, build_basic_frame, build_trade_frame, company_names
+
+START = pd.Timestamp(DEFAULT_START_DATE)
+DAYS = 3
+
+
+@pytest.fixture(scope="module")
+def data_out():
+    names = company_names(3)
+    trade = pd.concat(
+        [build_trade_frame(name, 2, DAYS, START.date(), seed=index) for index, name in enumerate(names)],
+        ignore_index=True,
+    )
+    # 部分行缺少公司名称：按公司拆分时不能丢掉这些行
+    trade.loc[trade.index % 7 == 0, "公司名称"] = np.nan
+    basic = pd.concat([build_basic_frame(name, 2, seed=index) for index, name in enumerate(names)], ignore_index=True)
+    return {ra.SUMMARY_KEY: trade, ra.INFO_KEY: basic}
+
+
+@pytest.mark.parametrize("period", [None, "daily"])
+def test_thread_backend_matches_serial(data_out, period):
+    window = (START, START + pd.Timedelta(days=DAYS - 1))
+    serial = ra.run_review(data_out, window, window, period=period)
+    threaded = ra.run_review(data_out, window, window, period=period, backend="thread", max_workers=2)
+    assert list(threaded) == list(serial)
+    for name, expected in serial.items():
+        pd.testing.assert_frame_equal(threaded[name], expected, obj=name)
+    assert serial["深调区间明细"]["公司名称"].isna().any()